@@ -0,0 +1,78 @@
+"""Benchmark adaptive step counts against the fixed `compute_step_rate` schedule.
+
+Builds symmetric n x n systems with prescribed condition numbers, solves each
+once with the fixed step count and once with `AdaptiveSteps`, and reports the
+fidelity of both solutions against `np.linalg.solve`, the step count that met
+the target, the steps saved against the fixed schedule (negative when the
+search ran more), and the total number of walk steps the search ran
+(including the runs that missed the target).
+
+    python benchmarks/bench_adaptive.py
+    python benchmarks/bench_adaptive.py --kappas 2 10 50 --fidelity 0.9999
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pysparq as sq
+
+from qalgo import Telemetry, qda, utils
+
+
+def make_system(dim, kappa, seed=0):
+    rng = np.random.default_rng(seed)
+    Q, _ = np.linalg.qr(rng.normal(size=(dim, dim)))
+    A = Q @ np.diag(np.linspace(1.0, 1.0 / kappa, dim)) @ Q.T
+    b = rng.uniform(0.0, 1.0, size=dim)
+    return A, b
+
+
+def fidelity(A, b, x_hat):
+    x = np.linalg.solve(A, b)
+    return abs(x @ x_hat) / (np.linalg.norm(x) * np.linalg.norm(x_hat))
+
+
+def run(A, b, kappa, step_rate, adaptive=None):
+    telemetry = Telemetry()
+    sq.System.clear()
+    start = time.perf_counter()
+    x_hat = qda.solve(
+        A, b, kappa=kappa, step_rate=step_rate, telemetry=telemetry, adaptive=adaptive
+    )
+    return time.perf_counter() - start, fidelity(A, b, x_hat), telemetry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dim", type=int, default=4)
+    parser.add_argument("--kappas", type=float, nargs="+", default=[2, 5, 10, 20])
+    parser.add_argument("--step-rate", type=float, default=0.01)
+    parser.add_argument("--fidelity", type=float, default=0.999)
+    parser.add_argument("--p-success", type=float, default=None)
+    args = parser.parse_args()
+
+    print(
+        f"{'kappa':>7} {'est':>7} {'fixed':>6} {'fid':>8} {'time [s]':>9} "
+        f"{'steps':>6} {'fid':>8} {'time [s]':>9} {'saved':>6} {'ran':>6}"
+    )
+    for kappa in args.kappas:
+        A, b = make_system(args.dim, kappa)
+        estimate = utils.condest(A)
+
+        t_fixed, f_fixed, fixed = run(A, b, estimate, args.step_rate)
+        adaptive = qda.AdaptiveSteps(fidelity=args.fidelity, p_success=args.p_success)
+        t_adaptive, f_adaptive, telemetry = run(
+            A, b, estimate, args.step_rate, adaptive
+        )
+        metrics = telemetry.metrics
+        print(
+            f"{kappa:7.3g} {estimate:7.3g} {fixed.metrics['steps']:>6} "
+            f"{f_fixed:8.6f} {t_fixed:9.3f} {metrics['adaptive_steps']:>6} "
+            f"{f_adaptive:8.6f} {t_adaptive:9.3f} {metrics['steps_saved']:>6} "
+            f"{metrics['walk_steps_total']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Benchmark the registered `qda.solve` backends.
+
+Runs `qda.calibrate` on random SPD systems of each size, `--repeat` times,
+and prints the resulting timing report: the median wall time per walk step of
+every backend (excluding the kappa estimate) and the backend
+`backend="auto"` selects for dense input at that size.
+
+    python benchmarks/bench_backends.py
+    python benchmarks/bench_backends.py --dims 2 4 8 --repeat 3
+"""
+
+import argparse
+
+from qalgo import qda
+from qalgo.qda.backends import select_backend
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dims", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--kappa", type=float, default=5.0)
+    parser.add_argument("--step-rate", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for _ in range(args.repeat):
+        qda.calibrate(args.dims, args.kappa, args.step_rate)
+
+    print(f"{'dim':>5} {'backend':>8} {'runs':>5} {'per step [ms]':>14} {'auto':>7}")
+    for row in qda.timings.report():
+        auto = select_backend(set(), row["dim"]).name
+        print(
+            f"{row['dim']:>5} {row['backend']:>8} {row['runs']:>5} "
+            f"{1e3 * row['per_step']:14.3f} {auto:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark the condition-number estimators of `utils.condest`.
+
+Compares the LU-based 1-norm estimate (method="splu") with the matrix-free
+ARPACK estimate of the 2-norm condition number (method="svds") on random
+sparse symmetric n x n matrices, and times a memoized repeat call. The
+diagonal is `--dominance` times the largest off-diagonal row sum, so values
+above 1 give diagonally dominant, well-conditioned matrices; values near or
+below 1 make the matrices ill-conditioned, where ARPACK needs many iterations
+to find the smallest singular value. Up to --exact-max-dim the estimates are
+checked against `np.linalg.cond`.
+
+    python benchmarks/bench_condest.py
+    python benchmarks/bench_condest.py --dims 1000 10000 --density 1e-3
+    python benchmarks/bench_condest.py --dims 1000 --dominance 0.2
+"""
+
+import argparse
+import time
+
+import numpy as np
+import scipy.sparse as sps
+
+from qalgo import utils
+
+
+def make_matrix(dim, density, dominance, seed=0):
+    rng = np.random.default_rng(seed)
+    A = sps.random_array(
+        (dim, dim),
+        density=density,
+        rng=rng,
+        data_sampler=lambda size: rng.uniform(-1.0, 1.0, size),
+    )
+    A = A + A.T
+    shift = dominance * abs(A).sum(axis=1).max()
+    return sps.csc_array(A + max(shift, 1e-3) * sps.eye_array(dim))
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dims", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--density", type=float, default=5e-3)
+    parser.add_argument("--dominance", type=float, default=1.1)
+    parser.add_argument("--exact-max-dim", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(
+        f"{'dim':>6} {'method':>6} {'estimate':>12} {'exact':>12} "
+        f"{'rel err':>9} {'time [s]':>10} {'memo [s]':>10}"
+    )
+    for dim in args.dims:
+        A = make_matrix(dim, args.density, args.dominance)
+        dense = A.toarray() if dim <= args.exact_max_dim else None
+        for method, norm in (("splu", 1), ("svds", 2)):
+            utils.condest_cache.clear()
+            seconds, estimate = timed(utils.condest, A, method=method)
+            memo_seconds, _ = timed(utils.condest, A, method=method)
+            if dense is not None:
+                exact = np.linalg.cond(dense, norm)
+                exact_col = f"{exact:12.6g}"
+                error_col = f"{abs(estimate - exact) / exact:9.2e}"
+            else:
+                exact_col, error_col = f"{'-':>12}", f"{'-':>9}"
+            print(
+                f"{dim:>6} {method:>6} {estimate:12.6g} {exact_col} {error_col} "
+                f"{seconds:10.4g} {memo_seconds:10.4g}"
+            )
+
+
+if __name__ == "__main__":
+    main()
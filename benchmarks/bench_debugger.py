@@ -0,0 +1,69 @@
+"""Benchmark the ideal eigenstates of the debug walk sequence.
+
+Compares a fresh dense solve of the 2n x 2n interpolated system per
+checkpoint (`QDADebugger` on its own) with `QDAReference`, which factorizes A
+once and then computes each ideal state with matrix-vector products, one
+checkpoint at a time and for all checkpoints as one batch.
+
+    python benchmarks/bench_debugger.py
+    python benchmarks/bench_debugger.py --dims 256 2048 --checkpoints 50
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from qalgo.qda.fundamental import QDADebugger, QDAReference, compute_fs
+
+KAPPA = 10.0
+P = 1.3
+
+
+def make_system(dim, seed=0):
+    rng = np.random.default_rng(seed)
+    A = rng.normal(size=(dim, dim))
+    A = (A + A.T) / np.sqrt(dim) + 3 * np.eye(dim)
+    b = rng.normal(size=dim)
+    return A / np.linalg.norm(A), b / np.linalg.norm(b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dims", type=int, nargs="+", default=[16, 128, 512, 1024])
+    parser.add_argument("--checkpoints", type=int, default=20)
+    args = parser.parse_args()
+
+    print(
+        f"{'dim':>6} {'solve/ckpt [s]':>15} {'svd [s]':>10} {'ref/ckpt [s]':>13} "
+        f"{'batch/ckpt [s]':>15} {'max diff':>9}"
+    )
+    schedule = np.linspace(0.0, 1.0, args.checkpoints)
+    for dim in args.dims:
+        A, b = make_system(dim)
+
+        start = time.perf_counter()
+        dense = [QDADebugger(A, b, s, KAPPA, P).get_mid_eigenstate() for s in schedule]
+        t_dense = (time.perf_counter() - start) / len(schedule)
+
+        start = time.perf_counter()
+        reference = QDAReference(A, b)
+        t_svd = time.perf_counter() - start
+
+        start = time.perf_counter()
+        single = [reference.get_mid_eigenstates(compute_fs(s, KAPPA, P)) for s in schedule]
+        t_single = (time.perf_counter() - start) / len(schedule)
+
+        start = time.perf_counter()
+        batch = reference.get_mid_eigenstates(compute_fs(schedule, KAPPA, P))
+        t_batch = (time.perf_counter() - start) / len(schedule)
+
+        diff = max(np.abs(np.array(dense) - batch).max(), np.abs(np.array(single) - batch).max())
+        print(
+            f"{dim:>6} {t_dense:15.3e} {t_svd:10.3e} {t_single:13.3e} "
+            f"{t_batch:15.3e} {diff:9.1e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
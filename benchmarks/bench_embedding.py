@@ -0,0 +1,126 @@
+"""Benchmark the peak memory of `classical2quantum` on a dense matrix.
+
+Compares the embedding as it was before building A_q in place (a copy of A
+on entry, a copy or zero-filled 2n x 2n array for the hermitization, an
+identity for the padding, and a copy on return) with `classical2quantum`,
+which writes A_q into one buffer, both from A loaded into memory and from A
+memory-mapped from its `.npy` file. Every case runs in a fresh spawned
+process. After A is loaded (or mapped), the peak RSS is reset (Linux; elsewhere
+the peak of imports and loading remains included), and the growth of the
+peak over the RSS at that point is reported in multiples of the size of A.
+A_q alone is 1x (4x for the [0 A; A^T 0] embedding). With A memory-mapped,
+the pages of A read from the file count as resident too, but they are clean
+page cache that the kernel can drop under memory pressure.
+
+    python benchmarks/bench_embedding.py
+    python benchmarks/bench_embedding.py --dims 1024 4096 --non-hermitian
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+
+import numpy as np
+
+CASES = ("legacy", "in place", "in place, mmap")
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10  # bytes on macOS
+
+
+def reset_peak_rss_mb():
+    """Reset the peak RSS to the current RSS where possible, and return it in MiB."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 2**10
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+def legacy_classical2quantum(A_c, b_c):
+    from qalgo import utils
+
+    A_c = np.array(A_c, dtype=np.float64)
+    b_c = np.array(b_c, dtype=np.float64)
+    if utils.is_hermitian(A_c):
+        A_herm = A_c.copy()
+    else:
+        n = A_c.shape[0]
+        A_herm = np.zeros((2 * n, 2 * n), dtype=A_c.dtype)
+        A_herm[:n, n:] = A_c
+        A_herm[n:, :n] = A_c.conj().T
+    herm_dim = A_herm.shape[0]
+    padded_dim = utils.next_power_of_2(herm_dim)
+    if padded_dim == herm_dim:
+        A_q = A_herm
+    else:
+        A_q = np.identity(padded_dim, dtype=A_herm.dtype)
+        A_q[:herm_dim, :herm_dim] = A_herm
+    A_q /= np.linalg.norm(A_q)
+    b_q = np.zeros(padded_dim)
+    b_q[: b_c.size] = b_c
+    b_q /= np.linalg.norm(b_q)
+    return np.array(A_q, dtype=np.float64), np.array(b_q, dtype=np.float64)
+
+
+def run_case(path, case):
+    """Peak RSS in MiB of loading A, and of loading and embedding it."""
+    from qalgo.qda import classical2quantum
+
+    A = np.load(path, mmap_mode="r" if case == "in place, mmap" else None)
+    b = np.ones(A.shape[0])
+    loaded = reset_peak_rss_mb()
+    if case == "legacy":
+        A_q, b_q = legacy_classical2quantum(A, b)
+    else:
+        A_q, b_q, _ = classical2quantum(A, b)
+    return loaded, peak_rss_mb()
+
+
+def run_isolated(path, case):
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(run_case, (path, case))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dims", type=int, nargs="+", default=[1000, 2048, 4000])
+    parser.add_argument(
+        "--non-hermitian",
+        action="store_true",
+        help="embed as [0 A; A^T 0] instead of a symmetric A",
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(2025)
+    print(f"{'dim':>6} {'A [MiB]':>8} " + " ".join(f"{case:>15}" for case in CASES))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "A.npy")
+        for dim in args.dims:
+            A = rng.normal(size=(dim, dim))
+            if not args.non_hermitian:
+                A += A.T
+            np.save(path, A)
+            size_mb = A.nbytes / 2**20
+            del A
+
+            columns = []
+            for case in CASES:
+                loaded, peak = run_isolated(path, case)
+                columns.append(f"{(peak - loaded) / size_mb:14.2f}x")
+            print(f"{dim:>6} {size_mb:8.1f} " + " ".join(columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Benchmark the QRAM data encoding of a dense matrix.
+
+Compares the element-wise encoder (a Python loop over `utils.make_complement`
+and `utils.get_complement`, as used before vectorization) with the array-native
+`scale_and_convert_vector` / `make_vector_tree` / `make_encoded_tree` path for
+n x n matrices flattened in column-major order, and checks that both produce
+the same uint64 tree.
+
+    python benchmarks/bench_encoding.py
+    python benchmarks/bench_encoding.py --dims 4 64 1024 --legacy-max-dim 256
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from qalgo import utils
+from qalgo.qda.fundamental import (
+    make_encoded_tree,
+    make_vector_tree,
+    scale_and_convert_vector,
+)
+
+EXPONENT = 15
+DATA_SIZE = 50
+
+
+def legacy_scale_and_convert_vector(input_vec, exponent, data_size):
+    scaled_values = np.rint(input_vec * 2.0**exponent).astype(np.int64)
+    return np.array(
+        [utils.make_complement(value, data_size) for value in scaled_values],
+        dtype=np.uint64,
+    )
+
+
+def legacy_make_vector_tree(dist, data_size):
+    dist_sz = len(dist)
+    temp_tree = dist.copy()
+    while dist_sz > 1:
+        temp = []
+        for i in range(0, dist_sz, 2):
+            if i + 1 < dist_sz:
+                if dist_sz == len(dist):
+                    temp.append(
+                        utils.get_complement(temp_tree[i], data_size) ** 2
+                        + utils.get_complement(temp_tree[i + 1], data_size) ** 2
+                    )
+                else:
+                    temp.append(temp_tree[i] + temp_tree[i + 1])
+        temp.extend(temp_tree)
+        temp_tree = np.array(temp, dtype=np.uint64)
+        dist_sz = (dist_sz + 1) // 2
+    return np.append(temp_tree, np.uint64(0))
+
+
+def best_of(repeat, func, *args):
+    best = np.inf
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--dims", type=int, nargs="+", default=[4, 16, 64, 256, 1024, 4096]
+    )
+    parser.add_argument(
+        "--legacy-max-dim",
+        type=int,
+        default=512,
+        help="skip the element-wise encoder above this dimension",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(2025)
+    print(
+        f"{'dim':>6} {'leaves':>10} {'legacy [s]':>12} {'vectorized [s]':>15} "
+        f"{'fused [s]':>10} {'speedup':>9} {'equal':>6}"
+    )
+    for dim in args.dims:
+        A = rng.uniform(-1.0, 1.0, size=(dim, dim))
+        A /= np.linalg.norm(A)
+        flat = A.flatten(order="F")
+
+        def vectorized():
+            conv = scale_and_convert_vector(flat, EXPONENT, DATA_SIZE)
+            return make_vector_tree(conv, DATA_SIZE)
+
+        t_vec, tree = best_of(args.repeat, vectorized)
+        t_fused, fused_tree = best_of(
+            args.repeat, make_encoded_tree, flat, EXPONENT, DATA_SIZE
+        )
+        equal = np.array_equal(tree, fused_tree)
+
+        if dim <= args.legacy_max_dim:
+
+            def legacy():
+                conv = legacy_scale_and_convert_vector(flat, EXPONENT, DATA_SIZE)
+                return legacy_make_vector_tree(conv, DATA_SIZE)
+
+            with np.errstate(over="ignore"):
+                t_legacy, legacy_tree = best_of(1, legacy)
+            equal = equal and np.array_equal(tree, legacy_tree)
+            legacy_col = f"{t_legacy:12.4g}"
+            speedup_col = f"{t_legacy / t_vec:8.1f}x"
+        else:
+            legacy_col = f"{'-':>12}"
+            speedup_col = f"{'-':>9}"
+
+        print(
+            f"{dim:>6} {flat.size:>10} {legacy_col} {t_vec:15.4g} "
+            f"{t_fused:10.4g} {speedup_col} {str(equal):>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
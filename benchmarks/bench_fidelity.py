@@ -0,0 +1,75 @@
+"""Benchmark the fidelity of state vectors.
+
+Compares the element-wise loop used by `get_fidelity` before vectorization with
+the `qda.fidelity` functions, for one state against one target and for a batch
+of k states (one call versus k calls), on real and complex vectors of size n.
+
+    python benchmarks/bench_fidelity.py
+    python benchmarks/bench_fidelity.py --sizes 16 65536 --batch 256
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+
+from qalgo.qda import fidelity
+from qalgo.qda.fundamental import get_fidelity
+
+
+def legacy_get_fidelity(state, target):
+    sum_val = 0
+    if isinstance(target[0], complex):
+        for s, t in zip(state, target):
+            sum_val += s * t.conjugate()
+    else:
+        for s, t in zip(state, target):
+            sum_val += s * t
+    return float(abs(sum_val))
+
+
+def best_of(repeat, func, *args):
+    timer = timeit.Timer(lambda: func(*args))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 256, 4096, 65536])
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(
+        f"{'n':>6} {'dtype':>10} {'legacy [s]':>11} {'vdot [s]':>10} {'speedup':>8} "
+        f"{'k loops [s]':>12} {'batched [s]':>12} {'speedup':>8}"
+    )
+    for n in args.sizes:
+        for dtype in (np.float64, np.complex128):
+            states = rng.normal(size=(args.batch, n)).astype(dtype)
+            target = rng.normal(size=n).astype(dtype)
+            if np.iscomplexobj(states):
+                states += 1j * rng.normal(size=(args.batch, n))
+
+            t_legacy = best_of(args.repeat, legacy_get_fidelity, states[0], target)
+            t_single = best_of(args.repeat, get_fidelity, states[0], target)
+            assert np.isclose(
+                legacy_get_fidelity(states[0], target), get_fidelity(states[0], target)
+            )
+
+            def loop():
+                return [fidelity.fidelity(state, target) for state in states]
+
+            t_loop = best_of(args.repeat, loop)
+            t_batch = best_of(args.repeat, fidelity.fidelity, states, target)
+            print(
+                f"{n:>6} {np.dtype(dtype).name:>10} {t_legacy:11.3e} {t_single:10.3e} "
+                f"{t_legacy / t_single:7.1f}x {t_loop:12.3e} {t_batch:12.3e} "
+                f"{t_loop / t_batch:7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
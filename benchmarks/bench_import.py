@@ -0,0 +1,69 @@
+"""Benchmark the import time of qalgo entry points.
+
+Imports each target in a fresh interpreter under `python -X importtime`,
+`--repeat` times, and reports the best cumulative import time of the target
+together with the heavy dependencies (NumPy, pysparq, SciPy) it pulled in.
+The last column runs `--use` after the import, to show what first access to
+a lazily loaded name costs.
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --targets qalgo qalgo.qda.fundamental --repeat 10
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+TARGETS = ("qalgo", "qalgo.qda", "qalgo.utils", "qalgo.qda.fundamental", "qalgo.qda.qram")
+HEAVY = ("numpy", "pysparq", "scipy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_time(statement):
+    """Cumulative import times in microseconds by module, and the total wall time."""
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    code = (
+        "import time; _start = time.perf_counter()\n"
+        f"{statement}\n"
+        "print(time.perf_counter() - _start)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules, float(result.stdout.split()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", nargs="+", default=list(TARGETS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--use", default="qalgo.qda.solve", help="attribute accessed after the import"
+    )
+    args = parser.parse_args()
+
+    print(f"{'target':>24} {'import [ms]':>12} {'loads':>22} {'+ use [ms]':>11}")
+    for target in args.targets:
+        best = best_use = float("inf")
+        for _ in range(args.repeat):
+            modules, seconds = import_time(f"import {target}")
+            best = min(best, seconds)
+            _, seconds = import_time(f"import {target}; {args.use}")
+            best_use = min(best_use, seconds)
+        loaded = ",".join(name for name in HEAVY if name in modules) or "-"
+        print(f"{target:>24} {1e3 * best:12.1f} {loaded:>22} {1e3 * best_use:11.1f}")
+
+
+if __name__ == "__main__":
+    main()
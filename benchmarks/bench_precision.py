@@ -0,0 +1,78 @@
+"""Benchmark runtime and fidelity of `qda.solve` against register width.
+
+Solves one symmetric system per size with the fixed default widths
+(exponent 15, data_size 50, rational_size 51), with the widths planned by
+`plan_precision` for each `--tols` target, and with the narrowest words for
+each of `--exponents` (data_size = 2 exponent + 1, rational_size
+`--rational-size`). Reports the widths, the peak qubit count and System size
+of pysparq, the wall time, and the fidelity against `np.linalg.solve`.
+
+    python benchmarks/bench_precision.py
+    python benchmarks/bench_precision.py --dims 4 8 --tols 1e-2 1e-4 --exponents 4 8
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pysparq as sq
+
+from qalgo import Telemetry, qda, utils
+
+
+def make_system(dim, kappa, seed=0):
+    rng = np.random.default_rng(seed)
+    Q, _ = np.linalg.qr(rng.normal(size=(dim, dim)))
+    A = Q @ np.diag(np.linspace(1.0, 1.0 / kappa, dim)) @ Q.T
+    b = rng.uniform(0.0, 1.0, size=dim)
+    return A, b
+
+
+def run(A, b, kappa, step_rate, precision):
+    telemetry = Telemetry()
+    sq.System.clear()
+    start = time.perf_counter()
+    x_hat = qda.solve(
+        A, b, kappa=kappa, step_rate=step_rate, precision=precision, telemetry=telemetry
+    )
+    seconds = time.perf_counter() - start
+    x = np.linalg.solve(A, b)
+    fidelity = abs(x @ x_hat) / (np.linalg.norm(x) * np.linalg.norm(x_hat))
+    return seconds, fidelity, telemetry.metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dims", type=int, nargs="+", default=[4, 8])
+    parser.add_argument("--kappa", type=float, default=5.0)
+    parser.add_argument("--step-rate", type=float, default=0.01)
+    parser.add_argument("--tols", type=float, nargs="+", default=[1e-2, 1e-3, 1e-4])
+    parser.add_argument("--exponents", type=int, nargs="+", default=[4, 8])
+    parser.add_argument("--rational-size", type=int, default=16)
+    args = parser.parse_args()
+
+    print(
+        f"{'dim':>4} {'widths':>12} {'exp':>4} {'data':>5} {'rat':>4} {'qubits':>7} "
+        f"{'system':>7} {'time [s]':>9} {'1 - fidelity':>13}"
+    )
+    for dim in args.dims:
+        A, b = make_system(dim, args.kappa)
+        kappa = utils.condest(A)
+        cases = [("default", None)]
+        cases += [(f"tol={tol:g}", tol) for tol in args.tols]
+        cases += [
+            (f"exp={e}", qda.Precision.for_exponent(e, args.rational_size))
+            for e in args.exponents
+        ]
+        for label, precision in cases:
+            seconds, fidelity, metrics = run(A, b, kappa, args.step_rate, precision)
+            widths = metrics["precision"]
+            print(
+                f"{dim:>4} {label:>12} {widths.exponent:>4} {widths.data_size:>5} "
+                f"{widths.rational_size:>4} {metrics['max_qubit_count']:>7} "
+                f"{metrics['max_system_size']:>7} {seconds:9.3f} {1 - fidelity:13.2e}"
+            )
+
+
+if __name__ == "__main__":
+    main()
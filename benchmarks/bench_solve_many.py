@@ -0,0 +1,65 @@
+"""Benchmark the amortized cost per right-hand side of `qda.solve_many`.
+
+Solves the same matrix against k right-hand sides, once with k independent
+`qda.solve` calls and once with `qda.solve_many`, and reports the wall time per
+right-hand side together with the per-stage breakdown from `Telemetry`.
+
+    python benchmarks/bench_solve_many.py --dim 4 --rhs 1 4 16
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pysparq as sq
+
+from qalgo import Telemetry, qda
+
+STAGES = ("condest", "encoding", "tree_build", "qram", "state_prep", "walk")
+
+
+def make_system(dim, rhs, seed=0):
+    rng = np.random.default_rng(seed)
+    A = rng.uniform(0.0, 1.0, size=(dim, dim))
+    A = A + A.T + dim * np.eye(dim)
+    B = rng.uniform(0.0, 1.0, size=(dim, rhs))
+    return A, B
+
+
+def run_independent(A, B, step_rate):
+    telemetry = Telemetry()
+    start = time.perf_counter()
+    for j in range(B.shape[1]):
+        sq.System.clear()
+        qda.solve(A, B[:, j], step_rate=step_rate, telemetry=telemetry)
+    return time.perf_counter() - start, telemetry
+
+
+def run_batched(A, B, step_rate):
+    telemetry = Telemetry()
+    start = time.perf_counter()
+    qda.solve_many(A, B, step_rate=step_rate, telemetry=telemetry)
+    return time.perf_counter() - start, telemetry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dim", type=int, default=4)
+    parser.add_argument("--rhs", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--step-rate", type=float, default=0.002)
+    args = parser.parse_args()
+
+    header = " ".join(f"{stage:>10}" for stage in STAGES)
+    print(f"{'k':>4} {'engine':>11} {'per rhs [s]':>12} {header}")
+    for k in args.rhs:
+        A, B = make_system(args.dim, k)
+        for engine, run in (("solve", run_independent), ("solve_many", run_batched)):
+            total, telemetry = run(A, B, args.step_rate)
+            stages = " ".join(
+                f"{telemetry.timings.get(stage, 0.0) / k:10.2e}" for stage in STAGES
+            )
+            print(f"{k:>4} {engine:>11} {total / k:12.4g} {stages}")
+
+
+if __name__ == "__main__":
+    main()
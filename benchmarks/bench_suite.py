@@ -0,0 +1,213 @@
+"""Benchmark suite for `qda.solve` over generated matrix families.
+
+Every case solves one generated system and records the wall time of each
+`Telemetry` stage, the peak RSS of the process, the peak pysparq System size
+and the fidelity of the solution against `np.linalg.solve`. Cases run in a
+fresh worker process each (unless `--in-process`), so the peak RSS belongs to
+that case alone. Families:
+
+* spd: random symmetric positive definite, condition number near `kappa`;
+* nonhermitian: random non-symmetric, condition number near `kappa`;
+* banded: `scipy.sparse` tridiagonal SPD with bandwidth `--bandwidth`;
+* kappa: symmetric with a prescribed spectrum in [1/kappa, 1].
+
+`--prune-threshold` / `--prune-top-k` run every case with a `PruningPolicy`,
+to measure the accuracy traded for a smaller state. Results are written as
+JSON together with the qalgo / pysparq versions, and `--compare` reports the
+cases whose total time grew past `--threshold` against an earlier results
+file:
+
+    python benchmarks/bench_suite.py --output bench.json
+    python benchmarks/bench_suite.py --dims 4 8 --kappas 2 10 --families spd banded
+    python benchmarks/bench_suite.py --output new.json --compare bench.json
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+from importlib import metadata
+
+import numpy as np
+import pysparq as sq
+import scipy.sparse as sps
+
+from qalgo import Telemetry, qda
+
+FAMILIES = ("spd", "nonhermitian", "banded", "kappa")
+STAGES = ("condest", "encoding", "tree_build", "qram", "state_prep", "walk", "projection")
+
+
+def _with_spectrum(Q, singular_values, P=None):
+    return Q @ np.diag(singular_values) @ (Q if P is None else P).T
+
+
+def make_system(family, dim, kappa, bandwidth=1, seed=0):
+    """Matrix A (dense or sparse) and right-hand side b of one case."""
+    rng = np.random.default_rng(seed)
+    b = rng.uniform(0.0, 1.0, size=dim)
+    if family == "banded":
+        # Diagonally dominant, so kappa only sets the diagonal shift.
+        offsets = range(-bandwidth, bandwidth + 1)
+        bands = [-np.ones(dim - abs(k)) for k in offsets if k]
+        A = sps.diags(bands, [k for k in offsets if k], shape=(dim, dim))
+        shift = 2 * bandwidth * (1 + 2 / (kappa - 1)) if kappa > 1 else 4 * bandwidth
+        return sps.csr_array(A + shift * sps.eye_array(dim)), b
+
+    Q, _ = np.linalg.qr(rng.normal(size=(dim, dim)))
+    if family == "kappa":
+        return _with_spectrum(Q, np.linspace(1.0, 1.0 / kappa, dim)), b
+    spectrum = np.geomspace(1.0, 1.0 / kappa, dim)
+    rng.shuffle(spectrum)
+    if family == "spd":
+        return _with_spectrum(Q, spectrum), b
+    if family == "nonhermitian":
+        P, _ = np.linalg.qr(rng.normal(size=(dim, dim)))
+        return _with_spectrum(Q, spectrum, P), b
+    raise ValueError(f"Unknown family {family!r}, expected one of {FAMILIES}.")
+
+
+def fidelity(A, b, x_hat):
+    A = A.toarray() if sps.issparse(A) else A
+    x = np.linalg.solve(A, b)
+    return float(abs(x @ x_hat) / (np.linalg.norm(x) * np.linalg.norm(x_hat)))
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10  # bytes on macOS
+
+
+def run_case(case):
+    family, dim, kappa, step_rate, bandwidth, pruning = case
+    A, b = make_system(family, dim, kappa, bandwidth)
+    sq.System.clear()
+    telemetry = Telemetry()
+    start = time.perf_counter()
+    x_hat = qda.solve(
+        A, b, step_rate=step_rate, telemetry=telemetry, pruning=pruning
+    )
+    total = time.perf_counter() - start
+    metrics = telemetry.metrics
+    return {
+        "family": family,
+        "dim": dim,
+        "kappa": kappa,
+        "step_rate": step_rate,
+        "nnz": int(A.nnz) if sps.issparse(A) else int(np.count_nonzero(A)),
+        "total_seconds": total,
+        "stages": {stage: telemetry.timings.get(stage, 0.0) for stage in STAGES},
+        "kappa_estimate": float(metrics["kappa"]),
+        "steps": metrics["steps"],
+        "padded_dim": metrics["padded_dim"],
+        "p_success": float(metrics["p_success"]),
+        "pruned_mass": metrics.get("pruned_mass"),
+        "max_system_size": metrics["max_system_size"],
+        "max_qubit_count": metrics["max_qubit_count"],
+        "peak_rss_mb": peak_rss_mb(),
+        "fidelity": fidelity(A, b, x_hat),
+    }
+
+
+def run_isolated(case):
+    # A spawned worker per case: ru_maxrss never decreases within a process.
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(run_case, (case,))
+
+
+def environment():
+    versions = {}
+    for package in ("qalgo", "pysparq", "numpy", "scipy"):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "versions": versions,
+    }
+
+
+def case_key(result):
+    return result["family"], result["dim"], result["kappa"], result["step_rate"]
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = {case_key(result): result for result in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        previous = baseline.get(case_key(result))
+        if previous is None:
+            continue
+        ratio = result["total_seconds"] / previous["total_seconds"]
+        if ratio > threshold:
+            regressions.append((case_key(result), ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--families", nargs="+", choices=FAMILIES, default=list(FAMILIES))
+    parser.add_argument("--dims", type=int, nargs="+", default=[4, 8])
+    parser.add_argument("--kappas", type=float, nargs="+", default=[2, 10])
+    parser.add_argument("--step-rate", type=float, default=0.01)
+    parser.add_argument("--bandwidth", type=int, default=1)
+    parser.add_argument("--prune-threshold", type=float, default=None)
+    parser.add_argument("--prune-top-k", type=int, default=None)
+    parser.add_argument("--prune-every", type=int, default=1)
+    parser.add_argument("--min-fidelity", type=float, default=0.9)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    parser.add_argument("--in-process", action="store_true")
+    args = parser.parse_args()
+
+    run = run_case if args.in_process else run_isolated
+    pruning = None
+    if args.prune_threshold is not None or args.prune_top_k is not None:
+        pruning = qda.PruningPolicy(
+            args.prune_threshold, args.prune_top_k, args.prune_every
+        )
+    print(
+        f"{'family':>12} {'dim':>4} {'kappa':>6} {'steps':>6} {'total [s]':>10} "
+        f"{'walk [s]':>9} {'rss [MiB]':>10} {'system':>7} {'fidelity':>9}"
+    )
+    results = []
+    failed = []
+    for family, dim, kappa in itertools.product(args.families, args.dims, args.kappas):
+        result = run((family, dim, kappa, args.step_rate, args.bandwidth, pruning))
+        results.append(result)
+        if not result["fidelity"] >= args.min_fidelity:
+            failed.append(case_key(result))
+        print(
+            f"{family:>12} {dim:>4} {kappa:6.3g} {result['steps']:>6} "
+            f"{result['total_seconds']:10.3f} {result['stages']['walk']:9.3f} "
+            f"{result['peak_rss_mb']:10.1f} {result['max_system_size']:>7} "
+            f"{result['fidelity']:9.6f}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+    status = 0
+    if failed:
+        print(f"fidelity below {args.min_fidelity}: {failed}")
+        status = 1
+    if args.compare:
+        for key, ratio in compare(results, args.compare, args.threshold):
+            print(f"regression {key}: {ratio:.2f}x the baseline time")
+            status = 1
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark the peak memory of building the QRAM data tree of a dense matrix.
+
+Compares `make_encoded_tree` on the column-major flattening of A (a copy of A
+plus a scaled temporary of the same size) with `make_matrix_encoded_tree`,
+which encodes A in blocks straight into the leaves, once from A in memory and
+once from A memory-mapped from a `.npy` file into a memory-mapped tree file,
+as `TreeCache` does on a miss. Peak memory is the tracemalloc peak of NumPy
+allocations on top of A, relative to the size of the tree (2 N^2 words).
+
+    python benchmarks/bench_tree.py
+    python benchmarks/bench_tree.py --dims 1024 4096 --chunk-mib 16
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from qalgo.qda.fundamental import make_encoded_tree, make_matrix_encoded_tree
+
+EXPONENT = 15
+DATA_SIZE = 50
+
+
+def measure(func):
+    """Wall time, tracemalloc peak in bytes and the result of func()."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dims", type=int, nargs="+", default=[256, 1024, 2048])
+    parser.add_argument("--chunk-mib", type=float, default=64)
+    args = parser.parse_args()
+    chunk_bytes = int(args.chunk_mib * 2**20)
+
+    rng = np.random.default_rng(2025)
+    print(
+        f"{'dim':>6} {'tree [MiB]':>11} {'flatten [s]':>12} {'peak':>6} "
+        f"{'blocks [s]':>11} {'peak':>6} {'mmap [s]':>9} {'peak':>6} {'equal':>6}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for dim in args.dims:
+            A = rng.uniform(-1.0, 1.0, size=(dim, dim))
+            A /= np.linalg.norm(A)
+            tree_bytes = 2 * A.size * 8
+
+            t_flat, peak_flat, reference = measure(
+                lambda: make_encoded_tree(A.flatten(order="F"), EXPONENT, DATA_SIZE)
+            )
+            t_block, peak_block, tree = measure(
+                lambda: make_matrix_encoded_tree(
+                    A, EXPONENT, DATA_SIZE, chunk_bytes=chunk_bytes
+                )
+            )
+            equal = np.array_equal(tree, reference)
+            del tree
+
+            path = os.path.join(tmp, "A.npy")
+            np.save(path, A)
+            mapped = np.load(path, mmap_mode="r")
+            out = np.lib.format.open_memmap(
+                os.path.join(tmp, "tree.npy"),
+                mode="w+",
+                dtype=np.uint64,
+                shape=(2 * A.size,),
+            )
+            t_mmap, peak_mmap, tree = measure(
+                lambda: make_matrix_encoded_tree(
+                    mapped, EXPONENT, DATA_SIZE, out=out, chunk_bytes=chunk_bytes
+                )
+            )
+            equal = equal and np.array_equal(tree, reference)
+            del tree, out, mapped
+
+            print(
+                f"{dim:>6} {tree_bytes / 2**20:11.1f} "
+                f"{t_flat:12.4g} {peak_flat / tree_bytes:5.2f}x "
+                f"{t_block:11.4g} {peak_block / tree_bytes:5.2f}x "
+                f"{t_mmap:9.4g} {peak_mmap / tree_bytes:5.2f}x {str(equal):>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Benchmark walk-operator construction against state evolution.
+
+Runs the walk sequence `--runs` times from a freshly prepared state and
+reports, per step, the time spent constructing walk operators separately from
+the time spent evolving the sparse state:
+
+* per-step: a fresh `Walk_s_via_QRAM_Debug` (walk operator plus debugger) for
+  every step of every run, as the debug sequence used to do;
+* cached: `WalkSequence_via_QRAM`, which compiles each operator once and
+  reuses it for all runs.
+
+    python benchmarks/bench_walk.py --steps 200 --runs 3
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pysparq as sq
+
+from qalgo.qda.fundamental import make_encoded_tree
+from qalgo.qda.qram import (
+    Walk_s_via_QRAM_Debug,
+    WalkSequence_via_QRAM,
+    classical2quantum,
+)
+
+DATA_SIZE = 50
+RATIONAL_SIZE = 51
+EXPONENT = 15
+KAPPA = 10.0
+P = 1.3
+REGISTERS = ("main_reg", "anc_UA", "anc_1", "anc_2", "anc_3", "anc_4")
+
+
+def prepare(dim, seed=0):
+    rng = np.random.default_rng(seed)
+    A = rng.uniform(-1.0, 1.0, size=(dim, dim))
+    A = A + A.T + dim * np.eye(dim)
+    b = rng.uniform(-1.0, 1.0, size=dim)
+    A, b, _ = classical2quantum(A, b)
+
+    log_column_size = int(np.log2(A.shape[0]))
+    tree_A = make_encoded_tree(A.flatten(order="F"), EXPONENT, DATA_SIZE)
+    tree_b = make_encoded_tree(b, EXPONENT, DATA_SIZE)
+    qram_A = sq.QRAMCircuit_qutrit(2 * log_column_size + 1, DATA_SIZE, tree_A)
+    qram_b = sq.QRAMCircuit_qutrit(log_column_size + 1, DATA_SIZE, tree_b)
+    return A, b, qram_A, qram_b, log_column_size
+
+
+def new_state(qram_b, log_column_size):
+    sq.System.clear()
+    state = sq.SparseState()
+    sq.AddRegister("main_reg", sq.StateStorageType.UnsignedInteger, log_column_size)(
+        state
+    )
+    sq.AddRegister("anc_UA", sq.StateStorageType.UnsignedInteger, log_column_size)(
+        state
+    )
+    for name in ("anc_4", "anc_3", "anc_2", "anc_1"):
+        sq.AddRegister(name, sq.StateStorageType.Boolean, 1)(state)
+    sq.State_Prep_via_QRAM(qram_b, "main_reg", DATA_SIZE, RATIONAL_SIZE)(state)
+    return state
+
+
+def run_per_step(A, b, qram_A, qram_b, log_column_size, steps, runs):
+    construct = evolve = 0.0
+    for _ in range(runs):
+        state = new_state(qram_b, log_column_size)
+        for n in range(steps):
+            start = time.perf_counter()
+            walk = Walk_s_via_QRAM_Debug(
+                qram_A,
+                qram_b,
+                A,
+                b,
+                *REGISTERS,
+                n / steps,
+                KAPPA,
+                P,
+                DATA_SIZE,
+                RATIONAL_SIZE,
+            )
+            mid = time.perf_counter()
+            walk(state)
+            sq.ClearZero()(state)
+            construct += mid - start
+            evolve += time.perf_counter() - mid
+    return construct, evolve
+
+
+def run_cached(qram_A, qram_b, log_column_size, steps, runs):
+    sequence = WalkSequence_via_QRAM(
+        qram_A,
+        qram_b,
+        *REGISTERS,
+        steps,
+        KAPPA,
+        P,
+        DATA_SIZE,
+        RATIONAL_SIZE,
+        cache_size=None,  # keep every step across the runs
+    )
+    state = new_state(qram_b, log_column_size)  # compile() binds the registers
+    start = time.perf_counter()
+    sequence.compile()
+    construct = time.perf_counter() - start
+    evolve = 0.0
+    for run in range(runs):
+        if run > 0:
+            state = new_state(qram_b, log_column_size)
+        start = time.perf_counter()
+        sequence(state)
+        evolve += time.perf_counter() - start
+    return construct, evolve
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dims", type=int, nargs="+", default=[4, 8])
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    applications = args.steps * args.runs
+    print(
+        f"{'dim':>4} {'engine':>9} {'construct/step [us]':>20} "
+        f"{'evolve/step [us]':>17} {'construct share':>16}"
+    )
+    for dim in args.dims:
+        A, b, qram_A, qram_b, log_column_size = prepare(dim)
+        results = {
+            "per-step": run_per_step(
+                A, b, qram_A, qram_b, log_column_size, args.steps, args.runs
+            ),
+            "cached": run_cached(
+                qram_A, qram_b, log_column_size, args.steps, args.runs
+            ),
+        }
+        for engine, (construct, evolve) in results.items():
+            print(
+                f"{dim:>4} {engine:>9} {1e6 * construct / applications:20.2f} "
+                f"{1e6 * evolve / applications:17.2f} "
+                f"{construct / (construct + evolve):15.2%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,29 @@
-from . import qda
-from .utils import condest
\ No newline at end of file
+import importlib
+from typing import TYPE_CHECKING
+
+# Loaded on first access (PEP 562), so `import qalgo` does not pull in pysparq
+# or SciPy.
+_SUBMODULES = {"io", "qda", "utils", "telemetry"}
+_LAZY = {
+    "Telemetry": ".telemetry",
+    "condest": ".utils",
+}
+
+if TYPE_CHECKING:
+    from . import io, qda, telemetry, utils
+    from .telemetry import Telemetry
+    from .utils import condest
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | _SUBMODULES | set(_LAZY))
@@ -0,0 +1,171 @@
+"""Loading linear systems from files.
+
+Supported formats:
+
+* `.npy`: a dense array, memory-mapped read-only.
+* `.npz`: a `np.savez` archive, holding the array under `key` (or as its only
+  member). Members of uncompressed archives (the default of `np.savez`) are
+  memory-mapped in place; those of `np.savez_compressed` archives are read
+  into memory. A `scipy.sparse.save_npz` file loads as a CSR array.
+* `.mtx`, `.mtx.gz`: Matrix Market, via `scipy.io.mmread`. Coordinate files
+  load as a CSR array, array files as a dense array in memory.
+
+A memory-mapped matrix is only paged in as the solver reads it, and the
+pipeline reads it in blocks, so solving a dense system close to the size of
+RAM does not need a full in-memory copy of the input besides the embedded
+matrix:
+
+    A, b = qalgo.io.load_system("system.npz")
+    x = qda.solve(A, b, kappa=10.0)
+    x = qda.solve_file("A.npy", "b.npy", kappa=10.0)  # the same, in one call
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import struct
+import zipfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+from numpy.typing import NDArray
+
+if TYPE_CHECKING:
+    import scipy.sparse as sps
+
+logger = logging.getLogger(__name__)
+
+# Fields of the zip local file header: signature, ..., name and extra lengths.
+_LOCAL_HEADER = struct.Struct("<4s22xHH")
+_HEADER_READERS = {
+    (1, 0): np.lib.format.read_array_header_1_0,
+    (2, 0): np.lib.format.read_array_header_2_0,
+}
+_SPARSE_NPZ_KEYS = {"format", "shape", "data"}
+
+
+def _suffix(path: Path) -> str:
+    suffixes = [suffix.lower() for suffix in path.suffixes]
+    if suffixes[-2:] == [".mtx", ".gz"]:
+        return ".mtx.gz"
+    return suffixes[-1] if suffixes else ""
+
+
+def _mmap_npz_member(path: Path, member: str) -> Optional[np.memmap]:
+    """Memory-map an uncompressed member of an `.npz` archive, if possible."""
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(member)
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+    with open(path, "rb") as f:
+        f.seek(info.header_offset)
+        signature, name_len, extra_len = _LOCAL_HEADER.unpack(
+            f.read(_LOCAL_HEADER.size)
+        )
+        if signature != b"PK\x03\x04":
+            return None
+        f.seek(name_len + extra_len, os.SEEK_CUR)
+        read_header = _HEADER_READERS.get(np.lib.format.read_magic(f))
+        if read_header is None:
+            return None
+        shape, fortran_order, dtype = read_header(f)
+        offset = f.tell()
+    if dtype.hasobject:
+        return None
+    return np.memmap(
+        path,
+        dtype=dtype,
+        mode="r",
+        shape=shape,
+        order="F" if fortran_order else "C",
+        offset=offset,
+    )
+
+
+def _load_npz(path: Path, key: Optional[str], mmap: bool):
+    with np.load(path) as archive:
+        names = archive.files
+        if _SPARSE_NPZ_KEYS <= set(names):
+            import scipy.sparse as sps
+
+            return sps.csr_array(sps.load_npz(path))
+        if key is None:
+            if len(names) != 1:
+                raise ValueError(
+                    f"{path} holds {names}; pass the key of the array to load."
+                )
+            key = names[0]
+        elif key not in names:
+            raise ValueError(f"{path} has no array {key!r}, only {names}.")
+        if mmap:
+            array = _mmap_npz_member(path, f"{key}.npy")
+            if array is not None:
+                return array
+            logger.info("%s is compressed; reading %r into memory.", path, key)
+        return archive[key]
+
+
+def load_array(
+    path: str | os.PathLike, key: Optional[str] = None, mmap: bool = True
+) -> NDArray | sps.csr_array:
+    """Load an array from a `.npy`, `.npz` or Matrix Market file.
+
+    Args:
+        path (str | os.PathLike): The file. The format is taken from its extension.
+        key (Optional[str], optional): Name of the array in an `.npz` archive holding several. Defaults to None.
+        mmap (bool, optional): Memory-map dense arrays read-only where the format allows it. Defaults to True.
+
+    Raises:
+        ValueError: If the extension is not supported, or `key` does not name one array of an `.npz` archive.
+
+    Returns:
+        NDArray | sps.csr_array: A (possibly memory-mapped) array, or a CSR array for sparse formats.
+    """
+    path = Path(path).expanduser()
+    suffix = _suffix(path)
+    if suffix == ".npy":
+        return np.load(path, mmap_mode="r" if mmap else None)
+    if suffix == ".npz":
+        return _load_npz(path, key, mmap)
+    if suffix in (".mtx", ".mtx.gz"):
+        import scipy.io
+        import scipy.sparse as sps
+
+        array = scipy.io.mmread(path)
+        return sps.csr_array(array) if sps.issparse(array) else array
+    raise ValueError(f"Unsupported file {path}. Use .npy, .npz, .mtx or .mtx.gz.")
+
+
+def load_system(
+    A_path: str | os.PathLike,
+    b_path: Optional[str | os.PathLike] = None,
+    mmap: bool = True,
+) -> tuple[NDArray[np.float64] | sps.csr_array, NDArray[np.float64]]:
+    """Load the matrix and right-hand side of Ax = b.
+
+    Args:
+        A_path (str | os.PathLike): File of A, see `load_array`. Without `b_path` it must be an `.npz` archive holding both "A" and "b".
+        b_path (Optional[str | os.PathLike], optional): File of b. It is always read into memory. Defaults to None.
+        mmap (bool, optional): Memory-map a dense A where the format allows it. Defaults to True.
+
+    Raises:
+        ValueError: If A is not square or b does not match it.
+
+    Returns:
+        tuple: A (a read-only memory map when possible, or a CSR array) and b as a 1D float64 array.
+    """
+    if b_path is None:
+        A = load_array(A_path, "A", mmap)
+        b = load_array(A_path, "b", mmap=False)
+    else:
+        A = load_array(A_path, mmap=mmap)
+        b = load_array(b_path, mmap=False)
+    b = b.toarray() if hasattr(b, "toarray") else b
+    b = np.asarray(b, dtype=np.float64).ravel()
+    if A.ndim != 2 or A.shape[0] != A.shape[1]:
+        raise ValueError(f"A must be a square matrix, got shape {A.shape}.")
+    if A.shape[0] != b.size:
+        raise ValueError(f"b has {b.size} entries for a matrix of shape {A.shape}.")
+    return A, b
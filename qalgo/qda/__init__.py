@@ -1,12 +1,155 @@
-import numpy as np
-import pysparq as sq
+"""Quantum linear system solver based on the discrete adiabatic theorem.
 
-from .qram import solve, classical2quantum
+The public names and the submodules are loaded on first access (PEP 562),
+so `import qalgo.qda` is cheap and each name only loads the submodule that
+defines it. The encoders in `fundamental` need only NumPy. `classical2quantum`
+and the other names of `qram` load pysparq and the solve pipeline (backends,
+snapshots, pruning, projection), but not the process pool of `parallel`.
+SciPy is only loaded by the code paths that handle sparse matrices or
+estimate kappa.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+# Public name -> submodule defining it.
+_LAZY = {
+    "AdaptiveSteps": ".adaptive",
+    "AdaptiveTrial": ".adaptive",
+    "Backend": ".backends",
+    "BackendTimings": ".backends",
+    "available_backends": ".backends",
+    "calibrate": ".backends",
+    "register_backend": ".backends",
+    "timings": ".backends",
+    "TreeCache": ".cache",
+    "CheckpointRecord": ".checkpoint",
+    "EveryK": ".checkpoint",
+    "LastN": ".checkpoint",
+    "LogSpaced": ".checkpoint",
+    "TimeBudget": ".checkpoint",
+    "Classical2QuantumCache": ".memo",
+    "MatrixEmbedding": ".memo",
+    "JobResult": ".parallel",
+    "ParallelSolver": ".parallel",
+    "solve_parallel": ".parallel",
+    "Precision": ".precision",
+    "plan_precision": ".precision",
+    "Projection": ".projection",
+    "PruningPolicy": ".pruning",
+    "EmbeddingLayout": ".qram",
+    "PreparedSystem": ".qram",
+    "classical2quantum": ".qram",
+    "prepare": ".qram",
+    "solve": ".qram",
+    "solve_file": ".qram",
+    "solve_many": ".qram",
+    "StateSnapshot": ".snapshot",
+    "StateSnapshots": ".snapshot",
+    "load_snapshot": ".snapshot",
+}
+
+_SUBMODULES = {
+    "adaptive",
+    "backends",
+    "cache",
+    "checkpoint",
+    "fidelity",
+    "fundamental",
+    "memo",
+    "parallel",
+    "precision",
+    "projection",
+    "pruning",
+    "qram",
+    "snapshot",
+}
+
+# The native pysparq implementations.
+_NATIVE = {
+    "_classical2quantum": "qda_classical2quantum",
+    "_solve": "qda_solve",
+}
+
+if TYPE_CHECKING:
+    from .adaptive import AdaptiveSteps, AdaptiveTrial
+    from .backends import (
+        Backend,
+        BackendTimings,
+        available_backends,
+        calibrate,
+        register_backend,
+        timings,
+    )
+    from .cache import TreeCache
+    from .checkpoint import CheckpointRecord, EveryK, LastN, LogSpaced, TimeBudget
+    from .memo import Classical2QuantumCache, MatrixEmbedding
+    from .parallel import JobResult, ParallelSolver, solve_parallel
+    from .precision import Precision, plan_precision
+    from .projection import Projection
+    from .pruning import PruningPolicy
+    from .qram import (
+        EmbeddingLayout,
+        PreparedSystem,
+        classical2quantum,
+        prepare,
+        solve,
+        solve_file,
+        solve_many,
+    )
+    from .snapshot import StateSnapshot, StateSnapshots, load_snapshot
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        # Importing a submodule also binds it in this namespace.
+        return importlib.import_module(f".{name}", __name__)
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    elif name in _NATIVE:
+        value = getattr(importlib.import_module("pysparq"), _NATIVE[name])
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | _SUBMODULES | set(_LAZY) | set(_NATIVE))
 
-_classical2quantum = sq.qda_classical2quantum
-_solve = sq.qda_solve
 
 __all__ = [
     "solve",
+    "solve_many",
+    "solve_file",
+    "prepare",
+    "PreparedSystem",
+    "ParallelSolver",
+    "JobResult",
+    "solve_parallel",
     "classical2quantum",
+    "EmbeddingLayout",
+    "TreeCache",
+    "Classical2QuantumCache",
+    "MatrixEmbedding",
+    "CheckpointRecord",
+    "EveryK",
+    "LogSpaced",
+    "LastN",
+    "TimeBudget",
+    "AdaptiveSteps",
+    "AdaptiveTrial",
+    "Projection",
+    "PruningPolicy",
+    "StateSnapshot",
+    "StateSnapshots",
+    "load_snapshot",
+    "Backend",
+    "BackendTimings",
+    "available_backends",
+    "register_backend",
+    "calibrate",
+    "timings",
+    "Precision",
+    "plan_precision",
 ]
@@ -0,0 +1,103 @@
+"""Adaptive step counts for the QDA walk sequence.
+
+`compute_step_rate` sizes the walk for the worst case of a given kappa, which
+over-provisions benign systems. The discrete adiabatic walk only reaches the
+solution at the end of its schedule (s = 1), so a run cannot simply stop
+early; instead `AdaptiveSteps` searches over the number of steps. Runs start
+from a small step count and grow geometrically up to the fixed count until the
+final state reaches the fidelity and/or success-probability target:
+
+    adaptive = AdaptiveSteps(fidelity=0.999)
+    X = qda.solve_many(A, B, adaptive=adaptive, telemetry=telemetry)
+    telemetry.metrics["steps_saved"]  # per column: fixed count - steps run
+
+The step count that met the target is remembered, so later solves (e.g. the
+next columns of `solve_many`) start from it and usually need a single run.
+
+"steps_saved" counts every walk step of the search, including the runs that
+missed the target, so it is negative when the search costs more than the
+fixed count would have.
+"""
+
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class AdaptiveTrial:
+    steps: int
+    fidelity: Optional[float]  # None without a fidelity target
+    p_success: float
+    wall_time: float  # seconds spent on this run
+
+
+def _even(steps: int) -> int:
+    return steps + steps % 2
+
+
+class AdaptiveSteps:
+    """Search for the smallest sufficient step count by geometric growth.
+
+    Every run that misses the target is wasted work. If the target is never
+    met, the search runs every step count up to the fixed one and returns the
+    last run, which costs up to growth / (growth - 1) times the fixed walk
+    (about 2x with the default growth of 2) for the result of the fixed walk.
+
+    Args:
+        fidelity (Optional[float], optional): Target overlap of the recovered state with the normalized classical solution. Computing that reference solves the system classically, so this target is meant for tuning and benchmarking. Defaults to None.
+        p_success (Optional[float], optional): Target success probability of the final projection. Needs no reference solution. Defaults to None.
+        initial_steps (Optional[int], optional): Steps of the first run. Defaults to 1/32 of the fixed step count (at least 2).
+        growth (float, optional): Factor between consecutive step counts. Defaults to 2.0.
+        reuse (bool, optional): Start later searches from the last step count that met the targets. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        fidelity: Optional[float] = None,
+        p_success: Optional[float] = None,
+        initial_steps: Optional[int] = None,
+        growth: float = 2.0,
+        reuse: bool = True,
+    ):
+        if fidelity is None and p_success is None:
+            raise ValueError("Set a fidelity and/or a p_success target.")
+        for name, target in (("fidelity", fidelity), ("p_success", p_success)):
+            if target is not None and not 0 < target <= 1:
+                raise ValueError(f"{name} target must be in (0, 1], got {target}.")
+        if initial_steps is not None and initial_steps < 1:
+            raise ValueError(
+                f"initial_steps must be a positive integer, got {initial_steps}."
+            )
+        if growth <= 1:
+            raise ValueError(f"growth must be greater than 1, got {growth}.")
+        self.fidelity = fidelity
+        self.p_success = p_success
+        self.initial_steps = initial_steps
+        self.growth = growth
+        self.reuse = reuse
+        self.last_steps: Optional[int] = None
+
+    def trial_steps(self, max_steps: int) -> Iterator[int]:
+        """Step counts to try, increasing and ending at most at `max_steps`."""
+        steps = self.last_steps or self.initial_steps or max(2, max_steps // 32)
+        steps = min(_even(steps), max_steps)
+        while True:
+            yield steps
+            if steps >= max_steps:
+                return
+            steps = min(_even(int(np.ceil(steps * self.growth))), max_steps)
+
+    def reached(self, fidelity: Optional[float], p_success: float) -> bool:
+        # Written as `not >=` so that NaNs never count as reached.
+        if self.fidelity is not None and not (
+            fidelity is not None and fidelity >= self.fidelity
+        ):
+            return False
+        return self.p_success is None or p_success >= self.p_success
+
+    def found(self, steps: int) -> None:
+        """Called with the step count that met the targets."""
+        if self.reuse:
+            self.last_steps = steps
@@ -0,0 +1,326 @@
+"""Solver backends for `qda.solve`.
+
+Two backends are registered by default:
+
+* "python": `PreparedSystem`, the pipeline of this package. It supports every
+  option of `solve` (sparse input, debug checkpoints, caches, adaptive step
+  counts, snapshots, pruning, precision planning) and reports per-stage telemetry.
+* "native": pysparq's compiled `sq.qda_solve`, for dense input without any of
+  those options. It always runs its own debug loop and writes it to stdout,
+  which is discarded unless `NATIVE_OUTPUT` is set.
+
+`backend="auto"` picks, among the backends that support the requested
+options and the size of A, the one with the lowest measured time per walk
+step at that size in `timings`; without measurements for every candidate it
+falls back to the first candidate in registration order ("python"). Every
+dispatched solve adds to `timings`, and `calibrate` measures all backends
+up front:
+
+    qda.calibrate(dims=(4, 8))
+    print(qda.timings.report())
+    x = qda.solve(A, b, backend="auto")
+"""
+
+import ctypes
+import logging
+import os
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+import numpy as np
+
+from .. import utils
+from ..telemetry import Telemetry
+from .fundamental import compute_step_rate
+
+logger = logging.getLogger(__name__)
+
+# Options of `solve` a backend may support, by the name of its keyword.
+FEATURES = frozenset(
+    {
+        "sparse",
+        "debug",
+        "checkpoint",
+        "tree_cache",
+        "embedding_cache",
+        "adaptive",
+        "snapshots",
+        "resume",
+        "pruning",
+        "precision",
+    }
+)
+
+# Options of `solve` passed to every backend, which need no feature: backends
+# that estimate kappa use the condest ones, others ignore them.
+COMMON_OPTIONS = frozenset({"mode", "condest_method", "condest_opt"})
+
+# Keep the stdout of the native backend (its per-step debug log).
+NATIVE_OUTPUT = False
+
+
+@dataclass(frozen=True)
+class Backend:
+    name: str
+    # solve(A, b, kappa, p, step_rate, telemetry, **options) -> x. Recording
+    # "steps" in telemetry is optional; without it and without a given kappa
+    # the solve is not added to `timings`.
+    solve: Callable[..., np.ndarray]
+    features: frozenset[str] = frozenset()
+    max_dim: Optional[int] = None  # largest supported dimension of A
+
+    def missing(self, features: Iterable[str], dim: int) -> list[str]:
+        """The requested features (and "size") this backend lacks."""
+        missing = sorted(set(features) - self.features)
+        if self.max_dim is not None and dim > self.max_dim:
+            missing.append("size")
+        return missing
+
+
+_backends: dict[str, Backend] = {}
+
+
+def register_backend(backend: Backend, replace: bool = False) -> None:
+    """Make a backend available to `solve(backend=...)`."""
+    if backend.name in ("auto",) or (backend.name in _backends and not replace):
+        raise ValueError(f"Backend name {backend.name!r} is already taken.")
+    unknown = backend.features - FEATURES
+    if unknown:
+        raise ValueError(f"Unknown features {sorted(unknown)}.")
+    _backends[backend.name] = backend
+
+
+def get_backend(name: str) -> Backend:
+    try:
+        return _backends[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown backend {name!r}. Use 'auto' or one of {list(_backends)}."
+        ) from None
+
+
+def available_backends() -> list[str]:
+    return list(_backends)
+
+
+class BackendTimings:
+    """Wall time per walk step of past solves, by backend and size bucket.
+
+    Sizes are bucketed by the next power of 2 of the dimension of A. Only the
+    last `max_samples` solves of each backend and bucket are kept, so the
+    medians follow recent runs and memory stays bounded in long-lived
+    processes.
+    """
+
+    def __init__(self, max_samples: int = 64):
+        if max_samples < 1:
+            raise ValueError(f"max_samples must be positive, got {max_samples}.")
+        self.max_samples = max_samples
+        self._samples: dict[tuple[str, int], deque[float]] = {}
+
+    @staticmethod
+    def bucket(dim: int) -> int:
+        return utils.next_power_of_2(max(dim, 1))
+
+    def record(self, backend: str, dim: int, seconds: float, steps: int) -> None:
+        key = (backend, self.bucket(dim))
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.max_samples)
+        samples.append(seconds / max(steps, 1))
+
+    def per_step(self, backend: str, dim: int) -> Optional[float]:
+        """Median seconds per walk step, or None without measurements."""
+        samples = self._samples.get((backend, self.bucket(dim)))
+        return float(np.median(samples)) if samples else None
+
+    def report(self) -> list[dict[str, Any]]:
+        """One row per backend and size bucket, by size and then fastest first.
+
+        "runs" counts the samples kept, at most `max_samples`.
+        """
+        rows = [
+            {
+                "backend": backend,
+                "dim": dim,
+                "runs": len(samples),
+                "per_step": float(np.median(samples)),
+            }
+            for (backend, dim), samples in self._samples.items()
+        ]
+        return sorted(rows, key=lambda row: (row["dim"], row["per_step"]))
+
+    def clear(self) -> None:
+        self._samples.clear()
+
+
+# Filled by every dispatched solve and by `calibrate`.
+timings = BackendTimings()
+
+
+def required_features(A, options: dict[str, Any]) -> set[str]:
+    """The features a solve of A with these `solve` options needs."""
+    features = {name for name, value in options.items() if value is not None}
+    features -= COMMON_OPTIONS
+    if options.get("mode", "production") == "debug":
+        features.add("debug")
+    if utils.issparse(A):
+        features.add("sparse")
+    return features
+
+
+def select_backend(
+    features: Iterable[str], dim: int, timings: BackendTimings = timings
+) -> Backend:
+    """The backend `backend="auto"` runs for these features at dimension `dim`."""
+    candidates = [
+        backend
+        for backend in _backends.values()
+        if not backend.missing(features, dim)
+    ]
+    if not candidates:
+        raise ValueError(f"No backend supports {sorted(features)} at dimension {dim}.")
+    measured = [timings.per_step(backend.name, dim) for backend in candidates]
+    if all(per_step is not None for per_step in measured):
+        return candidates[int(np.argmin(measured))]
+    return candidates[0]
+
+
+def dispatch(
+    backend: str,
+    A,
+    b: np.ndarray,
+    kappa: Optional[float],
+    p: float,
+    step_rate: float,
+    telemetry: Optional[Telemetry],
+    **options,
+) -> np.ndarray:
+    """Run `solve` on the named backend ("auto" selects one) and time it."""
+    if telemetry is None:
+        telemetry = Telemetry()
+    # Any array-like: lists and tuples of rows as well as arrays.
+    dim = A.shape[0] if utils.issparse(A) else np.shape(A)[0]
+    features = required_features(A, options)
+    if backend == "auto":
+        selected = select_backend(features, dim)
+    else:
+        selected = get_backend(backend)
+        missing = selected.missing(features, dim)
+        if missing:
+            raise ValueError(f"Backend {backend!r} does not support {missing}.")
+    telemetry.record("backend", selected.name)
+    logger.info("backend = %s", selected.name)
+
+    # A reused telemetry may hold the step count of an earlier solve.
+    telemetry.metrics.pop("steps", None)
+    condest = telemetry.timings.get("condest", 0.0)
+    start = time.perf_counter()
+    x = selected.solve(A, b, kappa, p, step_rate, telemetry, **options)
+    # Leave out the kappa estimate, which does not depend on the backend.
+    seconds = time.perf_counter() - start
+    seconds -= telemetry.timings.get("condest", 0.0) - condest
+
+    # Backends need not record "steps"; with a given kappa the count is known.
+    steps = telemetry.metrics.get("steps")
+    if steps is None and kappa is not None:
+        steps = compute_step_rate(step_rate, kappa)
+    if steps is None:
+        logger.debug("Backend %s recorded no step count; not timed.", selected.name)
+    else:
+        timings.record(selected.name, dim, seconds, steps)
+    return x
+
+
+def calibrate(
+    dims: Iterable[int] = (4, 8),
+    kappa: float = 5.0,
+    step_rate: float = 0.05,
+    backends: Optional[Iterable[str]] = None,
+    seed: int = 0,
+) -> BackendTimings:
+    """Time every dense-capable backend on random SPD systems of each size.
+
+    Returns:
+        The module-level `timings`, which `backend="auto"` reads.
+    """
+    import pysparq as sq
+
+    rng = np.random.default_rng(seed)
+    for dim in dims:
+        Q, _ = np.linalg.qr(rng.normal(size=(dim, dim)))
+        A = Q @ np.diag(np.linspace(1.0, 1.0 / kappa, dim)) @ Q.T
+        b = rng.uniform(0.0, 1.0, size=dim)
+        for name in available_backends() if backends is None else backends:
+            if get_backend(name).missing((), dim):
+                continue
+            sq.System.clear()
+            dispatch(name, A, b, kappa, 1.3, step_rate, None)
+    return timings
+
+
+@contextmanager
+def _discard_stdout() -> Iterator[None]:
+    """Send file descriptor 1 to os.devnull, for output written by C++."""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    try:
+        os.dup2(devnull, 1)
+        yield
+    finally:
+        try:
+            ctypes.CDLL(None).fflush(None)  # drain the C stdio buffer first
+        except (OSError, AttributeError, TypeError):
+            pass
+        os.dup2(saved, 1)
+        os.close(saved)
+        os.close(devnull)
+
+
+def _solve_python(A, b, kappa, p, step_rate, telemetry, **options) -> np.ndarray:
+    from .qram import prepare
+
+    prepared = prepare(
+        A,
+        kappa,
+        p,
+        step_rate,
+        telemetry,
+        options.pop("tree_cache", None),
+        options.pop("embedding_cache", None),
+        options.pop("precision", None),
+        options.pop("condest_method", "splu"),
+        options.pop("condest_opt", None),
+    )
+    return prepared.solve(b, **options)
+
+
+def _solve_native(A, b, kappa, p, step_rate, telemetry, **options) -> np.ndarray:
+    import pysparq as sq
+
+    A = np.asarray(A, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64).ravel()
+    if kappa is None:
+        # The estimate of the python backend, so both run the same steps.
+        with telemetry.stage("condest"):
+            kappa = utils.condest(
+                A,
+                method=options.get("condest_method", "splu"),
+                **(options.get("condest_opt") or {}),
+            )
+    telemetry.record("kappa", kappa)
+    telemetry.record("steps", compute_step_rate(step_rate, kappa))
+    with telemetry.stage("native"):
+        if NATIVE_OUTPUT:
+            return sq.qda_solve(A, b, kappa, p, step_rate)
+        with _discard_stdout():
+            return sq.qda_solve(A, b, kappa, p, step_rate)
+
+
+register_backend(Backend("python", _solve_python, FEATURES))
+register_backend(Backend("native", _solve_native))
@@ -0,0 +1,169 @@
+"""Persistent cache of encoded QRAM data trees.
+
+The data tree of a matrix is a deterministic function of the normalized
+matrix and the encoding parameters, so `TreeCache` stores it on disk under a
+digest of those inputs. Entries are plain `.npy` files, loaded memory-mapped
+(read-only, without a copy) and evicted least-recently-used once the cache
+grows beyond `max_bytes`.
+
+    cache = TreeCache("~/.cache/qalgo/trees", max_bytes=2**30)
+    x = qda.solve(A, b, tree_cache=cache)
+    cache.stats()  # {"hits": 0, "misses": 1, "entries": 1, "bytes": ...}
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .. import utils
+
+
+class TreeCache:
+    """Content-addressed, size-bounded on-disk store of uint64 vector trees.
+
+    Args:
+        directory (str | os.PathLike): Where the `.npy` files live. Created if missing.
+        max_bytes (int, optional): Evict least recently used entries beyond this total size. Defaults to 1 GiB.
+    """
+
+    suffix = ".npy"
+
+    def __init__(self, directory: str | os.PathLike, max_bytes: int = 1 << 30):
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(matrix: np.ndarray, exponent: int, data_size: int) -> str:
+        """Digest of a normalized matrix and its encoding parameters."""
+        return utils.array_digest(matrix, "tree", exponent, data_size)
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Optional[NDArray[np.uint64]]:
+        """Return the cached tree memory-mapped read-only, or None on a miss."""
+        path = self.path(key)
+        try:
+            tree = np.load(path, mmap_mode="r")
+            os.utime(path)  # mark as recently used
+        except (FileNotFoundError, ValueError, OSError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return tree
+
+    def put(self, key: str, tree: NDArray[np.uint64]) -> NDArray[np.uint64]:
+        """Store a tree, evict if over budget, and return the stored tree."""
+        fd, tmp = tempfile.mkstemp(suffix=self.suffix, dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, np.asarray(tree, dtype=np.uint64))
+            os.replace(tmp, self.path(key))  # atomic for concurrent writers
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.evict(keep=key)
+        return tree
+
+    def build_into(
+        self, key: str, size: int, fill: Callable[[NDArray[np.uint64]], object]
+    ) -> NDArray[np.uint64]:
+        """Build a tree of `size` words directly in its cache file.
+
+        `fill(out)` writes the tree into a writable memory map of the new
+        entry, so the tree is never held in memory besides the page cache.
+
+        Returns:
+            The stored tree, memory-mapped read-only.
+        """
+        fd, tmp = tempfile.mkstemp(suffix=self.suffix, dir=self.directory)
+        os.close(fd)
+        try:
+            out = np.lib.format.open_memmap(
+                tmp, mode="w+", dtype=np.uint64, shape=(size,)
+            )
+            fill(out)
+            out.flush()
+            del out
+            os.replace(tmp, self.path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.evict(keep=key)
+        return np.load(self.path(key), mmap_mode="r")
+
+    def get_or_build(
+        self,
+        matrix: np.ndarray,
+        exponent: int,
+        data_size: int,
+        build: Callable[..., NDArray[np.uint64]],
+        size: Optional[int] = None,
+    ) -> NDArray[np.uint64]:
+        """Return the cached tree of `matrix`, building it on a miss.
+
+        Without `size`, a miss stores the result of `build()`. With the tree
+        length `size`, `build(out)` fills the new entry in place (see
+        `build_into`).
+        """
+        key = self.key(matrix, exponent, data_size)
+        tree = self.get(key)
+        if tree is None:
+            if size is None:
+                tree = self.put(key, build())
+            else:
+                tree = self.build_into(key, size, build)
+        return tree
+
+    def entries(self) -> list[os.DirEntry]:
+        """Cache files, least recently used first."""
+        with os.scandir(self.directory) as it:
+            entries = [
+                entry
+                for entry in it
+                if entry.is_file() and entry.name.endswith(self.suffix)
+            ]
+        return sorted(entries, key=lambda entry: entry.stat().st_mtime_ns)
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Delete least recently used entries until within `max_bytes`.
+
+        Returns:
+            The number of deleted entries.
+        """
+        entries = self.entries()
+        total = sum(entry.stat().st_size for entry in entries)
+        removed = 0
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            if keep is not None and entry.name == f"{keep}{self.suffix}":
+                continue
+            size = entry.stat().st_size
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for entry in self.entries():
+            os.unlink(entry.path)
+
+    def stats(self) -> dict[str, int]:
+        entries = self.entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(entry.stat().st_size for entry in entries),
+        }
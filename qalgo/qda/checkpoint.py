@@ -0,0 +1,121 @@
+"""Checkpoint policies for the fidelity checks of the debug walk sequence.
+
+A policy decides after which walk steps `WalkSequence_via_QRAM_Debug` projects
+the state and compares it with the ideal eigenstate. Each checkpoint produces a
+`CheckpointRecord`.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class CheckpointRecord:
+    step: int
+    s: float
+    fidelity: float
+    p_success: float
+    wall_time: float  # seconds since the walk sequence started
+
+
+class CheckpointPolicy(ABC):
+    """Decide which (0-based) walk steps are checkpoints.
+
+    Subclasses implement `__call__`; `start` and `observe` are optional hooks.
+    """
+
+    def start(self, steps: int) -> None:
+        """Called once before the first step of a sequence with `steps` steps."""
+        self.steps = steps
+
+    @abstractmethod
+    def __call__(self, n: int, elapsed: float) -> bool:
+        """Whether step n, reached after `elapsed` seconds, is a checkpoint."""
+
+    def observe(self, record: CheckpointRecord, cost: float) -> None:
+        """Called after each checkpoint with the time it took."""
+
+
+class EveryK(CheckpointPolicy):
+    """Checkpoint after every k-th step (after steps k-1, 2k-1, ...)."""
+
+    def __init__(self, k: int = 2):
+        if k < 1:
+            raise ValueError(f"k must be a positive integer, got {k}.")
+        self.k = k
+
+    def __call__(self, n: int, elapsed: float) -> bool:
+        return (n + 1) % self.k == 0
+
+
+class LogSpaced(CheckpointPolicy):
+    """About `num` checkpoints, logarithmically spaced over the schedule.
+
+    Early steps are sampled densely and late steps sparsely; the last step is
+    always a checkpoint.
+    """
+
+    def __init__(self, num: int = 10):
+        if num < 1:
+            raise ValueError(f"num must be a positive integer, got {num}.")
+        self.num = num
+
+    def start(self, steps: int) -> None:
+        super().start(steps)
+        if steps == 0:
+            self._steps = frozenset()
+            return
+        points = np.geomspace(1, steps, num=min(self.num, steps))
+        self._steps = frozenset(np.rint(points).astype(int) - 1)
+
+    def __call__(self, n: int, elapsed: float) -> bool:
+        return n in self._steps
+
+
+class LastN(CheckpointPolicy):
+    """Checkpoint only the last `n_last` steps, where s is close to 1."""
+
+    def __init__(self, n_last: int = 10):
+        if n_last < 1:
+            raise ValueError(f"n_last must be a positive integer, got {n_last}.")
+        self.n_last = n_last
+
+    def __call__(self, n: int, elapsed: float) -> bool:
+        return n >= self.steps - self.n_last
+
+
+class TimeBudget(CheckpointPolicy):
+    """Keep the time spent on checkpoints below a fraction of the wall time.
+
+    A step is a checkpoint only while the accumulated checkpoint cost is at
+    most `fraction` of the elapsed time, so the cadence adapts to how
+    expensive projections are compared with the walk itself.
+    """
+
+    def __init__(self, fraction: float = 0.1):
+        if not 0 < fraction < 1:
+            raise ValueError(f"fraction must be in (0, 1), got {fraction}.")
+        self.fraction = fraction
+
+    def start(self, steps: int) -> None:
+        super().start(steps)
+        self.spent = 0.0
+
+    def __call__(self, n: int, elapsed: float) -> bool:
+        return self.spent <= self.fraction * elapsed
+
+    def observe(self, record: CheckpointRecord, cost: float) -> None:
+        self.spent += cost
+
+
+def as_policy(checkpoint: "CheckpointPolicy | int") -> CheckpointPolicy:
+    """Accept an integer k as shorthand for `EveryK(k)`."""
+    if isinstance(checkpoint, CheckpointPolicy):
+        return checkpoint
+    if isinstance(checkpoint, (int, np.integer)):
+        return EveryK(int(checkpoint))
+    raise TypeError(
+        f"checkpoint must be a CheckpointPolicy or an int, got {type(checkpoint).__name__}."
+    )
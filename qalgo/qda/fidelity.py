@@ -0,0 +1,96 @@
+"""Vectorized overlaps and fidelities of state vectors.
+
+The overlap of a state |s> with a target |t> is <t|s> = sum(conj(t) * s), and
+the fidelity is its magnitude |<t|s>|, as in `fundamental.get_fidelity`.
+Every function accepts a single vector or a stack of vectors along the last
+axis, and works in the common complex or float dtype of its inputs:
+
+    fidelity(state, target)  # scalar
+    fidelity(states, target)  # (k,): many states against one target
+    fidelity(states, targets)  # (k,): row by row
+    pairwise_fidelity(states, targets)  # (k, m): every state against every target
+"""
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+
+def _as_vectors(*arrays: ArrayLike) -> list[np.ndarray]:
+    arrays = [np.asarray(array) for array in arrays]
+    dtypes = {array.dtype for array in arrays}
+    if len(dtypes) == 1 and dtypes <= {np.dtype(np.float64), np.dtype(np.complex128)}:
+        dtype = dtypes.pop()  # the common case; skip the promotion below
+    else:
+        dtype = np.result_type(*arrays, np.float64)  # integers and float32 widen
+    if not np.issubdtype(dtype, np.inexact):
+        raise TypeError(f"Expected numeric state vectors, got dtype {dtype}.")
+    arrays = [array.astype(dtype, copy=False) for array in arrays]
+    if any(array.ndim == 0 for array in arrays):
+        raise ValueError("State vectors must have at least one dimension.")
+    sizes = {array.shape[-1] for array in arrays}
+    if len(sizes) != 1:
+        raise ValueError(f"State vectors must have the same size, got {sorted(sizes)}.")
+    return arrays
+
+
+def _normalized(overlaps, states: np.ndarray, targets: np.ndarray, pairwise: bool):
+    state_norms = np.linalg.norm(states, axis=-1)
+    target_norms = np.linalg.norm(targets, axis=-1)
+    if pairwise:
+        return overlaps / np.multiply.outer(state_norms, target_norms)
+    return overlaps / (state_norms * target_norms)
+
+
+def overlap(
+    states: ArrayLike, targets: ArrayLike, normalize: bool = False
+) -> complex | float | NDArray:
+    """<target|state> over the last axis, broadcasting the leading axes.
+
+    Args:
+        states (ArrayLike): A vector of size n or a stack of shape (..., n).
+        targets (ArrayLike): A vector of size n or a stack broadcastable against `states`.
+        normalize (bool, optional): Divide by the norms of both vectors. Defaults to False.
+
+    Returns:
+        A scalar for two vectors, otherwise an array of the broadcast leading shape.
+    """
+    states, targets = _as_vectors(states, targets)
+    if states.ndim == targets.ndim == 1:
+        result = np.vdot(targets, states)
+    else:
+        result = np.einsum("...i,...i->...", targets.conj(), states)
+    if normalize:
+        result = _normalized(result, states, targets, pairwise=False)
+    return result[()] if isinstance(result, np.ndarray) else result
+
+
+def fidelity(
+    states: ArrayLike, targets: ArrayLike, normalize: bool = False
+) -> float | NDArray[np.float64]:
+    """|<target|state>| over the last axis; see `overlap` for the shapes."""
+    return np.abs(overlap(states, targets, normalize))
+
+
+def pairwise_overlap(
+    states: ArrayLike, targets: ArrayLike, normalize: bool = False
+) -> NDArray:
+    """<targets[j]|states[i]> for every pair, as a (k, m) matrix.
+
+    Args:
+        states (ArrayLike): Stack of shape (k, n).
+        targets (ArrayLike): Stack of shape (m, n).
+        normalize (bool, optional): Divide by the norms of both vectors. Defaults to False.
+    """
+    states, targets = _as_vectors(states, targets)
+    states, targets = np.atleast_2d(states), np.atleast_2d(targets)
+    result = states @ targets.conj().T
+    if normalize:
+        result = _normalized(result, states, targets, pairwise=True)
+    return result
+
+
+def pairwise_fidelity(
+    states: ArrayLike, targets: ArrayLike, normalize: bool = False
+) -> NDArray[np.float64]:
+    """|<targets[j]|states[i]>| for every pair, as a (k, m) matrix."""
+    return np.abs(pairwise_overlap(states, targets, normalize))
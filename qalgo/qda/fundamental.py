@@ -1,9 +1,13 @@
+import logging
+
 import numpy as np
 from numpy.typing import NDArray
-import pysparq as sq
 from .. import utils
+from . import fidelity
 from dataclasses import dataclass
 
+logger = logging.getLogger(__name__)
+
 
 # @dataclass
 # class GetOutput:
@@ -69,6 +73,68 @@ from dataclasses import dataclass
 #         return result
 
 
+def compute_fs(s, kappa: float, p: float):
+    """
+    The QDA schedule f(s) for s in [0, 1]; s may be an array.
+    """
+    return (kappa / (kappa - 1)) * (
+        1 - (1 + s * (kappa ** (p - 1) - 1)) ** (1 / (1 - p))
+    )
+
+
+class QDAReference:
+    """
+    Ideal QDA eigenstates for any f(s) from one SVD of A.
+
+    The mid eigenstate at f solves [(1-f) I, f A; f A^T, -(1-f) I] [y; z] = [b; 0].
+    With A = U diag(sigma) V^T, c = U^T b and d = (1-f)^2 + f^2 sigma^2, the
+    solution is y = U ((1-f) c / d) and z = V (f sigma c / d), so after the
+    O(n^3) factorization every f costs two matrix-vector products, and a batch
+    of f values two matrix-matrix products.
+
+    Parameters:
+    - matrix_A: square real matrix A
+    - vector_b: right-hand side b
+    """
+
+    def __init__(self, matrix_A: NDArray[np.float64], vector_b: NDArray[np.float64]):
+        A = np.asarray(matrix_A, dtype=np.float64)
+        U, sigma, Vt = np.linalg.svd(A)
+        self.U = U
+        self.sigma = sigma
+        self.V = Vt.T
+        self.c = U.T @ np.asarray(vector_b, dtype=np.float64)
+        self.row_size = len(self.c)
+
+    def get_mid_eigenstates(self, fs) -> NDArray[np.float64]:
+        """
+        Normalized ideal states, zero-padded to length 4n like
+        `QDADebugger.get_mid_eigenstate`.
+
+        Parameters:
+        - fs: a value of f(s) in [0, 1], or a 1D array of them
+
+        Returns:
+        - An array of shape (4n,) for a scalar fs, else (len(fs), 4n).
+        """
+        fs_arr = np.asarray(fs, dtype=np.float64)
+        if np.any((fs_arr < 0) | (fs_arr > 1)) or np.any(np.isnan(fs_arr)):
+            raise RuntimeError(f"Invalid fs value: {fs}. Expected 0 <= fs <= 1.")
+        f = np.atleast_1d(fs_arr)[:, None]
+        n = self.row_size
+
+        d = (1 - f) ** 2 + f**2 * self.sigma**2
+        if np.any(d == 0):
+            raise np.linalg.LinAlgError("Singular matrix")
+        scaled = self.c / d
+
+        states = np.zeros((f.shape[0], 4 * n), dtype=np.float64)
+        np.matmul((1 - f) * scaled, self.U.T, out=states[:, :n])
+        np.matmul(f * self.sigma * scaled, self.V.T, out=states[:, n : 2 * n])
+        states[:, : 2 * n] /= np.linalg.norm(states[:, : 2 * n], axis=1, keepdims=True)
+        return states[0] if fs_arr.ndim == 0 else states
+
+
 class QDADebugger:
     def __init__(
         self,
@@ -77,13 +143,14 @@ class QDADebugger:
         s: float,
         kappa: float,
         p: float,
+        reference: QDAReference | None = None,
     ):
         self.matrix_A = matrix_A
         self.vector_b = vector_b
         self.row_size = len(vector_b)
-        self.fs = (kappa / (kappa - 1)) * (
-            1 - (1 + s * (kappa ** (p - 1) - 1)) ** (1 / (1 - p))
-        )
+        self.fs = compute_fs(s, kappa, p)
+        # Shared by debuggers of the same system to skip the dense solves.
+        self.reference = reference
 
     def get_matrix_Af(self) -> NDArray[np.float64]:
         n = self.row_size
@@ -105,9 +172,12 @@ class QDADebugger:
         return np.concatenate([np.zeros(n), self.vector_b])
 
     def get_mid_eigenstate(self) -> NDArray[np.float64]:
-        print(f"fs = {self.fs}")
+        logger.debug("fs = %s", self.fs)
         n = self.row_size
 
+        if self.reference is not None:
+            return self.reference.get_mid_eigenstates(self.fs)
+
         if self.fs == 0:
             vec = self.get_vector_0b()
         elif self.fs == 1:
@@ -137,35 +207,114 @@ def compute_step_rate(step_rate: float, kappa: float) -> int:
 
 
 def scale_and_convert_vector(
-    input_vec: NDArray[np.float64], exponent: int, data_size: int
+    input_vec: NDArray[np.float64],
+    exponent: int,
+    data_size: int,
+    out: NDArray[np.uint64] | None = None,
 ) -> NDArray[np.uint64]:
     """
     Scale a floating-point vector, round to the nearest integer,
     and convert to unsigned integers using modular complement representation.
 
+    The conversion is done on the whole array at once: the rounded values are
+    reinterpreted as two's complement uint64 and negative entries are masked
+    down to their lower data_size bits, which equals `utils.make_complement`.
+
     Parameters:
-    - input_vec: 1D numpy array of float64 values
+    - input_vec: numpy array of float64 values (1D, or any shape with a matching out)
     - exponent: scaling exponent (multiply by 2^exponent)
     - data_size: bit-width of the target representation (e.g., 8, 16, 32, 64)
+    - out: optional preallocated uint64 buffer with the same shape as input_vec,
+      may be a strided view
 
     Returns:
     - A numpy array of uint64 values representing the scaled and converted input
     """
-    scale = 2.0**exponent
-    scaled_values = np.rint(input_vec * scale).astype(np.int64)
+    scaled_values = np.multiply(input_vec, 2.0**exponent)
+    np.rint(scaled_values, out=scaled_values)
+
+    if out is None:
+        out = np.empty(scaled_values.shape, dtype=np.uint64)
+    elif out.shape != scaled_values.shape or out.dtype != np.uint64:
+        raise ValueError(
+            f"Output buffer must be uint64 with shape {scaled_values.shape}, "
+            f"got {out.dtype} with shape {out.shape}."
+        )
 
-    # Apply make_complement to each value
-    output = np.array(
-        [utils.make_complement(value, data_size) for value in scaled_values],
-        dtype=np.uint64,
-    )
-    return output
+    signed = out.view(np.int64)
+    np.copyto(signed, scaled_values, casting="unsafe")
+    if data_size < 64:
+        # (1 << data_size) + value == value & mask for -2**data_size <= value < 0
+        mask = np.uint64((1 << data_size) - 1)
+        np.bitwise_and(out, mask, out=out, where=signed < 0)
+    return out
+
+
+# Leaf pairs per chunk of the lowest tree level (8 MiB of scratch).
+_LEVEL_CHUNK = 1 << 20
+
+
+def _fill_tree_levels(
+    tree: NDArray[np.uint64], leaf_count: int, data_size: int
+) -> NDArray[np.uint64]:
+    """
+    Fill the internal nodes of a vector tree in place.
+
+    The tree is laid out level by level with the root first, so the m nodes of
+    a level occupy tree[m - 1 : 2 * m - 1] and the leaves occupy
+    tree[leaf_count - 1 : 2 * leaf_count - 1]. The lowest internal level holds
+    the sum of squares of the sign-masked leaf pairs, every level above it
+    the sum of its two children.
+    """
+    if leaf_count < 2:
+        return tree
+
+    leaves = tree[leaf_count - 1 : 2 * leaf_count - 1]
+    level = tree[leaf_count // 2 - 1 : leaf_count - 1]
+    if data_size == 0:
+        level.fill(0)
+    else:
+        # Vectorized utils.get_complement: keep the lower data_size bits.
+        # Pairs are processed in chunks, so the scratch buffer stays small.
+        shift = np.uint64(64 - data_size)
+        pairs = leaf_count // 2
+        chunk = min(pairs, _LEVEL_CHUNK)
+        scratch = np.empty(chunk, dtype=np.uint64)
+        for start in range(0, pairs, chunk):
+            stop = min(start + chunk, pairs)
+            out = level[start:stop]
+            odd = scratch[: stop - start]
+            np.left_shift(leaves[2 * start : 2 * stop : 2], shift, out=out)
+            np.right_shift(out, shift, out=out)
+            np.multiply(out, out, out=out)
+            np.left_shift(leaves[2 * start + 1 : 2 * stop : 2], shift, out=odd)
+            np.right_shift(odd, shift, out=odd)
+            np.multiply(odd, odd, out=odd)
+            np.add(out, odd, out=out)
+
+    m = leaf_count // 4
+    while m >= 1:
+        children = tree[2 * m - 1 : 4 * m - 1]
+        np.add(children[0::2], children[1::2], out=tree[m - 1 : 2 * m - 1])
+        m //= 2
+    return tree
+
+
+def _check_leaf_count(leaf_count: int) -> None:
+    if leaf_count == 0 or leaf_count & (leaf_count - 1):
+        raise ValueError(
+            f"Vector tree needs a power-of-2 number of leaves, got {leaf_count}."
+        )
 
 
 def make_vector_tree(dist: NDArray[np.uint64], data_size: int) -> NDArray[np.uint64]:
     """
     Constructs a vector tree based on the given distance vector and data size.
 
+    The tree is written into a single preallocated buffer of length
+    2 * N: the internal levels (root first), the N leaves, and a final zero.
+    N is len(dist) rounded up to a power of 2; the extra leaves are zero.
+
     Parameters:
     - dist: A numpy array of uint64 representing the distance vector.
     - data_size: An integer representing the size of the data in bits.
@@ -174,31 +323,156 @@ def make_vector_tree(dist: NDArray[np.uint64], data_size: int) -> NDArray[np.uin
     - A numpy array of uint64 representing the constructed vector tree.
     """
     dist_sz = len(dist)
-    temp_tree = dist.copy()
-    tree = []
-
-    while dist_sz > 1:
-        temp = []
-        for i in range(0, dist_sz, 2):
-            if i + 1 < dist_sz:  # Avoid overflow
-                if dist_sz == len(dist):
-                    # Leaf nodes, calculated using get_complement
-                    temp.append(
-                        utils.get_complement(temp_tree[i], data_size) ** 2
-                        + utils.get_complement(temp_tree[i + 1], data_size) ** 2
-                    )
-                else:
-                    # Non-leaf nodes, sum directly
-                    temp.append(temp_tree[i] + temp_tree[i + 1])
-
-        # Combine all nodes
-        temp.extend(temp_tree)
-        temp_tree = np.array(temp, dtype=np.uint64)
-        dist_sz = (dist_sz + 1) // 2  # Update dist_sz to match the layers
-
-    temp_tree = np.append(temp_tree, np.uint64(0))  # Add a final zero to the tree
-    tree.extend(temp_tree)
-    return np.array(tree, dtype=np.uint64)
+    if dist_sz == 0:
+        _check_leaf_count(dist_sz)
+    leaf_count = utils.next_power_of_2(dist_sz)
+
+    tree = np.empty(2 * leaf_count, dtype=np.uint64)
+    leaves = tree[leaf_count - 1 : 2 * leaf_count - 1]
+    leaves[:dist_sz] = dist
+    leaves[dist_sz:] = 0  # zero padding, which adds nothing to the sums
+    tree[-1] = 0  # Add a final zero to the tree
+    return _fill_tree_levels(tree, leaf_count, data_size)
+
+
+def _tree_buffer(
+    leaf_count: int, out: NDArray[np.uint64] | None
+) -> NDArray[np.uint64]:
+    """Check a preallocated tree buffer, or allocate one."""
+    if out is None:
+        return np.empty(2 * leaf_count, dtype=np.uint64)
+    if out.shape != (2 * leaf_count,) or out.dtype != np.uint64:
+        raise ValueError(
+            f"Output buffer must be uint64 with shape ({2 * leaf_count},), "
+            f"got {out.dtype} with shape {out.shape}."
+        )
+    return out
+
+
+def make_encoded_tree(
+    input_vec: NDArray[np.float64], exponent: int, data_size: int
+) -> NDArray[np.uint64]:
+    """
+    Encode a floating-point vector and build its vector tree in one buffer.
+
+    Equivalent to
+    `make_vector_tree(scale_and_convert_vector(input_vec, exponent, data_size), data_size)`
+    but the converted values are written straight into the leaf section of the
+    tree, so no intermediate uint64 vector is allocated.
+
+    Parameters:
+    - input_vec: 1D numpy array of float64 values, length a power of 2
+    - exponent: scaling exponent (multiply by 2^exponent)
+    - data_size: bit-width of the target representation
+
+    Returns:
+    - A numpy array of uint64 representing the constructed vector tree.
+    """
+    leaf_count = len(input_vec)
+    _check_leaf_count(leaf_count)
+
+    tree = np.empty(2 * leaf_count, dtype=np.uint64)
+    scale_and_convert_vector(
+        input_vec, exponent, data_size, out=tree[leaf_count - 1 : 2 * leaf_count - 1]
+    )
+    tree[-1] = 0
+    return _fill_tree_levels(tree, leaf_count, data_size)
+
+
+def make_matrix_encoded_tree(
+    matrix: NDArray[np.float64],
+    exponent: int,
+    data_size: int,
+    out: NDArray[np.uint64] | None = None,
+    chunk_bytes: int = 1 << 26,
+) -> NDArray[np.uint64]:
+    """
+    Encode a square matrix in column-major order and build its vector tree.
+
+    Equivalent to `make_encoded_tree(matrix.flatten(order="F"), ...)`, but
+    the matrix is read in blocks of about `chunk_bytes` and each block is
+    encoded straight into the leaves, so neither the flattened copy nor a
+    full-size scaled copy is made: besides the tree, the peak memory is one
+    block. Blocks are rows of a C-ordered matrix and columns of an
+    F-ordered one, i.e. contiguous, so a matrix memory-mapped with
+    `np.load(mmap_mode="r")` is read sequentially, once.
+
+    Parameters:
+    - matrix: square 2D array of float64 values, N a power of 2 (may be a np.memmap)
+    - exponent: scaling exponent (multiply by 2^exponent)
+    - data_size: bit-width of the target representation
+    - out: optional preallocated uint64 buffer of length 2 * N**2 for the tree,
+      e.g. a memory-mapped file
+    - chunk_bytes: approximate size of one block of the matrix
+
+    Returns:
+    - A numpy array of uint64 representing the constructed vector tree (`out` if given).
+    """
+    if matrix.ndim != 2 or matrix.shape[0] != matrix.shape[1]:
+        raise ValueError(f"Expected a square matrix, got shape {matrix.shape}.")
+    n = matrix.shape[0]
+    leaf_count = n * n
+    _check_leaf_count(leaf_count)
+
+    out = _tree_buffer(leaf_count, out)
+    # leaves[j, i] holds matrix[i, j]: the column-major flattening.
+    leaves = out[leaf_count - 1 : 2 * leaf_count - 1].reshape(n, n)
+    step = max(1, chunk_bytes // (8 * n))
+    if matrix.flags.f_contiguous and not matrix.flags.c_contiguous:
+        for start in range(0, n, step):
+            block = matrix[:, start : start + step]
+            scale_and_convert_vector(
+                block.T, exponent, data_size, out=leaves[start : start + step]
+            )
+    else:
+        for start in range(0, n, step):
+            block = matrix[start : start + step]
+            scale_and_convert_vector(
+                block.T, exponent, data_size, out=leaves[:, start : start + step]
+            )
+    out[-1] = 0
+    return _fill_tree_levels(out, leaf_count, data_size)
+
+
+def make_sparse_encoded_tree(
+    indices: NDArray[np.integer],
+    values: NDArray[np.float64],
+    leaf_count: int,
+    exponent: int,
+    data_size: int,
+    out: NDArray[np.uint64] | None = None,
+) -> NDArray[np.uint64]:
+    """
+    Encode a sparse vector, given by its nonzeros, and build its vector tree.
+
+    Equivalent to `make_encoded_tree` on the dense vector with `values` at
+    `indices` and zeros elsewhere, but only the nonzeros are scaled and
+    converted; zero leaves encode to 0 and are never materialized as floats.
+
+    Parameters:
+    - indices: positions of the nonzeros, without duplicates
+    - values: 1D numpy array of float64 values at those positions
+    - leaf_count: length of the dense vector, a power of 2
+    - exponent: scaling exponent (multiply by 2^exponent)
+    - data_size: bit-width of the target representation
+    - out: optional preallocated uint64 buffer of length 2 * leaf_count for the tree
+
+    Returns:
+    - A numpy array of uint64 representing the constructed vector tree (`out` if given).
+    """
+    _check_leaf_count(leaf_count)
+    if len(indices) != len(values):
+        raise ValueError(
+            f"Got {len(indices)} indices for {len(values)} nonzero values."
+        )
+
+    tree = _tree_buffer(leaf_count, out)
+    tree.fill(0)
+    leaves = tree[leaf_count - 1 : 2 * leaf_count - 1]
+    leaves[indices] = scale_and_convert_vector(
+        np.asarray(values, dtype=np.float64), exponent, data_size
+    )
+    return _fill_tree_levels(tree, leaf_count, data_size)
 
 
 def get_fidelity(
@@ -211,6 +485,12 @@ def get_fidelity(
     | list[complex]
     | list[float],
 ) -> float:
+    """
+    |<target|state>|, computed with `fidelity.fidelity` (np.vdot).
+
+    Real and complex inputs of any numeric dtype are handled alike; the
+    target is conjugated whenever it is complex.
+    """
     if len(state) == 0:
         return 0.0
     if len(state) != len(target):
@@ -218,12 +498,4 @@ def get_fidelity(
             f"Error: Vectors must be of the same size! size1 = {len(state)}, size2 = {len(target)}"
         )
 
-    sum_val = 0
-    if isinstance(target[0], complex):
-        for s, t in zip(state, target):
-            sum_val += s * t.conjugate()
-    else:
-        for s, t in zip(state, target):
-            sum_val += s * t
-
-    return float(abs(sum_val))
+    return float(fidelity.fidelity(state, target))
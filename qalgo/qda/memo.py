@@ -0,0 +1,115 @@
+"""In-memory memoization of `classical2quantum`.
+
+Hermitization, padding and normalization only depend on the matrix, so
+`Classical2QuantumCache` keeps the embedded matrix of recently used matrices in
+an LRU cache and only embeds the (cheap) right-hand side on every call. Cached
+arrays are returned read-only.
+
+    embed = Classical2QuantumCache(maxsize=8)
+    A_q, b_q, recover_x = embed(A, b)  # same results as classical2quantum
+    x = qda.solve(A, b, embedding_cache=embed)
+    embed.stats()
+"""
+
+from __future__ import annotations
+
+import weakref
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Hashable, Literal, Optional
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .. import utils
+from .qram import EmbeddingLayout, _as_matrix, _embed_vector, _hermitize_and_pad
+
+if TYPE_CHECKING:
+    import scipy.sparse as sps
+
+
+@dataclass(frozen=True)
+class MatrixEmbedding:
+    """The matrix-dependent result of `classical2quantum`."""
+
+    A_q: NDArray[np.float64] | sps.csr_array  # read-only
+    original_dim: int
+    herm_dim: int
+    padded_dim: int
+    hermitian_transform_done: bool
+    recover_x: EmbeddingLayout
+
+
+class Classical2QuantumCache:
+    """LRU memoization of `classical2quantum`, keyed on the matrix.
+
+    Args:
+        maxsize (int, optional): Number of matrices kept. Defaults to 16.
+        key (Literal["content", "identity"], optional): "content" keys on a digest of the matrix values, so equal matrices share an entry. "identity" keys on the array object, skips hashing, and drops the entry when the array is garbage collected; it assumes the array is not modified in place. Defaults to "content".
+    """
+
+    def __init__(
+        self, maxsize: int = 16, key: Literal["content", "identity"] = "content"
+    ):
+        if key not in ("content", "identity"):
+            raise ValueError(f"Unknown key {key!r}. Use 'content' or 'identity'.")
+        self.key = key
+        self._cache = utils.LRUCache(maxsize)
+
+    def _key(self, A_c) -> tuple[Hashable, Optional[np.ndarray]]:
+        if self.key == "identity" and (
+            isinstance(A_c, np.ndarray) or utils.issparse(A_c)
+        ):
+            return ("identity", id(A_c)), A_c
+        return ("content", utils.array_digest(_as_matrix(A_c))), None
+
+    def embed_matrix(self, A_c: np.ndarray | sps.sparray | list) -> MatrixEmbedding:
+        """Hermitize, pad and normalize A_c, or return the cached result."""
+        key, source = self._key(A_c)
+        entry = self._cache.get(key)
+        if entry is not None:
+            return entry
+
+        A = _as_matrix(A_c)
+        if A.ndim != 2 or A.shape[0] != A.shape[1]:
+            raise ValueError("Input matrix A_c must be square.")
+        A_q, hermitian_transform_done, herm_dim, padded_dim = _hermitize_and_pad(A)
+        if utils.issparse(A_q):
+            for part in (A_q.data, A_q.indices, A_q.indptr):
+                part.flags.writeable = False
+        else:
+            A_q.flags.writeable = False
+        entry = MatrixEmbedding(
+            A_q,
+            A.shape[0],
+            herm_dim,
+            padded_dim,
+            hermitian_transform_done,
+            EmbeddingLayout(A.shape[0], herm_dim, padded_dim, hermitian_transform_done),
+        )
+        self._cache.put(key, entry)
+        if source is not None:
+            # An id can be reused once the array is gone; drop the entry first.
+            weakref.finalize(source, self._cache.pop, key)
+        return entry
+
+    def __call__(
+        self, A_c: np.ndarray | sps.sparray | list, b_c: np.ndarray | list
+    ) -> tuple[
+        NDArray[np.float64] | sps.csr_array,
+        NDArray[np.float64],
+        EmbeddingLayout,
+    ]:
+        """Same as `classical2quantum(A_c, b_c)`, with read-only results."""
+        entry = self.embed_matrix(A_c)
+        b_c = np.asarray(b_c, dtype=np.float64)
+        if b_c.size != entry.original_dim:
+            raise ValueError("Dimensions of A_c and b_c are incompatible.")
+        b_q = _embed_vector(b_c.ravel(), entry.padded_dim)
+        b_q.flags.writeable = False
+        return entry.A_q, b_q, entry.recover_x
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict[str, int]:
+        return self._cache.stats()
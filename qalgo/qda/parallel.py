@@ -0,0 +1,305 @@
+"""Run independent QDA solves in worker processes.
+
+pysparq keeps its registers in the global `sq.System`, so solves cannot run
+concurrently inside one process. `ParallelSolver` runs them in a process pool
+instead: every job starts from a cleared System, matrices and right-hand sides
+are published once in shared memory and mapped by the workers without being
+pickled, and each worker keeps the `PreparedSystem` of the last matrix it saw so
+consecutive jobs on the same A skip the matrix-dependent work.
+
+Matrices are published by identity: the first job on an array copies it into
+shared memory, which later jobs on the same object reuse until `close()`, so
+changes made to an array in place after its first job are not seen by the
+workers. Pass a changed matrix as a new array. Right-hand sides are copied per
+`submit` (per `solve_many` for B) and released as soon as their jobs finish.
+
+    with ParallelSolver(max_workers=4, step_rate=0.01) as solver:
+        X, reports = solver.solve_many(A, B)
+"""
+
+import functools
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Any, Iterable, Literal, Optional
+
+import numpy as np
+import pysparq as sq
+from numpy.typing import NDArray
+
+from ..telemetry import Telemetry
+from .adaptive import AdaptiveSteps
+from .cache import TreeCache
+from .precision import Precision
+from .pruning import PruningPolicy
+from .qram import PreparedSystem
+
+
+@dataclass(frozen=True)
+class SharedArraySpec:
+    """Enough to map a shared-memory array in another process."""
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+
+@dataclass(frozen=True)
+class JobResult:
+    index: int
+    x: NDArray[np.float64]
+    seconds: float  # wall time of the job inside the worker
+    prepare_seconds: float  # part of `seconds` spent preparing A (0 if reused)
+    reused_prepared: bool
+    pid: int
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+def _share(array: np.ndarray) -> tuple[shared_memory.SharedMemory, SharedArraySpec]:
+    array = np.ascontiguousarray(array, dtype=np.float64)
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm, SharedArraySpec(shm.name, array.shape, array.dtype.str)
+
+
+def _free(shm: shared_memory.SharedMemory) -> None:
+    shm.close()
+    shm.unlink()
+
+
+# Worker-process state: the last prepared matrix and its attached segment.
+_prepared_shm: Optional[shared_memory.SharedMemory] = None
+_prepared_key: Optional[SharedArraySpec] = None
+_prepared: Optional[PreparedSystem] = None
+
+
+def _attach(
+    spec: SharedArraySpec,
+) -> tuple[shared_memory.SharedMemory, np.ndarray]:
+    shm = shared_memory.SharedMemory(name=spec.name)
+    array = np.ndarray(spec.shape, dtype=np.dtype(spec.dtype), buffer=shm.buf)
+    array.flags.writeable = False
+    return shm, array
+
+
+def _detach(shm: shared_memory.SharedMemory) -> None:
+    try:
+        shm.close()
+    except BufferError:
+        # Views are still alive (e.g. in the traceback of a failed job); the
+        # mapping is released when they are.
+        pass
+
+
+def _init_worker():
+    sq.System.clear()
+
+
+def _run_job(
+    index: int,
+    A_spec: SharedArraySpec,
+    b_spec: SharedArraySpec,
+    column: Optional[int],
+    options: dict[str, Any],
+) -> JobResult:
+    global _prepared, _prepared_key, _prepared_shm
+
+    start = time.perf_counter()
+    sq.System.clear()
+    telemetry = Telemetry()
+
+    # The options are fixed per pool, so the matrix alone identifies the work.
+    key = A_spec
+    reused = _prepared is not None and key == _prepared_key
+    if reused:
+        _prepared.telemetry = telemetry
+    else:
+        # Release the previous matrix before preparing the next.
+        _prepared = _prepared_key = None
+        if _prepared_shm is not None:
+            _detach(_prepared_shm)
+        _prepared_shm, A = _attach(A_spec)
+        _prepared = PreparedSystem(A, telemetry=telemetry, **options["prepare"])
+        _prepared_key = key
+        del A
+    prepare_seconds = 0.0 if reused else time.perf_counter() - start
+
+    b_shm, b = _attach(b_spec)
+    try:
+        if column is not None:
+            b = b[:, column]
+        x = _prepared.solve(b, **options["solve"])
+    finally:
+        del b
+        _detach(b_shm)
+
+    return JobResult(
+        index,
+        x,
+        time.perf_counter() - start,
+        prepare_seconds,
+        reused,
+        os.getpid(),
+        dict(telemetry.timings),
+    )
+
+
+class ParallelSolver:
+    """A process pool for independent QDA solves.
+
+    Args:
+        max_workers (Optional[int], optional): Number of worker processes. Defaults to `os.cpu_count()`.
+        mp_context (optional): A `multiprocessing` context for the pool. Defaults to None (the platform default).
+        kappa, p, step_rate, tree_cache, precision, condest_method, condest_opt: Passed to `PreparedSystem` for every matrix.
+        mode, checkpoint, adaptive, pruning: Passed to `PreparedSystem.solve` for every job. Each job gets its own copy of `adaptive` and `pruning`, so learned step counts and pruning counters are not shared between jobs.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        mp_context=None,
+        kappa: Optional[float] = None,
+        p: float = 1.3,
+        step_rate: float = 0.01,
+        mode: str = "production",
+        checkpoint=None,
+        tree_cache: Optional[TreeCache] = None,
+        adaptive: Optional[AdaptiveSteps] = None,
+        pruning: Optional[PruningPolicy] = None,
+        precision: Optional[Precision | float] = None,
+        condest_method: Literal["splu", "svds"] = "splu",
+        condest_opt: Optional[dict[str, Any]] = None,
+    ):
+        self._options = {
+            "prepare": {
+                "kappa": kappa,
+                "p": p,
+                "step_rate": step_rate,
+                "tree_cache": tree_cache,
+                "precision": precision,
+                "condest_method": condest_method,
+                "condest_opt": condest_opt,
+            },
+            "solve": {
+                "mode": mode,
+                "checkpoint": checkpoint,
+                "adaptive": adaptive,
+                "pruning": pruning,
+            },
+        }
+        self._executor = ProcessPoolExecutor(
+            max_workers, mp_context=mp_context, initializer=_init_worker
+        )
+        self._segments: list[shared_memory.SharedMemory] = []
+        # Keyed by id(); the array is kept alive next to its spec.
+        self._shared: dict[int, tuple[np.ndarray, SharedArraySpec]] = {}
+        # Right-hand side segments by name, with the number of unfinished jobs.
+        self._rhs: dict[str, tuple[shared_memory.SharedMemory, int]] = {}
+        self._rhs_lock = threading.Lock()  # done callbacks run in other threads
+        self._next_index = 0
+
+    def share(self, array: np.ndarray) -> SharedArraySpec:
+        """Publish an array in shared memory once and return its spec.
+
+        The array is identified by the object, not by its values: sharing it
+        again returns the copy made the first time, until `close()`.
+        """
+        entry = self._shared.get(id(array))
+        if entry is not None and entry[0] is array:
+            return entry[1]
+        shm, spec = _share(array)
+        self._segments.append(shm)
+        self._shared[id(array)] = (array, spec)
+        return spec
+
+    def _share_rhs(self, b: np.ndarray, jobs: int) -> SharedArraySpec:
+        shm, spec = _share(b)
+        with self._rhs_lock:
+            self._rhs[spec.name] = (shm, jobs)
+        return spec
+
+    def _job_done(self, name: str, future: Future) -> None:
+        with self._rhs_lock:
+            shm, jobs = self._rhs.pop(name)
+            if jobs > 1:
+                self._rhs[name] = (shm, jobs - 1)
+                return
+        _free(shm)
+
+    def _submit(self, A, b_spec: SharedArraySpec, column: Optional[int]) -> Future:
+        index = self._next_index
+        self._next_index += 1
+        future = self._executor.submit(
+            _run_job, index, self.share(A), b_spec, column, self._options
+        )
+        future.add_done_callback(functools.partial(self._job_done, b_spec.name))
+        return future
+
+    def submit(self, A: np.ndarray, b: np.ndarray) -> "Future[JobResult]":
+        """Schedule one solve of Ax=b.
+
+        A is shared by identity (see `share`); b is copied for this job.
+        """
+        return self._submit(A, self._share_rhs(b, 1), None)
+
+    def map(self, systems: Iterable[tuple[np.ndarray, np.ndarray]]) -> list[JobResult]:
+        """Solve every (A, b) pair and return the results in input order.
+
+        Pairs sharing the same A object share one shared-memory copy of it.
+        """
+        futures = [self.submit(A, b) for A, b in systems]
+        return [future.result() for future in futures]
+
+    def solve_many(
+        self, A: np.ndarray, B: np.ndarray
+    ) -> tuple[NDArray[np.float64], list[JobResult]]:
+        """Solve AX=B with one job per column of B.
+
+        Returns:
+            The solutions stacked as columns, and the per-job results in column order.
+        """
+        B = np.asarray(B, dtype=np.float64)
+        if B.ndim != 2:
+            raise ValueError(f"B must be a 2-D array, got shape {B.shape}.")
+        B_spec = self._share_rhs(B, B.shape[1])
+        futures = [self._submit(A, B_spec, j) for j in range(B.shape[1])]
+        results = [future.result() for future in futures]
+        return np.stack([result.x for result in results], axis=1), results
+
+    def close(self):
+        """Shut down the workers and release the shared memory."""
+        self._executor.shutdown()
+        for shm in self._segments:
+            _free(shm)
+        self._segments.clear()
+        self._shared.clear()
+        # Left by jobs that were never submitted, e.g. B without columns.
+        for shm, _ in self._rhs.values():
+            _free(shm)
+        self._rhs.clear()
+
+    def __enter__(self) -> "ParallelSolver":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def solve_parallel(
+    A: np.ndarray,
+    B: np.ndarray,
+    max_workers: Optional[int] = None,
+    **options,
+) -> tuple[NDArray[np.float64], list[JobResult]]:
+    """Solve AX=B with one worker-process job per column of B.
+
+    Keyword arguments are passed to `ParallelSolver`.
+
+    Returns:
+        The solutions stacked as columns, and the per-job `JobResult`s in column order.
+    """
+    with ParallelSolver(max_workers, **options) as solver:
+        return solver.solve_many(A, B)
@@ -0,0 +1,128 @@
+"""Register widths of the QRAM encoding and the walk arithmetic.
+
+A vector is encoded by rounding its entries to multiples of 2^-exponent and
+storing them as data_size-bit two's complement words. The internal nodes of
+its vector tree hold sums of squares of those words, up to 2^(2 exponent)
+for the normalized vectors of `classical2quantum`, so the words need
+data_size >= 2 exponent + 1 bits. rational_size is the width of the
+fixed-point rotation angles of the state preparation and the walk.
+
+`plan_precision` picks the smallest widths for a target error from the actual
+entries of the embedded A (and b, if known): the exponent is the smallest one
+whose rounding keeps the relative error of the encoded A below tol / kappa (to
+first order, a relative perturbation e of A moves the solution by kappa e)
+and that of b below tol.
+
+    precision = plan_precision(A_q, kappa, tol=1e-3)
+    x = qda.solve(A, b, precision=1e-3)  # planned inside
+    x = qda.solve(A, b, precision=Precision(12, 25, 16))  # explicit widths
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from .. import utils
+
+MAX_DATA_SIZE = 63  # words are handled as uint64
+MAX_EXPONENT = (MAX_DATA_SIZE - 1) // 2
+MIN_RATIONAL_SIZE = 8
+
+
+@dataclass(frozen=True)
+class Precision:
+    exponent: int  # entries are rounded to multiples of 2^-exponent
+    data_size: int  # QRAM word width in bits
+    rational_size: int  # rotation angle width in bits
+
+    def __post_init__(self):
+        if not 0 < self.exponent <= MAX_EXPONENT:
+            raise ValueError(
+                f"exponent must be in [1, {MAX_EXPONENT}], got {self.exponent}."
+            )
+        if not 2 * self.exponent + 1 <= self.data_size <= MAX_DATA_SIZE:
+            raise ValueError(
+                f"data_size must be in [2 * exponent + 1, {MAX_DATA_SIZE}] "
+                f"= [{2 * self.exponent + 1}, {MAX_DATA_SIZE}], got {self.data_size}."
+            )
+        if not 0 < self.rational_size <= 64:
+            raise ValueError(
+                f"rational_size must be in [1, 64], got {self.rational_size}."
+            )
+
+    @classmethod
+    def for_exponent(cls, exponent: int, rational_size: int) -> "Precision":
+        """The narrowest words that hold the tree of an `exponent` encoding."""
+        return cls(exponent, 2 * exponent + 1, rational_size)
+
+
+# The widths qalgo always used before the planner.
+DEFAULT_PRECISION = Precision(15, 50, 51)
+
+
+def encoding_error(values: ArrayLike, exponent: int) -> float:
+    """Relative 2-norm error of rounding `values` to multiples of 2^-exponent."""
+    values = np.asarray(values, dtype=np.float64).ravel()
+    norm = np.linalg.norm(values)
+    if norm == 0:
+        return 0.0
+    scale = 2.0**exponent
+    rounded = np.rint(values * scale)
+    rounded /= scale
+    rounded -= values
+    return float(np.linalg.norm(rounded) / norm)
+
+
+def min_exponent(values: ArrayLike, tol: float) -> int:
+    """Smallest exponent whose rounding error on `values` is at most tol.
+
+    Raises:
+        ValueError: If even MAX_EXPONENT does not reach tol.
+    """
+    values = np.asarray(values, dtype=np.float64).ravel()
+    values = values[values != 0]
+    if values.size == 0:
+        return 1
+    # Rounding moves each entry by at most 2^-(exponent+1), so this exponent
+    # always meets tol; smaller ones often do too, depending on the entries.
+    norm = np.linalg.norm(values)
+    upper = int(np.ceil(np.log2(np.sqrt(values.size) / (2 * tol * norm))))
+    for exponent in range(1, min(max(upper, 1), MAX_EXPONENT) + 1):
+        if encoding_error(values, exponent) <= tol:
+            return exponent
+    raise ValueError(
+        f"No exponent up to {MAX_EXPONENT} encodes the data within {tol}."
+    )
+
+
+def plan_precision(
+    A_q,
+    kappa: float = 1.0,
+    tol: float = 1e-3,
+    b_q: Optional[ArrayLike] = None,
+) -> Precision:
+    """Smallest register widths meeting a target relative error of the solution.
+
+    Args:
+        A_q (np.ndarray | sps.sparray): The embedded matrix of `classical2quantum`. Only its nonzeros are read.
+        kappa (float, optional): Condition number of A_q; the error budget of A_q is tol / kappa. Defaults to 1.0.
+        tol (float, optional): Target relative error. Defaults to 1e-3.
+        b_q (Optional[ArrayLike], optional): The embedded right-hand side. Without it the plan only accounts for A_q, and `PreparedSystem.solve` warns if a b needs more. Defaults to None.
+
+    Raises:
+        ValueError: If tol is not in (0, 1), or no supported width meets it.
+    """
+    if not 0 < tol < 1:
+        raise ValueError(f"tol must be in (0, 1), got {tol}.")
+    values = A_q.data if utils.issparse(A_q) else A_q
+    exponent = min_exponent(values, tol / max(kappa, 1.0))
+    if b_q is not None:
+        exponent = max(exponent, min_exponent(b_q, tol))
+
+    # Each of the log2(N) + 1 levels of a state preparation rotates by an
+    # angle rounded to 2^-rational_size.
+    levels = np.log2(A_q.shape[0]) + 1
+    rational_size = max(int(np.ceil(np.log2(levels / tol))), MIN_RATIONAL_SIZE)
+    return Precision.for_exponent(exponent, rational_size)
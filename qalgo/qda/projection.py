@@ -0,0 +1,66 @@
+"""Projection of a walk state into preallocated NumPy buffers.
+
+`sq.PartialTraceSelect.get_projected_full` returns the projected amplitudes as
+a Python list. `Projection` assigns that list straight into a reusable
+complex128 buffer (NumPy fills an existing array from a list without an
+intermediate array) and hands out the real parts as a view of that buffer, so
+repeated readouts, such as the fidelity checkpoints of the debug walk
+sequence, allocate no new arrays.
+
+    project = Projection({anc_UA: 0, anc_2: 0, anc_3: 0})
+    amplitudes, p = project(state)  # complex view of project.buffer
+    real, p = project.real(state)  # float view of the same buffer
+"""
+
+from typing import Optional
+
+import numpy as np
+import pysparq as sq
+from numpy.typing import NDArray
+
+
+class Projection:
+    """`sq.PartialTraceSelect` that writes the projected state into a buffer.
+
+    Args:
+        select (dict[str, int] | dict[int, int]): Register name or id to the value selected for it.
+    """
+
+    def __init__(self, select: dict[str, int] | dict[int, int]):
+        self.select = sq.PartialTraceSelect(select)
+        self.buffer: Optional[NDArray[np.complex128]] = None
+
+    def __call__(
+        self,
+        state: sq.SparseState,
+        out: Optional[NDArray[np.complex128]] = None,
+    ) -> tuple[NDArray[np.complex128], float]:
+        """Project `state` into `out`, or into the reusable `buffer`.
+
+        The buffer is overwritten by the next call; copy the result to keep it.
+
+        Returns:
+            The projected amplitudes (`out` or `buffer`), and the probability returned by pysparq.
+        """
+        amplitudes, p = self.select.get_projected_full(state)
+        size = len(amplitudes)
+        if out is None:
+            if self.buffer is None or self.buffer.size != size:
+                self.buffer = np.empty(size, dtype=np.complex128)
+            out = self.buffer
+        elif out.shape != (size,) or out.dtype != np.complex128:
+            raise ValueError(
+                f"Output buffer must be complex128 with shape ({size},), "
+                f"got {out.dtype} with shape {out.shape}."
+            )
+        out[...] = amplitudes
+        return out, p
+
+    def real(
+        self,
+        state: sq.SparseState,
+        out: Optional[NDArray[np.complex128]] = None,
+    ) -> tuple[NDArray[np.float64], float]:
+        """Like calling the projection, but return a view of the real parts."""
+        amplitudes, p = self(state, out)
+        return amplitudes.real, p
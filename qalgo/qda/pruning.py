@@ -0,0 +1,105 @@
+"""Amplitude pruning for memory-bounded walk sequences.
+
+After every walk step the sequence calls `sq.ClearZero()`, which only drops
+exact zeros, so the sparse state also keeps basis states whose amplitudes are
+numerically negligible. A `PruningPolicy` drops those on a fixed cadence,
+either below a probability threshold or outside the k most probable basis
+states, and renormalizes what is left:
+
+    pruning = PruningPolicy(threshold=1e-12, every=10)
+    x = qda.solve(A, b, pruning=pruning, telemetry=telemetry)
+    telemetry.metrics["pruned_mass"]  # total probability discarded
+
+Dropping probability m (and renormalizing) leaves a state with overlap
+sqrt(1 - m) with the state before the pruning, so `pruned_mass` is the knob
+that trades accuracy for a smaller state and faster steps.
+"""
+
+from typing import Optional
+
+import numpy as np
+import pysparq as sq
+
+
+def probabilities(state: sq.SparseState) -> np.ndarray:
+    """|amplitude|^2 of every basis state, in storage order."""
+    basis_states = state.basis_states
+    return np.fromiter(
+        (abs(system.amplitude) ** 2 for system in basis_states),
+        dtype=np.float64,
+        count=len(basis_states),
+    )
+
+
+class PruningPolicy:
+    """Drop low-probability basis states after every `every` walk steps.
+
+    Args:
+        threshold (Optional[float], optional): Drop basis states whose probability |amplitude|^2 is below this value. Defaults to None.
+        top_k (Optional[int], optional): Keep only the `top_k` most probable basis states (ties at the cut are kept). Combined with `threshold`, the stricter cut applies. Defaults to None.
+        every (int, optional): Prune after steps every-1, 2*every-1, .... Defaults to 1.
+        renormalize (bool, optional): Rescale the remaining state to unit norm after pruning. Defaults to True.
+
+    After a walk sequence, `pruned_mass` holds the total probability
+    discarded, `pruned_states` the number of basis states dropped, and
+    `applications` the number of times the policy pruned the state.
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        top_k: Optional[int] = None,
+        every: int = 1,
+        renormalize: bool = True,
+    ):
+        if threshold is None and top_k is None:
+            raise ValueError("Set a threshold and/or a top_k.")
+        if threshold is not None and not 0 <= threshold < 1:
+            raise ValueError(f"threshold must be in [0, 1), got {threshold}.")
+        if top_k is not None and top_k < 1:
+            raise ValueError(f"top_k must be a positive integer, got {top_k}.")
+        if every < 1:
+            raise ValueError(f"every must be a positive integer, got {every}.")
+        self.threshold = threshold
+        self.top_k = top_k
+        self.every = every
+        self.renormalize = renormalize
+        self.start()
+
+    def start(self) -> None:
+        """Reset the counters; called before each walk sequence."""
+        self.pruned_mass = 0.0
+        self.pruned_states = 0
+        self.applications = 0
+
+    def cutoff(self, probs: np.ndarray) -> float:
+        """Probability below which basis states are dropped."""
+        cutoff = 0.0 if self.threshold is None else self.threshold
+        if self.top_k is not None and probs.size > self.top_k:
+            kth = probs.size - self.top_k
+            cutoff = max(cutoff, float(np.partition(probs, kth)[kth]))
+        return cutoff
+
+    def __call__(self, state: sq.SparseState, n: int) -> float:
+        """Prune after step n if it is due.
+
+        Returns:
+            The probability discarded by this call.
+        """
+        if (n + 1) % self.every != 0:
+            return 0.0
+        probs = probabilities(state)
+        cutoff = self.cutoff(probs)
+        dropped = probs < cutoff
+        count = int(np.count_nonzero(dropped))
+        if count == 0:
+            return 0.0
+
+        mass = float(probs[dropped].sum())
+        sq.ClearZero(cutoff)(state)  # drops |amplitude|^2 < cutoff
+        if self.renormalize:
+            sq.Normalize()(state)
+        self.pruned_mass += mass
+        self.pruned_states += count
+        self.applications += 1
+        return mass
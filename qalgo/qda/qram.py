@@ -1,18 +1,48 @@
-from dataclasses import dataclass
-from typing import Callable, Optional
+from __future__ import annotations
+
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Callable, Literal, Optional
 
 import numpy as np
 import pysparq as sq
 from numpy.typing import NDArray
 
 from .. import utils
+from ..telemetry import Telemetry
+from .adaptive import AdaptiveSteps, AdaptiveTrial
+from .backends import dispatch
+from .cache import TreeCache
+from .checkpoint import CheckpointPolicy, CheckpointRecord, as_policy
 from .fundamental import (
     QDADebugger,
+    QDAReference,
     compute_step_rate,
     get_fidelity,
-    make_vector_tree,
-    scale_and_convert_vector,
+    make_encoded_tree,
+    make_matrix_encoded_tree,
+    make_sparse_encoded_tree,
 )
+from .precision import Precision, encoding_error, plan_precision
+from .projection import Projection
+from .pruning import PruningPolicy
+from .snapshot import StateSnapshots, load_snapshot, restore_state
+
+if TYPE_CHECKING:
+    import scipy.sparse as sps
+
+    from .memo import Classical2QuantumCache
+
+logger = logging.getLogger(__name__)
+
+
+def record_system_size(telemetry: Telemetry):
+    """Record the peak pysparq System size reached so far."""
+    telemetry.record_max("max_qubit_count", sq.System.max_qubit_count)
+    telemetry.record_max("max_register_count", sq.System.max_register_count)
+    telemetry.record_max("max_system_size", sq.System.max_system_size)
 
 
 class Walk_s_via_QRAM_Debug:
@@ -62,11 +92,21 @@ class Walk_s_via_QRAM_Debug:
 
 
 @dataclass
-class WalkSequence_via_QRAM_Debug:
+class WalkSequence_via_QRAM:
+    """Discrete adiabatic walk over the schedule s = n / steps, n = 0..steps-1.
+
+    The schedule is computed once, and each `sq.Walk_s_via_QRAM` is built on
+    first use and kept in an LRU cache of `cache_size` operators (all steps
+    if None, none if 0). A single forward run revisits no step, so the cache
+    pays off when steps are revisited: `dag` after a forward run reuses the
+    operators of the last `cache_size` steps, and with `cache_size=None`
+    repeated runs construct nothing. Each cached operator holds its own copy
+    of the walk parameters (about 2 KB), so keeping all of them costs memory
+    linear in `steps`.
+    """
+
     qram_A: sq.QRAMCircuit_qutrit
     qram_b: sq.QRAMCircuit_qutrit
-    matrix_A: NDArray[np.float64]
-    vector_b: NDArray[np.float64]
     main_reg: str
     anc_UA: str
     anc_1: str
@@ -78,87 +118,485 @@ class WalkSequence_via_QRAM_Debug:
     p: float
     data_size: int
     rational_size: int
+    pruning: Optional[PruningPolicy] = None
+    cache_size: Optional[int] = 256
 
-    def __call__(self, state):
-        for n in range(self.steps):
-            s = n / self.steps
-            walk = Walk_s_via_QRAM_Debug(
+    def __post_init__(self):
+        if self.cache_size is not None and self.cache_size < 0:
+            raise ValueError(
+                f"cache_size must be None or non-negative, got {self.cache_size}."
+            )
+        self.schedule = np.arange(self.steps) / self.steps
+        maxsize = max(self.steps, 1) if self.cache_size is None else self.cache_size
+        self._walks = utils.LRUCache(maxsize) if maxsize > 0 else None
+        self._clear_zero = sq.ClearZero()
+
+    def get_walk(self, n: int) -> sq.Walk_s_via_QRAM:
+        walk = None if self._walks is None else self._walks.get(n)
+        if walk is None:
+            walk = sq.Walk_s_via_QRAM(
                 self.qram_A,
                 self.qram_b,
-                self.matrix_A,
-                self.vector_b,
                 self.main_reg,
                 self.anc_UA,
                 self.anc_1,
                 self.anc_2,
                 self.anc_3,
                 self.anc_4,
-                s,
+                float(self.schedule[n]),
                 self.kappa,
                 self.p,
                 self.data_size,
                 self.rational_size,
             )
-            walk(state)
-            sq.ClearZero()(state)
-
-            if (n + 1) % 2 == 0:
-                mid_state, p_success = sq.PartialTraceSelect(
-                    {self.anc_UA: 0, self.anc_2: 0, self.anc_3: 0}
-                ).get_projected_full(state)
-                mid_state = np.array(mid_state, dtype=np.complex128).real
-                ideal_state = walk.get_mid_eigenstate()
-                fidelity = get_fidelity(ideal_state, mid_state)
-
-                print(
-                    f"step: {n} / {self.steps}, fidelity: {fidelity}, p_success: {p_success}"
+            if self._walks is not None:
+                self._walks.put(n, walk)
+        return walk
+
+    def compile(self) -> "WalkSequence_via_QRAM":
+        """Build every walk operator ahead of the evolution.
+
+        The operators bind the ids of their registers when they are built, so
+        the registers must already exist in the System (e.g. after the state
+        preparation).
+
+        Raises:
+            ValueError: If the cache cannot hold every step; use `cache_size=None`.
+            RuntimeError: If a register of the walk does not exist yet.
+        """
+        if self.cache_size is not None and self.cache_size < self.steps:
+            raise ValueError(
+                f"compile() needs a cache of all {self.steps} steps, "
+                f"got cache_size={self.cache_size}; use cache_size=None."
+            )
+        active = {
+            name for name, _, _, activated in sq.System.name_register_map if activated
+        }
+        registers = (
+            self.main_reg,
+            self.anc_UA,
+            self.anc_1,
+            self.anc_2,
+            self.anc_3,
+            self.anc_4,
+        )
+        missing = [name for name in registers if name not in active]
+        if missing:
+            raise RuntimeError(
+                f"compile() needs the registers {missing} to exist in the System."
+            )
+        for n in range(self.steps):
+            self.get_walk(n)
+        return self
+
+    def step(self, state: sq.SparseState, n: int):
+        self.get_walk(n)(state)
+        self._clear_zero(state)
+        if self.pruning is not None:
+            self.pruning(state, n)
+
+    def step_dag(self, state: sq.SparseState, n: int):
+        self.get_walk(n).dag(state)
+        self._clear_zero(state)
+
+    def __call__(
+        self,
+        state: sq.SparseState,
+        start: int = 0,
+        on_step: Optional[Callable[[sq.SparseState, int], Any]] = None,
+    ):
+        """Apply steps start..steps-1, calling `on_step(state, n)` after each."""
+        for n in range(start, self.steps):
+            self.step(state, n)
+            if on_step is not None:
+                on_step(state, n)
+
+    def dag(self, state: sq.SparseState):
+        for n in reversed(range(self.steps)):
+            self.step_dag(state, n)
+
+
+@dataclass
+class WalkSequence_via_QRAM_Debug:
+    qram_A: sq.QRAMCircuit_qutrit
+    qram_b: sq.QRAMCircuit_qutrit
+    matrix_A: NDArray[np.float64]
+    vector_b: NDArray[np.float64]
+    main_reg: str
+    anc_UA: str
+    anc_1: str
+    anc_2: str
+    anc_3: str
+    anc_4: str
+    steps: int
+    kappa: float
+    p: float
+    data_size: int
+    rational_size: int
+    checkpoint: CheckpointPolicy | int = 2
+    telemetry: Optional[Telemetry] = None
+    pruning: Optional[PruningPolicy] = None
+
+    def __post_init__(self):
+        if self.telemetry is None:
+            self.telemetry = Telemetry()
+        self.records: list[CheckpointRecord] = []
+        # One buffer, reused by every checkpoint.
+        self.projection = Projection({self.anc_UA: 0, self.anc_2: 0, self.anc_3: 0})
+        # One SVD of A, so each checkpoint's ideal state costs O(n^2).
+        self.reference = QDAReference(self.matrix_A, self.vector_b)
+        self.sequence = WalkSequence_via_QRAM(
+            self.qram_A,
+            self.qram_b,
+            self.main_reg,
+            self.anc_UA,
+            self.anc_1,
+            self.anc_2,
+            self.anc_3,
+            self.anc_4,
+            self.steps,
+            self.kappa,
+            self.p,
+            self.data_size,
+            self.rational_size,
+            self.pruning,
+        )
+
+    def get_debugger(self, n: int) -> QDADebugger:
+        s = float(self.sequence.schedule[n])
+        return QDADebugger(
+            self.matrix_A, self.vector_b, s, self.kappa, self.p, self.reference
+        )
+
+    def check(self, state, n: int, elapsed: float) -> CheckpointRecord:
+        mid_state, p_success = self.projection.real(state)
+        ideal_state = self.get_debugger(n).get_mid_eigenstate()
+        fidelity = get_fidelity(ideal_state, mid_state)
+        return CheckpointRecord(
+            n, float(self.sequence.schedule[n]), fidelity, p_success, elapsed
+        )
+
+    def __call__(
+        self,
+        state,
+        start: int = 0,
+        on_step: Optional[Callable[[sq.SparseState, int], Any]] = None,
+    ) -> list[CheckpointRecord]:
+        policy = as_policy(self.checkpoint)
+        policy.start(self.steps)
+        self.records = []
+        start_time = time.perf_counter()
+
+        for n in range(start, self.steps):
+            self.sequence.step(state, n)
+            if on_step is not None:
+                on_step(state, n)
+
+            elapsed = time.perf_counter() - start_time
+            if policy(n, elapsed):
+                with self.telemetry.stage("checkpoint"):
+                    record = self.check(state, n, elapsed)
+                policy.observe(record, time.perf_counter() - start_time - elapsed)
+                self.records.append(record)
+
+                record_system_size(self.telemetry)
+                self.telemetry.emit("checkpoint", asdict(record))
+                logger.info(
+                    "step: %d / %d, fidelity: %s, p_success: %s",
+                    n,
+                    self.steps,
+                    record.fidelity,
+                    record.p_success,
+                )
+                logger.info(
+                    "Maximum Qubit Count = %d, Maximum Register Count = %d, "
+                    "Maximum System Size = %d",
+                    sq.System.max_qubit_count,
+                    sq.System.max_register_count,
+                    sq.System.max_system_size,
                 )
-                print(f"Maximum Qubit Count = {sq.System.max_qubit_count}")
-                print(f"Maximum Register Count = {sq.System.max_register_count}")
-                print(f"Maximum System Size = {sq.System.max_system_size}")
-                print("")
+
+        return self.records
 
     def dag(self, state):
         for n in range(self.steps):
             if (n + 1) % 10 == 0:
-                print(f"step: {n}")
-            s = (self.steps - n - 1) / self.steps
-            walk = Walk_s_via_QRAM_Debug(
-                self.qram_A,
-                self.qram_b,
-                self.matrix_A,
-                self.vector_b,
-                self.main_reg,
-                self.anc_UA,
-                self.anc_1,
-                self.anc_2,
-                self.anc_3,
-                self.anc_4,
-                s,
-                self.kappa,
-                self.p,
-                self.data_size,
-                self.rational_size,
+                logger.debug("step: %d", n)
+            self.sequence.step_dag(state, self.steps - n - 1)
+
+
+def _as_matrix(A_c) -> NDArray[np.float64] | sps.csr_array:
+    """Convert A_c to a float64 ndarray, or to a float64 CSR array if it is sparse."""
+    if utils.issparse(A_c):
+        import scipy.sparse as sps
+
+        A_c = sps.csr_array(A_c, dtype=np.float64)
+        if not A_c.has_canonical_format:
+            A_c = A_c.copy()
+            A_c.sum_duplicates()
+        return A_c
+    return np.asarray(A_c, dtype=np.float64)
+
+
+def _frobenius_norm(A: NDArray[np.float64]) -> float:
+    """np.linalg.norm(A) of a real matrix, without a flattened copy."""
+    if A.flags.c_contiguous or A.flags.f_contiguous:
+        flat = A.ravel(order="K")  # a view
+        return float(np.sqrt(np.dot(flat, flat)))
+    return float(np.sqrt(sum(np.dot(row, row) for row in A)))
+
+
+def _embedding_buffer(
+    A_c: NDArray[np.float64], padded_dim: int, out: Optional[NDArray[np.float64]]
+) -> NDArray[np.float64]:
+    """Check a caller-supplied A_q buffer, or allocate one."""
+    if out is None:
+        return np.empty((padded_dim, padded_dim), dtype=np.float64)
+    if out.shape != (padded_dim, padded_dim) or out.dtype != np.float64:
+        raise ValueError(
+            f"out must be float64 with shape ({padded_dim}, {padded_dim}), "
+            f"got {out.dtype} with shape {out.shape}."
+        )
+    if not out.flags.writeable:
+        raise ValueError("out must be writable.")
+    # Only A_c itself can be reused, and only if A_q is A_c normalized.
+    if np.may_share_memory(out, A_c) and not (
+        out is A_c and padded_dim == A_c.shape[0]
+    ):
+        raise ValueError("out overlaps A_c, which must be embedded or padded.")
+    return out
+
+
+def _hermitize_and_pad(
+    A_c: NDArray[np.float64] | sps.csr_array,
+    out: Optional[NDArray[np.float64]] = None,
+) -> tuple[NDArray[np.float64] | sps.csr_array, bool, int, int]:
+    """Hermitize, pad and normalize the matrix of `classical2quantum`.
+
+    A sparse A_c stays sparse: the embedding and the identity padding are
+    assembled from blocks, so only nonzeros are ever stored. A dense A_q is
+    written block by block into a single buffer, `out` if given, and
+    normalized in place, so A_q is the only full-size allocation.
+
+    Returns:
+        A_q: Quantum-compatible matrix (Hermitian, power-of-2 dimension), a CSR array if A_c is sparse
+        hermitian_transform_done: Whether A_c was embedded as [0 A; A_dag 0]
+        herm_dim: Dimension after hermitization
+        padded_dim: Dimension after padding
+    """
+    if utils.issparse(A_c):
+        if out is not None:
+            raise ValueError("out is only supported for a dense A_c.")
+        return _hermitize_and_pad_sparse(A_c)
+
+    # Step 1: Hermitization (if necessary)
+    n = A_c.shape[0]
+    hermitian_transform_done = not utils.is_hermitian(A_c)
+    herm_dim = 2 * n if hermitian_transform_done else n
+    # Step 2: Padding to power of 2
+    padded_dim = utils.next_power_of_2(herm_dim)
+    A_q = _embedding_buffer(A_c, padded_dim, out)
+
+    if hermitian_transform_done:
+        logger.info("Input A is not Hermitian. Applying transformation.")
+        A_q[:n, :n] = 0.0
+        A_q[:n, n:herm_dim] = A_c
+        A_q[n:herm_dim, :n] = A_c.conj().T
+        A_q[n:herm_dim, n:herm_dim] = 0.0
+    elif A_q is not A_c:
+        A_q[:n, :n] = A_c
+    if padded_dim != herm_dim:
+        logger.info("Padding dimension from %d to %d", herm_dim, padded_dim)
+        A_q[:herm_dim, herm_dim:] = 0.0
+        A_q[herm_dim:, :] = 0.0
+        np.fill_diagonal(A_q[herm_dim:, herm_dim:], 1.0)
+
+    # Step 3: Normalize the matrix A_q
+    A_q /= _frobenius_norm(A_q)
+
+    return A_q, hermitian_transform_done, herm_dim, padded_dim
+
+
+def _hermitize_and_pad_sparse(
+    A_c: sps.csr_array,
+) -> tuple[sps.csr_array, bool, int, int]:
+    """`_hermitize_and_pad` for a canonical CSR matrix."""
+    import scipy.sparse as sps
+
+    hermitian_transform_done = False
+
+    if utils.is_hermitian(A_c):
+        A_herm = A_c
+    else:
+        logger.info("Input A is not Hermitian. Applying transformation.")
+        hermitian_transform_done = True
+        A_herm = sps.block_array([[None, A_c], [A_c.conj().T, None]], format="csr")
+
+    herm_dim = A_herm.shape[0]
+    padded_dim = utils.next_power_of_2(herm_dim)
+
+    if padded_dim == herm_dim:
+        A_q = sps.csr_array(A_herm, copy=True)
+    else:
+        logger.info("Padding dimension from %d to %d", herm_dim, padded_dim)
+        A_q = sps.block_diag(
+            (A_herm, sps.eye_array(padded_dim - herm_dim, dtype=A_herm.dtype)),
+            format="csr",
+        )
+    A_q.sum_duplicates()
+
+    # The Frobenius norm only involves the stored entries.
+    A_q.data /= np.linalg.norm(A_q.data)
+
+    return A_q, hermitian_transform_done, herm_dim, padded_dim
+
+
+def _make_matrix_tree(
+    A_q: NDArray[np.float64] | sps.csr_array,
+    exponent: int,
+    data_size: int,
+    out: Optional[NDArray[np.uint64]] = None,
+) -> NDArray[np.uint64]:
+    """Encoded vector tree of A_q flattened in column-major order.
+
+    For a sparse A_q the leaves are scattered from the nonzeros, so the dense
+    N^2 float matrix and its flattened copy are never built. A dense A_q is
+    encoded in blocks, without a flattened copy either.
+    """
+    if utils.issparse(A_q):
+        n = A_q.shape[0]
+        coo = A_q.tocoo()
+        indices = coo.col.astype(np.int64) * n + coo.row
+        return make_sparse_encoded_tree(
+            indices, coo.data, n * n, exponent, data_size, out=out
+        )
+    return make_matrix_encoded_tree(A_q, exponent, data_size, out=out)
+
+
+def _embed_vector(b_c: NDArray[np.float64], padded_dim: int) -> NDArray[np.float64]:
+    """Embed and normalize the right-hand side of `classical2quantum`.
+
+    b is placed in the leading entries both without hermitization and in the
+    [b; 0] right-hand side of the hermitized system.
+    """
+    b_q = np.zeros(padded_dim, dtype=np.float64)
+    b_q[: b_c.size] = b_c
+    b_q /= np.linalg.norm(b_q)
+    return b_q
+
+
+class EmbeddingLayout:
+    """Where the unknowns of the original system sit in the embedded one.
+
+    `classical2quantum` embeds a non-Hermitian A as [0 A; A_dag 0], whose
+    solution for [b; 0] is [0; x], and pads to padded_dim. Called on a
+    solution of the embedded system, the layout returns x as a view of it
+    (one slice, no copy); a stack of solutions along the last axis, e.g.
+    with shape (k, padded_dim), is recovered in one call. It is the
+    `recover_x` returned by `classical2quantum`, and pickles as four
+    integers, so it can be sent to worker processes and cached.
+
+    Args:
+        original_dim (int): Dimension of the original A.
+        herm_dim (int): Dimension after hermitization.
+        padded_dim (int): Dimension after padding.
+        hermitian_transform_done (bool): Whether A was embedded as [0 A; A_dag 0].
+    """
+
+    __slots__ = ("original_dim", "herm_dim", "padded_dim", "hermitian_transform_done")
+
+    def __init__(
+        self,
+        original_dim: int,
+        herm_dim: int,
+        padded_dim: int,
+        hermitian_transform_done: bool,
+    ):
+        expected = 2 * original_dim if hermitian_transform_done else original_dim
+        if herm_dim != expected or not herm_dim <= padded_dim:
+            raise ValueError(
+                f"Inconsistent embedding: original_dim {original_dim}, "
+                f"herm_dim {herm_dim}, padded_dim {padded_dim}, "
+                f"hermitian_transform_done {hermitian_transform_done}."
             )
-            walk.dag(state)
+        self.original_dim = int(original_dim)
+        self.herm_dim = int(herm_dim)
+        self.padded_dim = int(padded_dim)
+        self.hermitian_transform_done = bool(hermitian_transform_done)
+
+    @property
+    def offset(self) -> int:
+        """Index of the first original unknown in the embedded solution."""
+        return self.original_dim if self.hermitian_transform_done else 0
+
+    def __call__(self, x_q: np.ndarray) -> np.ndarray:
+        """Return the original solution(s) as a view of x_q (no copy).
+
+        Raises:
+            RuntimeError: If the last axis of x_q does not have length padded_dim.
+        """
+        if x_q.ndim == 0 or x_q.shape[-1] != self.padded_dim:
+            raise RuntimeError(
+                f"Solution vector x_q has incorrect dimension for recovery: "
+                f"got {x_q.shape[-1] if x_q.ndim else x_q.size}, "
+                f"expected {self.padded_dim}."
+            )
+        return x_q[..., self.offset : self.offset + self.original_dim]
+
+    def _fields(self) -> tuple[int, int, int, bool]:
+        return (
+            self.original_dim,
+            self.herm_dim,
+            self.padded_dim,
+            self.hermitian_transform_done,
+        )
+
+    def __reduce__(self):
+        return (type(self), self._fields())
 
-            sq.ClearZero()(state)
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, EmbeddingLayout):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    def __hash__(self) -> int:
+        return hash(self._fields())
+
+    def __repr__(self) -> str:
+        return (
+            f"EmbeddingLayout(original_dim={self.original_dim}, "
+            f"herm_dim={self.herm_dim}, padded_dim={self.padded_dim}, "
+            f"hermitian_transform_done={self.hermitian_transform_done})"
+        )
 
 
 def classical2quantum(
-    A_c: np.ndarray | list, b_c: np.ndarray | list
+    A_c: np.ndarray | sps.sparray | list,
+    b_c: np.ndarray | list,
+    out: Optional[NDArray[np.float64]] = None,
 ) -> tuple[
-    NDArray[np.float64], NDArray[np.float64], Callable[[np.ndarray], np.ndarray]
+    NDArray[np.float64] | sps.csr_array,
+    NDArray[np.float64],
+    EmbeddingLayout,
 ]:
     """
     Convert a classical linear system Ax = b to quantum-compatible form
 
+    A `scipy.sparse` A_c is hermitized, padded and normalized without
+    densifying it, and A_q is then returned as a CSR array.
+
+    A dense A_q is built in one float64 buffer of shape (padded_dim,
+    padded_dim), which is returned without a further copy. Pass `out` to
+    supply that buffer, e.g. a memory map; for a Hermitian A_c of power-of-2
+    dimension, `out=A_c` normalizes A_c in place.
+
     Returns:
         A_q: Quantum-compatible matrix (Hermitian, power-of-2 dimension)
         b_q: Corresponding right-hand side vector
-        recover_x: Function to recover original solution from quantum solution
+        recover_x: `EmbeddingLayout` recovering the original solution from the quantum solution (or a stack of them), returned as a view of its argument
     """
-    A_c = np.array(A_c, dtype=np.float64)
+    # No copy of a float64 (or memory-mapped) A_c: the embedding is a new array.
+    A_c = _as_matrix(A_c)
     b_c = np.array(b_c, dtype=np.float64)
 
     if A_c.shape[0] != A_c.shape[1]:
@@ -166,181 +604,667 @@ def classical2quantum(
     if A_c.shape[0] != b_c.size:
         raise ValueError("Dimensions of A_c and b_c are incompatible.")
 
-    original_dim = A_c.shape[0]
-    hermitian_transform_done = False
+    A_q, hermitian_transform_done, herm_dim, padded_dim = _hermitize_and_pad(
+        A_c, out
+    )
+    b_q = _embed_vector(b_c, padded_dim)
+    recover_x = EmbeddingLayout(
+        A_c.shape[0], herm_dim, padded_dim, hermitian_transform_done
+    )
+    return A_q, b_q, recover_x
 
-    # Step 1: Hermitization (if necessary)
-    # A simple check, though the problem implies it might not be
-    # For robustness, we can always apply the embedding if not explicitly told it's Hermitian.
-    # Or, if A_c IS Hermitian, we can skip. For now, let's assume we check.
-    # A more robust check than `is_hermitian` for very small matrices or specific structures
-    # might be needed, but `np.allclose` is generally good.
-    if utils.is_hermitian(A_c):
-        # print("Input A is already Hermitian.")
-        A_herm = A_c.copy()
-        b_herm = b_c.copy()
-    else:
-        print("Input A is not Hermitian. Applying transformation.")
-        hermitian_transform_done = True
-        n = A_c.shape[0]
-        A_herm = np.zeros((2 * n, 2 * n), dtype=A_c.dtype)
-        A_herm[:n, n:] = A_c
-        A_herm[n:, :n] = A_c.conj().T
 
-        b_herm = np.zeros(2 * n, dtype=A_c.dtype)
-        b_herm[:n] = b_c
+# Walk registers in the order they are added to the System.
+REGISTERS = ("main_reg", "anc_UA", "anc_4", "anc_3", "anc_2", "anc_1")
 
-    # Step 2: Padding to power of 2
-    herm_dim = A_herm.shape[0]
-    padded_dim = utils.next_power_of_2(herm_dim)
 
-    if padded_dim == herm_dim:
-        # print("Dimension is already a power of 2.")
-        A_q = A_herm
-        b_q = b_herm
-    else:
-        print(f"Padding dimension from {herm_dim} to {padded_dim}")
-        A_q = np.identity(padded_dim, dtype=A_herm.dtype)
-        b_q = np.zeros(padded_dim, dtype=b_herm.dtype)
+def _check_mode(mode: str, checkpoint) -> bool:
+    if mode not in ("production", "debug"):
+        raise ValueError(f"Unknown mode {mode!r}. Use 'production' or 'debug'.")
+    debug = mode == "debug"
+    if checkpoint is not None and not debug:
+        raise ValueError("A checkpoint policy requires mode='debug'.")
+    return debug
 
-        A_q[:herm_dim, :herm_dim] = A_herm
-        b_q[:herm_dim] = b_herm
 
-    # Step 3: Normalize the matrix A_q and vector b_q
-    b_q /= np.linalg.norm(b_q)
-    A_q /= np.linalg.norm(A_q)
+class PreparedSystem:
+    """The matrix-dependent part of a QDA solve, reusable across right-hand sides.
 
-    # Step 4: Create the recovery function
-    def recover_x(x_q: np.ndarray) -> np.ndarray:
-        if x_q.size != padded_dim:
-            print(x_q.size, padded_dim)
-            raise RuntimeError(
-                "Solution vector x_q has incorrect dimension for recovery."
+    Estimating kappa, embedding A with the `classical2quantum` transform,
+    encoding its vector tree and building its QRAM circuit happen once, in the
+    constructor. `solve` then only runs the work that depends on b: the QRAM
+    for b, state preparation, the walk sequence and the readout.
+
+    Args:
+        A (np.ndarray | sps.sparray): The matrix A in the linear system Ax=b. A `scipy.sparse` matrix is never densified.
+        kappa (Optional[float], optional): The condition number of A. If set to None, it is estimated via `utils.condest(A)`. Defaults to None.
+        p (float, optional): Evolution parameter of the walk sequence. Defaults to 1.3.
+        step_rate (float, optional): Rate used to compute the number of walk steps. Defaults to 0.01.
+        telemetry (Optional[Telemetry], optional): Receives the timings and metrics of the preparation and of every later `solve`. Defaults to None.
+        tree_cache (Optional[TreeCache], optional): On-disk cache for the data tree of A, keyed by the normalized matrix and the encoding parameters. Defaults to None.
+        embedding_cache (Optional[Classical2QuantumCache], optional): In-memory cache of the `classical2quantum` embedding of A. Defaults to None.
+        precision (Optional[Precision | float], optional): Register widths of the encoding and the walk. A float is a target relative error of the solution, and `plan_precision` picks the narrowest widths that meet it for this A and kappa. If set to None, the class attributes below are used. Defaults to None.
+        condest_method (Literal["splu", "svds"], optional): The `method` of `utils.condest` when kappa is estimated. Defaults to "splu".
+        condest_opt (Optional[dict[str, Any]], optional): Further arguments of `utils.condest`, e.g. `{"svds_opt": {"tol": 1e-3}}`. Defaults to None.
+    """
+
+    # The widths used without `precision` (`precision.DEFAULT_PRECISION`).
+    data_size = 50
+    rational_size = 51
+    exponent = 15
+
+    def __init__(
+        self,
+        A: np.ndarray | sps.sparray,
+        kappa: Optional[float] = None,
+        p: float = 1.3,
+        step_rate: float = 0.01,
+        telemetry: Optional[Telemetry] = None,
+        tree_cache: Optional[TreeCache] = None,
+        embedding_cache: Optional["Classical2QuantumCache"] = None,
+        precision: Optional[Precision | float] = None,
+        condest_method: Literal["splu", "svds"] = "splu",
+        condest_opt: Optional[dict[str, Any]] = None,
+    ):
+        if telemetry is None:
+            telemetry = Telemetry()
+        self.telemetry = telemetry
+
+        A_c = A
+        A = _as_matrix(A)
+        if A.ndim != 2 or A.shape[0] != A.shape[1]:
+            raise ValueError("Input matrix A_c must be square.")
+
+        if kappa is None:
+            with telemetry.stage("condest"):
+                kappa = utils.condest(A, method=condest_method, **(condest_opt or {}))
+        telemetry.record("kappa", kappa)
+        logger.info("kappa = %s", kappa)
+
+        steps = compute_step_rate(step_rate, kappa)
+        telemetry.record("steps", steps)
+        logger.info("steps = %d", steps)
+
+        self.kappa = kappa
+        self.p = p
+        self.steps = steps
+
+        with telemetry.stage("encoding"):
+            if embedding_cache is None:
+                A_q, hermitian_transform_done, herm_dim, padded_dim = (
+                    _hermitize_and_pad(A)
+                )
+                recover_x = EmbeddingLayout(
+                    A.shape[0], herm_dim, padded_dim, hermitian_transform_done
+                )
+            else:
+                hits = embedding_cache.stats()["hits"]
+                embedding = embedding_cache.embed_matrix(A_c)
+                telemetry.record(
+                    "embedding_cache_hit", embedding_cache.stats()["hits"] > hits
+                )
+                A_q = embedding.A_q
+                padded_dim = embedding.padded_dim
+                recover_x = embedding.recover_x
+        self.original_dim = A.shape[0]
+        self.padded_dim = padded_dim
+        self.recover_x = recover_x
+        self.matrix = A_q
+        telemetry.record("original_dim", self.original_dim)
+        telemetry.record("padded_dim", padded_dim)
+
+        self.tol: Optional[float] = None
+        if precision is not None and not isinstance(precision, Precision):
+            self.tol = float(precision)
+            with telemetry.stage("precision"):
+                precision = plan_precision(A_q, kappa, self.tol)
+                values = A_q.data if utils.issparse(A_q) else A_q
+                telemetry.record(
+                    "encoding_error", encoding_error(values, precision.exponent)
+                )
+        if precision is not None:
+            self.exponent = precision.exponent
+            self.data_size = precision.data_size
+            self.rational_size = precision.rational_size
+        telemetry.record(
+            "precision",
+            Precision(self.exponent, self.data_size, self.rational_size),
+        )
+        logger.info(
+            "exponent = %d, data_size = %d, rational_size = %d",
+            self.exponent,
+            self.data_size,
+            self.rational_size,
+        )
+
+        self.log_column_size = int(np.ceil(np.log2(padded_dim)))
+        if padded_dim != 2**self.log_column_size:
+            raise ValueError(
+                "Matrix dimension is not a power of 2. Call 'classical2quantum' first."
             )
 
-        x_herm = x_q[:herm_dim].copy()
+        def build_tree_A(out=None):
+            return _make_matrix_tree(A_q, self.exponent, self.data_size, out)
 
-        if hermitian_transform_done:
-            # Original x was in the second half of the [0, x]^T solution vector
-            # for the system [0 A; A_dag 0] [y; z] = [b; 0]
-            # where solution is y=0, z=x. So x_herm = [0; x]
-            # and herm_dime == 2 * original_dim in this case.
-            if x_herm.size != 2 * original_dim:
-                raise RuntimeError(
-                    "Mismatch in dimensions during hermitian recovery logic."
+        with telemetry.stage("tree_build"):
+            if tree_cache is None:
+                data_tree_A = build_tree_A()
+            else:
+                hits = tree_cache.hits
+                # On a miss the tree is built straight into the cache file.
+                data_tree_A = tree_cache.get_or_build(
+                    A_q,
+                    self.exponent,
+                    self.data_size,
+                    build_tree_A,
+                    size=2 * padded_dim * padded_dim,
                 )
-            return x_herm[original_dim:]
+                telemetry.record("tree_cache_hit", tree_cache.hits > hits)
+        with telemetry.stage("qram"):
+            self.qram_A = sq.QRAMCircuit_qutrit(
+                self.log_column_size * 2 + 1, self.data_size, data_tree_A
+            )
+        logger.info("QRAMCircuit ok")
+
+    def embed(self, b: np.ndarray) -> NDArray[np.float64]:
+        """Apply the `classical2quantum` transform to a right-hand side."""
+        b = np.array(b, dtype=np.float64)
+        if b.size != self.original_dim:
+            raise ValueError("Dimensions of A_c and b_c are incompatible.")
+        return _embed_vector(b.ravel(), self.padded_dim)
+
+    def reference(self, b_q: NDArray[np.float64]) -> NDArray[np.float64]:
+        """Normalized classical solution of A_q x = b_q, in the embedded space."""
+        if utils.issparse(self.matrix):
+            import scipy.sparse as sps
+            import scipy.sparse.linalg as sla
+
+            x = sla.spsolve(sps.csc_array(self.matrix), b_q)
         else:
-            # No hermitian transform was done, x_herm is directly the solution
-            # (potentially padded, but x_herm[:original_dim] already handled that)
-            # and herm_dim == original_dim in this case.
-            if x_herm.size != original_dim:
-                raise RuntimeError(
-                    "Mismatch in dimensions during non-hermitian recovery logic."
-                )
-            return x_herm
+            x = np.linalg.solve(self.matrix, b_q)
+        return x / np.linalg.norm(x)
+
+    def solve(
+        self,
+        b: np.ndarray,
+        mode: Literal["production", "debug"] = "production",
+        checkpoint: Optional[CheckpointPolicy | int] = None,
+        adaptive: Optional[AdaptiveSteps] = None,
+        snapshots: Optional[StateSnapshots] = None,
+        resume: Optional[str | os.PathLike] = None,
+        pruning: Optional[PruningPolicy] = None,
+    ) -> np.ndarray:
+        """Solve Ax=b for one right-hand side; see `solve` for the arguments.
+
+        Registers are added to the global pysparq System, so call
+        `sq.System.clear()` between solves (as `solve_many` does). With
+        `adaptive`, the System is cleared before every run of the search,
+        and with `resume` before the saved state is restored.
+        """
+        debug = _check_mode(mode, checkpoint)
+        if adaptive is not None and (snapshots is not None or resume is not None):
+            raise ValueError("snapshots and resume cannot be combined with adaptive.")
+        telemetry = self.telemetry
+        data_size = self.data_size
+        log_column_size = self.log_column_size
+
+        with telemetry.stage("encoding"):
+            b = self.embed(b)
+            if self.tol is not None:
+                error = encoding_error(b, self.exponent)
+                telemetry.record("b_encoding_error", error)
+                if error > self.tol:
+                    logger.warning(
+                        "b is encoded with relative error %s, above the planned "
+                        "tolerance %s; pass a Precision with a larger exponent.",
+                        error,
+                        self.tol,
+                    )
+
+        with telemetry.stage("tree_build"):
+            data_tree_b = make_encoded_tree(b, self.exponent, data_size)
+
+        with telemetry.stage("qram"):
+            qram_b = sq.QRAMCircuit_qutrit(log_column_size + 1, data_size, data_tree_b)
+
+        if adaptive is None:
+            sol, prob0 = self._evolve(
+                b, qram_b, self.steps, debug, checkpoint, snapshots, resume, pruning
+            )
+        else:
+            sol, prob0 = self._evolve_adaptive(
+                b, qram_b, debug, checkpoint, adaptive, pruning
+            )
+
+        telemetry.record("p_success", prob0)
+        record_system_size(telemetry)
+        logger.info("Success probability after walk sequence: %s", prob0)
+
+        # sol is a strided view of the complex projection buffer; copy the
+        # recovered entries so the result is contiguous and owns its memory.
+        return np.ascontiguousarray(self.recover_x(sol))
+
+    def _prepare_state(
+        self, qram_b: sq.QRAMCircuit_qutrit
+    ) -> tuple[sq.SparseState, dict[str, int]]:
+        """Add the walk registers and load b into main_reg."""
+        log_column_size = self.log_column_size
+        state = sq.SparseState()
+
+        main_reg = sq.AddRegister(
+            "main_reg", sq.StateStorageType.UnsignedInteger, log_column_size
+        )(state)
+        anc_UA = sq.AddRegister(
+            "anc_UA", sq.StateStorageType.UnsignedInteger, log_column_size
+        )(state)
+        anc_4 = sq.AddRegister("anc_4", sq.StateStorageType.Boolean, 1)(state)
+        anc_3 = sq.AddRegister("anc_3", sq.StateStorageType.Boolean, 1)(state)
+        anc_2 = sq.AddRegister("anc_2", sq.StateStorageType.Boolean, 1)(state)
+        anc_1 = sq.AddRegister("anc_1", sq.StateStorageType.Boolean, 1)(state)
+
+        sq.State_Prep_via_QRAM(
+            qram_b, "main_reg", self.data_size, self.rational_size
+        )(state)
+
+        registers = dict(zip(REGISTERS, (main_reg, anc_UA, anc_4, anc_3, anc_2, anc_1)))
+        return state, registers
+
+    def _snapshot_meta(self, b: NDArray[np.float64], steps: int) -> dict[str, Any]:
+        """What a snapshot must match to be resumed by this system."""
+        return {
+            "system": utils.array_digest(b, utils.array_digest(self.matrix)),
+            "steps": steps,
+            "kappa": float(self.kappa),
+            "p": float(self.p),
+            "exponent": self.exponent,
+            "data_size": self.data_size,
+            "rational_size": self.rational_size,
+        }
+
+    def _evolve(
+        self,
+        b: NDArray[np.float64],
+        qram_b: sq.QRAMCircuit_qutrit,
+        steps: int,
+        debug: bool,
+        checkpoint: Optional[CheckpointPolicy | int],
+        snapshots: Optional[StateSnapshots] = None,
+        resume: Optional[str | os.PathLike] = None,
+        pruning: Optional[PruningPolicy] = None,
+    ) -> tuple[NDArray[np.float64], float]:
+        """Prepare the state of b, run `steps` walk steps and project.
+
+        With `resume`, the state is restored from a snapshot of the same
+        system instead, and the walk continues after the saved step. With
+        `pruning`, the discarded probability is recorded in the telemetry.
+
+        Returns:
+            The projected solution in the embedded space, and the success probability.
+        """
+        telemetry = self.telemetry
+        data_size = self.data_size
+        rational_size = self.rational_size
+
+        start = 0
+        on_step = None
+        if snapshots is not None or resume is not None:
+            meta = self._snapshot_meta(b, steps)
+        if snapshots is not None:
+
+            def on_step(state, n):
+                snapshots(state, n, steps, meta)
+
+        with telemetry.stage("state_prep"):
+            if resume is None:
+                state, registers = self._prepare_state(qram_b)
+            else:
+                snapshot = load_snapshot(resume)
+                if snapshot.meta != meta:
+                    raise ValueError(
+                        f"Snapshot {os.fspath(resume)!r} belongs to a different "
+                        "system or schedule."
+                    )
+                sq.System.clear()
+                state = restore_state(snapshot)
+                registers = {name: sq.System.get_id(name) for name in REGISTERS}
+                start = snapshot.step + 1
+                telemetry.record("resumed_step", snapshot.step)
+                logger.info("Resuming after step %d / %d", snapshot.step, steps)
+        anc_UA = registers["anc_UA"]
+        anc_1 = registers["anc_1"]
+        anc_2 = registers["anc_2"]
+        anc_3 = registers["anc_3"]
+        anc_4 = registers["anc_4"]
+
+        if debug:
+            walk_sequence = WalkSequence_via_QRAM_Debug(
+                self.qram_A,
+                qram_b,
+                # The debugger solves the interpolated systems densely.
+                self.matrix.toarray() if utils.issparse(self.matrix) else self.matrix,
+                b,
+                "main_reg",
+                "anc_UA",
+                "anc_1",
+                "anc_2",
+                "anc_3",
+                "anc_4",
+                steps,
+                self.kappa,
+                self.p,
+                data_size,
+                rational_size,
+                2 if checkpoint is None else checkpoint,
+                telemetry,
+                pruning,
+            )
+        else:
+            walk_sequence = WalkSequence_via_QRAM(
+                self.qram_A,
+                qram_b,
+                "main_reg",
+                "anc_UA",
+                "anc_1",
+                "anc_2",
+                "anc_3",
+                "anc_4",
+                steps,
+                self.kappa,
+                self.p,
+                data_size,
+                rational_size,
+                pruning,
+            )
+        if pruning is not None:
+            pruning.start()
+        with telemetry.stage("walk"):
+            walk_sequence(state, start, on_step)
+        if debug:
+            telemetry.record("checkpoints", walk_sequence.records)
+        if pruning is not None:
+            telemetry.record("pruned_mass", pruning.pruned_mass)
+            telemetry.record("pruned_states", pruning.pruned_states)
+            logger.info(
+                "Pruned %d basis states, discarding probability %s",
+                pruning.pruned_states,
+                pruning.pruned_mass,
+            )
+
+        with telemetry.stage("projection"):
+            # Calculate the total probability of the subspace where anc_UA, anc_2, anc_3 are 0
+            prob_inv0 = sq.PartialTraceSelect({anc_UA: 0, anc_2: 0, anc_3: 0})(state)
+            prob0 = (1.0 / prob_inv0) ** 2
+
+            # A view of a buffer owned by this solve; `solve` copies the
+            # recovered part out of it.
+            sol, _ = Projection(
+                {anc_UA: 0, anc_1: 1, anc_2: 0, anc_3: 0, anc_4: 0}
+            ).real(state)
+
+        return sol, prob0
+
+    def _evolve_adaptive(
+        self,
+        b: NDArray[np.float64],
+        qram_b: sq.QRAMCircuit_qutrit,
+        debug: bool,
+        checkpoint: Optional[CheckpointPolicy | int],
+        adaptive: AdaptiveSteps,
+        pruning: Optional[PruningPolicy] = None,
+    ) -> tuple[NDArray[np.float64], float]:
+        """`_evolve` with the fewest steps of `adaptive.trial_steps` that meet its targets."""
+        telemetry = self.telemetry
+        reference = self.reference(b) if adaptive.fidelity is not None else None
+
+        trials = []
+        for steps in adaptive.trial_steps(self.steps):
+            sq.System.clear()
+            start = time.perf_counter()
+            sol, prob0 = self._evolve(
+                b, qram_b, steps, debug, checkpoint, pruning=pruning
+            )
+            fidelity = None
+            if reference is not None:
+                norm = np.linalg.norm(sol)
+                fidelity = get_fidelity(reference, sol / norm) if norm > 0 else 0.0
+            trials.append(
+                AdaptiveTrial(steps, fidelity, prob0, time.perf_counter() - start)
+            )
+            logger.info(
+                "adaptive steps: %d / %d, fidelity: %s, p_success: %s",
+                steps,
+                self.steps,
+                fidelity,
+                prob0,
+            )
+            if adaptive.reached(fidelity, prob0):
+                adaptive.found(steps)
+                break
+
+        telemetry.record("adaptive_trials", trials)
+        walk_steps_total = sum(trial.steps for trial in trials)
+        telemetry.record("adaptive_steps", steps)
+        # Net of the runs that missed the target; negative if the search lost.
+        telemetry.record("steps_saved", self.steps - walk_steps_total)
+        telemetry.record("walk_steps_total", walk_steps_total)
+        return sol, prob0
+
+    def solve_many(
+        self,
+        B: np.ndarray,
+        mode: Literal["production", "debug"] = "production",
+        checkpoint: Optional[CheckpointPolicy | int] = None,
+        adaptive: Optional[AdaptiveSteps] = None,
+        pruning: Optional[PruningPolicy] = None,
+    ) -> NDArray[np.float64]:
+        """Solve AX=B column by column; see `solve_many` for the arguments."""
+        debug = _check_mode(mode, checkpoint)
+        B = np.asarray(B, dtype=np.float64)
+        if B.ndim != 2 or B.shape[0] != self.original_dim:
+            raise ValueError(
+                f"B must have shape ({self.original_dim}, k), got {B.shape}."
+            )
+
+        per_column = ["p_success"]
+        if debug:
+            per_column.append("checkpoints")
+        if adaptive is not None:
+            per_column += ["adaptive_trials", "adaptive_steps", "steps_saved"]
+            per_column.append("walk_steps_total")
+        if pruning is not None:
+            per_column += ["pruned_mass", "pruned_states"]
+
+        X = np.empty(B.shape, dtype=np.float64)
+        metrics: dict[str, list] = {name: [] for name in per_column}
+        for j in range(B.shape[1]):
+            sq.System.clear()
+            X[:, j] = self.solve(B[:, j], mode, checkpoint, adaptive, pruning=pruning)
+            for name in per_column:
+                metrics[name].append(self.telemetry.metrics[name])
+
+        for name in per_column:
+            self.telemetry.record(name, metrics[name])
+        return X
+
 
-    return np.array(A_q, dtype=np.float64), np.array(b_q, dtype=np.float64), recover_x
+def prepare(
+    A: np.ndarray | sps.sparray,
+    kappa: Optional[float] = None,
+    p: float = 1.3,
+    step_rate: float = 0.01,
+    telemetry: Optional[Telemetry] = None,
+    tree_cache: Optional[TreeCache] = None,
+    embedding_cache: Optional["Classical2QuantumCache"] = None,
+    precision: Optional[Precision | float] = None,
+    condest_method: Literal["splu", "svds"] = "splu",
+    condest_opt: Optional[dict[str, Any]] = None,
+) -> PreparedSystem:
+    """Run the matrix-dependent part of `solve` once and return it for reuse.
+
+    Returns:
+        PreparedSystem: Call its `solve(b)` or `solve_many(B)` for each right-hand side.
+    """
+    return PreparedSystem(
+        A,
+        kappa,
+        p,
+        step_rate,
+        telemetry,
+        tree_cache,
+        embedding_cache,
+        precision,
+        condest_method,
+        condest_opt,
+    )
+
+
+def solve_many(
+    A: np.ndarray | sps.sparray,
+    B: np.ndarray,
+    kappa: Optional[float] = None,
+    p: float = 1.3,
+    step_rate: float = 0.01,
+    mode: Literal["production", "debug"] = "production",
+    checkpoint: Optional[CheckpointPolicy | int] = None,
+    telemetry: Optional[Telemetry] = None,
+    tree_cache: Optional[TreeCache] = None,
+    embedding_cache: Optional["Classical2QuantumCache"] = None,
+    adaptive: Optional[AdaptiveSteps] = None,
+    pruning: Optional[PruningPolicy] = None,
+    precision: Optional[Precision | float] = None,
+    condest_method: Literal["splu", "svds"] = "splu",
+    condest_opt: Optional[dict[str, Any]] = None,
+) -> NDArray[np.float64]:
+    """Solves AX=B for many right-hand sides sharing the same matrix A.
+
+    The condition number estimate, the `classical2quantum` embedding of A, its vector tree and its QRAM circuit are computed once (see `prepare`); each column of B then only goes through state preparation, the walk sequence and the readout. The global pysparq System is cleared before each column.
+
+    Args:
+        A (np.ndarray | sps.sparray): The matrix A.
+        B (np.ndarray): The right-hand sides, one per column, with shape (n, k).
+        kappa, p, step_rate, mode, checkpoint, tree_cache, embedding_cache, condest_method, condest_opt: As in `solve`.
+        adaptive (Optional[AdaptiveSteps], optional): As in `solve`. Later columns start the search from the step count that met the targets for an earlier one. Defaults to None.
+        pruning (Optional[PruningPolicy], optional): As in `solve`. Defaults to None.
+        precision (Optional[Precision | float], optional): As in `solve`; the widths are planned once, from A. Defaults to None.
+        telemetry (Optional[Telemetry], optional): As in `solve`; "p_success" (and "checkpoints" in debug mode, the adaptive metrics with `adaptive`, and the pruning metrics with `pruning`) is recorded as a list with one entry per column. Defaults to None.
+
+    Returns:
+        np.ndarray: The solutions, one per column, with shape (n, k). Each column is normalized like the result of `solve`.
+    """
+    _check_mode(mode, checkpoint)
+    prepared = prepare(
+        A,
+        kappa,
+        p,
+        step_rate,
+        telemetry,
+        tree_cache,
+        embedding_cache,
+        precision,
+        condest_method,
+        condest_opt,
+    )
+    return prepared.solve_many(B, mode, checkpoint, adaptive, pruning)
 
 
 def solve(
-    A: np.ndarray,
+    A: np.ndarray | sps.sparray,
     b: np.ndarray,
     kappa: Optional[float] = None,
     p: float = 1.3,
     step_rate: float = 0.01,
+    mode: Literal["production", "debug"] = "production",
+    checkpoint: Optional[CheckpointPolicy | int] = None,
+    telemetry: Optional[Telemetry] = None,
+    tree_cache: Optional[TreeCache] = None,
+    embedding_cache: Optional["Classical2QuantumCache"] = None,
+    adaptive: Optional[AdaptiveSteps] = None,
+    snapshots: Optional[StateSnapshots] = None,
+    resume: Optional[str | os.PathLike] = None,
+    pruning: Optional[PruningPolicy] = None,
+    precision: Optional[Precision | float] = None,
+    backend: str = "python",
+    condest_method: Literal["splu", "svds"] = "splu",
+    condest_opt: Optional[dict[str, Any]] = None,
 ) -> np.ndarray:
     """Solves the system of linear equations Ax=b using the Quantum Discrete Adiabatic (QDA) algorithm.
 
     This function serves as a high-level wrapper for the entire algorithmic workflow. It encapsulates the process from converting classical data into quantum states, constructing the necessary QRAM circuits, executing the quantum walk, to finally measuring the result and recovering the classical solution vector.
 
     Args:
-        A (np.ndarray): The matrix A in the linear system Ax=b.
+        A (np.ndarray | sps.sparray): The matrix A in the linear system Ax=b. A `scipy.sparse` matrix is hermitized, padded and encoded from its nonzeros, without densifying it (except for the reference solutions of mode="debug").
         b (np.ndarray): The vector b in the linear system Ax=b.
         kappa (Optional[float], optional): The condition number of matrix A. This value is critical for determining the number of steps in the adiabatic evolution. If set to None, the function will attempt to estimate it automatically via `utils.condest(A)`. Defaults to None.
         p (float, optional): A key evolution parameter within the Quantum Walk sequence, which influences the construction of the Hamiltonian. Defaults to 1.3.
         step_rate (float, optional): A rate used to compute the total number of adiabatic evolution steps. A smaller value results in more steps, theoretically yielding higher accuracy at the cost of increased computation. Defaults to 0.01.
+        mode (Literal["production", "debug"], optional): "production" runs the walk sequence without any diagnostics. "debug" runs `WalkSequence_via_QRAM_Debug`, which projects the state every second step, compares it with the classically computed ideal eigenstate and logs the fidelity, success probability and system size. Defaults to "production".
+        checkpoint (Optional[CheckpointPolicy | int], optional): When to run the fidelity checks in debug mode, e.g. `EveryK(10)`, `LogSpaced(20)`, `LastN(5)` or `TimeBudget(0.1)`. An integer k is shorthand for `EveryK(k)`. If set to None, every second step is checked. Defaults to None.
+        telemetry (Optional[Telemetry], optional): Collects the wall time of each stage ("condest", "encoding", "tree_build", "qram", "state_prep", "walk", "checkpoint", "projection"; the "walk" time includes the debug "checkpoint" time) and metrics such as kappa, steps, dimensions, success probability, peak system size and, in debug mode, the checkpoint records. Pass `Telemetry(profile=True)` to also profile each stage. Defaults to None.
+        tree_cache (Optional[TreeCache], optional): On-disk cache of encoded data trees. Repeated solves with the same matrix load the tree of A memory-mapped instead of rebuilding it. Defaults to None.
+        embedding_cache (Optional[Classical2QuantumCache], optional): In-memory LRU cache of the `classical2quantum` embedding of A, so repeated solves against the same matrix skip hermitization, padding and normalization. Defaults to None.
+        adaptive (Optional[AdaptiveSteps], optional): Search for the smallest step count, up to the one given by `step_rate`, whose final state meets the fidelity and/or success-probability targets of `AdaptiveSteps`, instead of always running the fixed count. The runs are recorded in `telemetry` ("adaptive_trials", "adaptive_steps", "walk_steps_total" over all runs, and "steps_saved", the fixed count minus "walk_steps_total", which is negative when the search costs more than the fixed walk). If the targets are never met, the search costs up to about twice the fixed walk. Defaults to None.
+        snapshots (Optional[StateSnapshots], optional): Periodically save the walk state (basis states, step index and register layout) to a memory-mappable file, e.g. `StateSnapshots("run.qsnap", every=1000)`. Defaults to None.
+        resume (Optional[str | os.PathLike], optional): Path of a snapshot written by an interrupted solve of the same system with the same parameters. The saved state is restored and the walk continues after the saved step. Defaults to None.
+        pruning (Optional[PruningPolicy], optional): Drop low-probability basis states of the walk state on a fixed cadence, below a probability threshold or outside the top k, and renormalize, e.g. `PruningPolicy(threshold=1e-12, every=10)`. Bounds the state size at the cost of accuracy; the discarded probability and the number of dropped basis states are recorded in `telemetry` ("pruned_mass", "pruned_states"). Defaults to None.
+        precision (Optional[Precision | float], optional): Register widths of the QRAM encoding and the walk arithmetic. A float is a target relative error of the solution: the narrowest exponent, data_size and rational_size meeting it are planned from the entries of A and its kappa (see `qda.plan_precision`); the planned `Precision` and the encoding errors of A and b are recorded in `telemetry` ("precision", "encoding_error", "b_encoding_error"). A `Precision` sets the widths explicitly. If set to None, exponent 15, data_size 50 and rational_size 51 are used. Defaults to None.
+        backend (str, optional): "python" runs the pipeline of this package, "native" runs pysparq's compiled `sq.qda_solve` (dense A and none of the options above), and "auto" picks the fastest backend that supports the requested options according to the measured `qda.timings` (see `qda.calibrate`), falling back to "python". Further backends can be added with `qda.register_backend`. The backend used is recorded in `telemetry` ("backend"). Defaults to "python".
+        condest_method (Literal["splu", "svds"], optional): How kappa is estimated when it is None: "splu" (the 1-norm condition number from an LU factorization) or "svds" (the 2-norm condition number from the extreme singular values, without the LU fill-in of large sparse matrices); see `utils.condest`. Defaults to "splu".
+        condest_opt (Optional[dict[str, Any]], optional): Further arguments of `utils.condest`, e.g. `{"svds_opt": {"tol": 1e-3}}` or `{"splu_opt": {"permc_spec": "MMD_AT_PLUS_A"}}`. Defaults to None.
 
     Raises:
+        ValueError: Raised if `mode` is unknown, or if `checkpoint` is given outside debug mode.
+        ValueError: Raised if `backend` is unknown or does not support the requested options.
+        ValueError: Raised if the `resume` snapshot belongs to a different system or schedule, or if `adaptive` is combined with `snapshots` or `resume`.
         ValueError: Raised if the dimension of matrix A, after being processed by the internal `classical2quantum` function, is not a power of 2. This is a common requirement for quantum algorithms operating on qubit-based registers.
 
     Returns:
         np.ndarray: The calculated solution vector x for the linear system.
     """
-    A = np.array(A, dtype=np.float64)
-    b = np.array(b, dtype=np.float64)
-
-    if kappa is None:
-        kappa = utils.condest(A)
-    print(f"{kappa = }")
-
-    steps = compute_step_rate(step_rate, kappa)
-    print(f"{steps = }")
-
-    A, b, recover_x = classical2quantum(A, b)
-
-    data_size = 50
-    rational_size = 51
-
-    exponent = 15
-    log_column_size = int(np.ceil(np.log2(A.shape[0])))
-    if A.shape[0] != 2**log_column_size:
-        raise ValueError(
-            "Matrix dimension is not a power of 2. Call 'classical2quantum' first."
-        )
-
-    conv_A = scale_and_convert_vector(A.flatten(order="F"), exponent, data_size)
-    conv_b = scale_and_convert_vector(b, exponent, data_size)
-    data_tree_A = make_vector_tree(conv_A, data_size)
-    data_tree_b = make_vector_tree(conv_b, data_size)
-    addr_size = log_column_size * 2 + 1
-
-    qram_A = sq.QRAMCircuit_qutrit(addr_size, data_size, data_tree_A)
-    qram_b = sq.QRAMCircuit_qutrit(log_column_size + 1, data_size, data_tree_b)
-    print("QRAMCircuit ok")
-
-    state = sq.SparseState()
-
-    main_reg = sq.AddRegister(
-        "main_reg", sq.StateStorageType.UnsignedInteger, log_column_size
-    )(state)
-    anc_UA = sq.AddRegister(
-        "anc_UA", sq.StateStorageType.UnsignedInteger, log_column_size
-    )(state)
-    anc_4 = sq.AddRegister("anc_4", sq.StateStorageType.Boolean, 1)(state)
-    anc_3 = sq.AddRegister("anc_3", sq.StateStorageType.Boolean, 1)(state)
-    anc_2 = sq.AddRegister("anc_2", sq.StateStorageType.Boolean, 1)(state)
-    anc_1 = sq.AddRegister("anc_1", sq.StateStorageType.Boolean, 1)(state)
-
-    sq.State_Prep_via_QRAM(qram_b, "main_reg", data_size, rational_size)(state)
-    WalkSequence_via_QRAM_Debug(
-        qram_A,
-        qram_b,
+    _check_mode(mode, checkpoint)
+    return dispatch(
+        backend,
         A,
         b,
-        "main_reg",
-        "anc_UA",
-        "anc_1",
-        "anc_2",
-        "anc_3",
-        "anc_4",
-        steps,
         kappa,
         p,
-        data_size,
-        rational_size,
-    )(state)
+        step_rate,
+        telemetry,
+        mode=mode,
+        checkpoint=checkpoint,
+        tree_cache=tree_cache,
+        embedding_cache=embedding_cache,
+        adaptive=adaptive,
+        snapshots=snapshots,
+        resume=resume,
+        pruning=pruning,
+        precision=precision,
+        condest_method=condest_method,
+        condest_opt=condest_opt,
+    )
+
+
+def solve_file(
+    A_path: str | os.PathLike,
+    b_path: Optional[str | os.PathLike] = None,
+    mmap: bool = True,
+    **options,
+) -> np.ndarray:
+    """Solve a linear system stored in files with `solve`.
 
-    # Calculate the total probability of the subspace where anc_UA, anc_2, anc_3 are 0
-    prob_inv0 = sq.PartialTraceSelect({anc_UA: 0, anc_2: 0, anc_3: 0})(state)
-    prob0 = (1.0 / prob_inv0) ** 2
+    A dense A is memory-mapped where the format allows it (see `qalgo.io`), so
+    it is read in blocks while it is hermitized and encoded rather than
+    loaded up front.
 
-    print("Success probability after walk sequence:", prob0)
+    Args:
+        A_path (str | os.PathLike): File of A: `.npy`, `.npz` or Matrix Market. Without `b_path` an `.npz` archive holding both "A" and "b".
+        b_path (Optional[str | os.PathLike], optional): File of b. Defaults to None.
+        mmap (bool, optional): Memory-map a dense A. Defaults to True.
+        **options: Any arguments of `solve`, e.g. `kappa` (estimating it needs A in memory).
 
-    sol, _ = sq.PartialTraceSelect(
-        {anc_UA: 0, anc_1: 1, anc_2: 0, anc_3: 0, anc_4: 0}
-    ).get_projected_full(state)
-    sol = np.array(sol, np.complex128)
-    sol = recover_x(sol.real)
+    Returns:
+        np.ndarray: The solution vector x, as from `solve`.
+    """
+    from ..io import load_system
 
-    return sol
+    A, b = load_system(A_path, b_path, mmap)
+    return solve(A, b, **options)
@@ -0,0 +1,189 @@
+"""Save and resume the pysparq state of a running walk sequence.
+
+A snapshot file holds the walk step, the layout of the active registers, some
+solver parameters, and the basis states of the `sq.SparseState` as one
+structured array: a uint64 column per register plus the complex amplitude.
+The file is a short JSON header followed by the raw array at an aligned
+offset, so `load_snapshot` memory-maps the basis states instead of reading
+them into Python objects.
+
+    snapshots = StateSnapshots("run.qsnap", every=1000)
+    x = qda.solve(A, b, snapshots=snapshots)  # interrupted after step 23999
+    x = qda.solve(A, b, resume="run.qsnap")  # continues with step 24000
+
+pysparq cannot set amplitudes directly, so `restore_state` prepares a single
+register spanning all saved registers in the saved state (with
+`sq.Rot_GeneralStatePrep`) and splits it back into the original registers.
+That dense preparation is exponential in the total register width, which is
+why restoring is limited to `max_qubits`.
+"""
+
+import json
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import numpy as np
+import pysparq as sq
+
+MAGIC = b"QALGOSNAP1\n"
+ALIGN = 64
+
+
+@dataclass(frozen=True)
+class StateSnapshot:
+    step: int  # last walk step applied to the saved state
+    registers: list[tuple[str, str, int]]  # (name, storage type, size), in System order
+    basis: np.ndarray  # structured: one uint64 field per register and "amplitude"
+    meta: dict[str, Any] = field(default_factory=dict)
+
+
+def active_registers() -> list[tuple[str, str, int]]:
+    """Name, storage type and size of the active registers of the System."""
+    return [
+        (name, storage_type.name, size)
+        for name, storage_type, size, activated in sq.System.name_register_map
+        if activated
+    ]
+
+
+def _basis_dtype(registers: list[tuple[str, str, int]]) -> np.dtype:
+    return np.dtype(
+        [(name, "<u8") for name, _, _ in registers] + [("amplitude", "<c16")]
+    )
+
+
+def save_snapshot(
+    path: str | os.PathLike,
+    state: sq.SparseState,
+    step: int,
+    meta: Optional[dict[str, Any]] = None,
+) -> None:
+    """Atomically write the state after walk step `step` to `path`."""
+    registers = active_registers()
+    ids = [sq.System.get_id(name) for name, _, _ in registers]
+    basis_states = state.basis_states
+    basis = np.empty(len(basis_states), dtype=_basis_dtype(registers))
+    for row, system in zip(basis, basis_states):
+        for (name, _, _), reg in zip(registers, ids):
+            row[name] = system.get_as_uint64(reg)
+        row["amplitude"] = system.amplitude
+
+    header = json.dumps(
+        {
+            "step": step,
+            "registers": registers,
+            "count": len(basis),
+            "meta": meta or {},
+        }
+    ).encode()
+    offset = len(MAGIC) + 8 + len(header)
+    padding = -offset % ALIGN
+
+    path = os.fspath(path)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            f.write(b"\0" * padding)
+            f.write(basis.tobytes())
+        os.replace(tmp, path)  # never leave a half-written snapshot behind
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load_snapshot(path: str | os.PathLike) -> StateSnapshot:
+    """Read a snapshot; its basis states are memory-mapped read-only."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{os.fspath(path)!r} is not a qalgo state snapshot.")
+        length = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(length))
+    offset = len(MAGIC) + 8 + length
+    offset += -offset % ALIGN
+
+    registers = [tuple(register) for register in header["registers"]]
+    dtype = _basis_dtype(registers)
+    if header["count"]:
+        basis = np.memmap(
+            path, dtype=dtype, mode="r", offset=offset, shape=(header["count"],)
+        )
+    else:
+        basis = np.empty(0, dtype=dtype)
+    return StateSnapshot(header["step"], registers, basis, header["meta"])
+
+
+def restore_state(snapshot: StateSnapshot, max_qubits: int = 20) -> sq.SparseState:
+    """Rebuild the saved state and its registers in the (cleared) System.
+
+    Raises:
+        ValueError: If the saved registers span more than `max_qubits` qubits.
+    """
+    registers = snapshot.registers
+    sizes = [size for _, _, size in registers]
+    total = sum(sizes)
+    if total > max_qubits:
+        raise ValueError(
+            f"Restoring needs a dense vector over {total} qubits, "
+            f"more than max_qubits={max_qubits}."
+        )
+
+    # The first register holds the most significant bits.
+    index = np.zeros(len(snapshot.basis), dtype=np.uint64)
+    for (name, _, _), size in zip(registers, sizes):
+        index = (index << np.uint64(size)) | snapshot.basis[name]
+    vector = np.zeros(2**total, dtype=np.complex128)
+    vector[index.astype(np.intp)] = snapshot.basis["amplitude"]
+
+    state = sq.SparseState()
+    first = registers[0][0]
+    sq.AddRegister(first, sq.StateStorageType.UnsignedInteger, total)(state)
+    sq.Rot_GeneralStatePrep(first, list(vector))(state)
+    # Add the other registers up front, so the System order is the saved one.
+    for name, storage_type, size in registers[1:]:
+        sq.AddRegister(name, sq.StateStorageType.__members__[storage_type], size)(
+            state
+        )
+
+    # SplitRegister moves the low bits into a new UnsignedInteger register;
+    # swap them into the (zero) register of the saved type, last one first.
+    temporary = "__snapshot_split"
+    for name, _, size in reversed(registers[1:]):
+        sq.SplitRegister(first, temporary, size)(state)
+        sq.Swap_General_General(temporary, name)(state)
+        sq.RemoveRegister(temporary)(state)
+    sq.ClearZero()(state)
+    return state
+
+
+class StateSnapshots:
+    """Save the walk state to `path` after every `every` steps.
+
+    Each snapshot replaces the previous one, so the file always holds the
+    latest consistent state.
+    """
+
+    def __init__(self, path: str | os.PathLike, every: int = 1000):
+        if every < 1:
+            raise ValueError(f"every must be a positive integer, got {every}.")
+        self.path = path
+        self.every = every
+        self.saved = 0
+
+    def __call__(
+        self,
+        state: sq.SparseState,
+        n: int,
+        steps: int,
+        meta: Optional[dict[str, Any]] = None,
+    ) -> bool:
+        """Save after step n if it is due; the final step is never saved."""
+        if (n + 1) % self.every != 0 or n + 1 >= steps:
+            return False
+        save_snapshot(self.path, state, n, meta)
+        self.saved += 1
+        return True
@@ -0,0 +1,107 @@
+"""Instrumentation for the qalgo pipelines.
+
+Progress messages go through the standard `logging` module (loggers named
+after the qalgo modules), so nothing is printed unless logging is configured,
+e.g. `logging.basicConfig(level=logging.INFO)`. Timings and metrics of a run
+are collected in a `Telemetry` object:
+
+    telemetry = Telemetry()
+    x = qda.solve(A, b, telemetry=telemetry)
+    telemetry.timings   # {"condest": 0.01, "encoding": 0.001, ...}
+    telemetry.metrics   # {"kappa": 51.2, "steps": 1180, ...}
+
+`Telemetry(profile=True)` additionally runs every stage under `cProfile`.
+Only one profiler is active at a time: a nested stage (e.g. "checkpoint"
+inside "walk") pauses the profiler of the enclosing stage, so each profile
+holds the work of its own stage, while the timings of enclosing stages
+include their nested stages.
+"""
+
+import cProfile
+import logging
+import pstats
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[str, dict[str, Any]], None]
+
+
+class Telemetry:
+    """Collect per-stage wall times and named metrics of a run.
+
+    Args:
+        profile (bool, optional): Run each stage under `cProfile` and keep the
+            statistics in `profiles`. Defaults to False.
+        callbacks (Iterable[Callable[[str, dict], None]], optional): Called as
+            `callback(event, payload)` for every event: "stage" with
+            `{"name", "seconds"}`, "metric" with `{"name", "value"}`, and any
+            event passed to `emit`. Defaults to ().
+    """
+
+    def __init__(self, profile: bool = False, callbacks: Iterable[Callback] = ()):
+        self.profile = profile
+        self.callbacks = list(callbacks)
+        self.timings: dict[str, float] = {}
+        self.metrics: dict[str, Any] = {}
+        self.profiles: dict[str, pstats.Stats] = {}
+        # Profilers of the open stages, innermost last; only the last is enabled.
+        self._profilers: list[cProfile.Profile] = []
+
+    def _start_profiler(self, name: str) -> cProfile.Profile | None:
+        profiler = cProfile.Profile()
+        if self._profilers:
+            self._profilers[-1].disable()
+        try:
+            profiler.enable()
+        except ValueError:  # another profiling tool is active (Python 3.12+)
+            logger.warning("Not profiling stage %s: another profiler is active.", name)
+            if self._profilers:
+                self._profilers[-1].enable()
+            return None
+        self._profilers.append(profiler)
+        return profiler
+
+    def _stop_profiler(self, name: str, profiler: cProfile.Profile) -> None:
+        profiler.disable()
+        # Collect the stats before resuming the enclosing profiler: collecting
+        # disables the profiler again, which clears the profile hook of the
+        # thread whichever profiler holds it.
+        if name in self.profiles:
+            self.profiles[name].add(profiler)
+        else:
+            self.profiles[name] = pstats.Stats(profiler)
+        self._profilers.pop()
+        if self._profilers:
+            self._profilers[-1].enable()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a pipeline stage; repeated stages accumulate."""
+        profiler = self._start_profiler(name) if self.profile else None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            if profiler is not None:
+                self._stop_profiler(name, profiler)
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+            logger.debug("stage %s took %.6f s", name, seconds)
+            self.emit("stage", {"name": name, "seconds": seconds})
+
+    def record(self, name: str, value: Any) -> None:
+        """Store a metric, replacing any earlier value under the same name."""
+        self.metrics[name] = value
+        self.emit("metric", {"name": name, "value": value})
+
+    def record_max(self, name: str, value: Any) -> None:
+        """Store a metric as the running maximum of the reported values."""
+        if name not in self.metrics or value > self.metrics[name]:
+            self.record(name, value)
+
+    def emit(self, event: str, payload: dict[str, Any]) -> None:
+        for callback in self.callbacks:
+            callback(event, payload)
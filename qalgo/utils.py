@@ -1,11 +1,73 @@
+"""Numerical helpers shared by the qalgo algorithms.
+
+SciPy is only imported by the functions that need it (`condest`, and the
+sparse branches that can only be reached once a sparse matrix exists), so
+importing this module costs little more than NumPy. The `sps` and `sla`
+attributes are kept for compatibility and load `scipy.sparse` and
+`scipy.sparse.linalg` on first access.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib
+import logging
+import sys
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Hashable
+
 import numpy as np
-import scipy.sparse as sps
-import scipy.sparse.linalg as sla
+
+if TYPE_CHECKING:
+    import scipy.sparse as sps
+
+logger = logging.getLogger(__name__)
+
+_LAZY_MODULES = {"sps": "scipy.sparse", "sla": "scipy.sparse.linalg"}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_MODULES:
+        return importlib.import_module(_LAZY_MODULES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def issparse(A) -> bool:
+    """`scipy.sparse.issparse`, without importing SciPy when it is not loaded yet
+
+    A sparse matrix cannot exist before `scipy.sparse` is imported.
+    """
+    sparse = sys.modules.get("scipy.sparse")
+    return sparse is not None and sparse.issparse(A)
+
+
+# Side of the tiles compared by is_hermitian (2 MiB of float64 each).
+_HERMITIAN_TILE = 512
 
 
-def is_hermitian(A: np.ndarray, **kargs) -> bool:
-    """Check if matrix A is Hermitian (self-adjoint)"""
-    return A.shape[0] == A.shape[1] and np.allclose(A, A.conj().T, **kargs)
+def is_hermitian(A: np.ndarray | sps.sparray, rtol=1e-05, atol=1e-08) -> bool:
+    """Check if matrix A (dense or scipy.sparse) is Hermitian (self-adjoint)"""
+    if A.shape[0] != A.shape[1]:
+        return False
+    if issparse(A):
+        # Same test as np.allclose, without densifying: |A - A^H| <= atol + rtol |A^H|
+        A_dag = A.conj().T
+        excess = abs(A - A_dag) - rtol * abs(A_dag)
+        return excess.nnz == 0 or excess.max() <= atol
+    # np.allclose(A, A^H) on square tiles, each pair of mirrored tiles read
+    # once: a memory-mapped A is paged in piecewise, without full-size
+    # temporaries, and the check stops at the first mismatching tile.
+    n = A.shape[0]
+    for i in range(0, n, _HERMITIAN_TILE):
+        for j in range(i, n, _HERMITIAN_TILE):
+            upper = A[i : i + _HERMITIAN_TILE, j : j + _HERMITIAN_TILE]
+            lower = A[j : j + _HERMITIAN_TILE, i : i + _HERMITIAN_TILE].conj().T
+            if not (
+                np.allclose(upper, lower, rtol=rtol, atol=atol)
+                and np.allclose(lower, upper, rtol=rtol, atol=atol)
+            ):
+                return False
+    return True
 
 
 def next_power_of_2(n: int) -> int:
@@ -13,6 +75,80 @@ def next_power_of_2(n: int) -> int:
     return 2 ** int(np.ceil(np.log2(n)))
 
 
+def array_digest(A: np.ndarray | sps.sparray, *params) -> str:
+    """Hex digest of the contents, shape and dtype of A and any extra parameters
+
+    Sparse matrices are digested in canonical CSR form, from their nonzeros.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    if issparse(A):
+        import scipy.sparse as sps
+
+        A = sps.csr_array(A)
+        if not A.has_canonical_format:
+            A = A.copy()
+            A.sum_duplicates()
+        digest.update(repr(("csr", A.dtype.str, A.shape, params)).encode())
+        for part in (A.data, A.indices, A.indptr):
+            digest.update(np.ascontiguousarray(part).view(np.uint8))
+        return digest.hexdigest()
+    A = np.ascontiguousarray(A)
+    digest.update(repr((A.dtype.str, A.shape, params)).encode())
+    digest.update(A.reshape(-1).view(np.uint8))
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """A bounded mapping that evicts the least recently used entry"""
+
+    def __init__(self, maxsize: int = 128):
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be a positive integer, got {maxsize}.")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        return self._data.pop(key, default)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+
 def make_complement(data: np.int64, data_sz: int) -> np.int64:
     """
     Compute the unsigned complement representation of an integer
@@ -32,9 +168,86 @@ def get_complement(data: np.uint64, data_sz: int) -> np.int64:
     return (data << (64 - data_sz)) >> (64 - data_sz)
 
 
-def condest(A, splu_opt={}, onenormest_opt={}) -> float:
+# Estimates are memoized per matrix (and method/options) across calls.
+condest_cache = LRUCache(maxsize=32)
+
+
+def _without_zero_diagonal(A: sps.csc_array) -> sps.csc_array:
+    zero_diag = A.diagonal() == 0
+    logger.info(
+        "Ignoring %d rows/cols with zero diagonal entries "
+        "while estimating condition number.",
+        np.sum(zero_diag),
+    )
+    if not zero_diag.any():
+        return A
+    keep = np.flatnonzero(~zero_diag)
+    return A[np.ix_(keep, keep)]
+
+
+def _condest_splu(A: sps.csc_array, splu_opt: dict, onenormest_opt: dict) -> float:
+    import scipy.sparse.linalg as sla
+
+    # Get LU decomposition of the matrix.
+    try:
+        decomposition = sla.splu(A, **splu_opt)
+    except RuntimeError:
+        return np.inf
+
+    # Function for solving the equation system (original matrix).
+    def matvec(rhs):
+        return decomposition.solve(rhs, trans="N")
+
+    # Function for solving the equation system (Hermitian matrix).
+    def rmatvec(rhs):
+        return decomposition.solve(rhs, trans="H")
+
+    # Create a linear operator for the matrix inverse.
+    op = sla.LinearOperator(A.shape, matvec=matvec, rmatvec=rmatvec)  # type: ignore
+
+    # Compute the 1-norm of the matrix inverse (estimate).
+    nrm_inv = sla.onenormest(op, **onenormest_opt)
+
+    # Compute the 1-norm of the matrix (estimate).
+    nrm_ori = sla.onenormest(A, **onenormest_opt)
+
+    # Compute an estimate of the condition number.
+    c = nrm_ori * nrm_inv  # type: ignore
+
+    return float(c)
+
+
+def _condest_svds(A: sps.csc_array, svds_opt: dict) -> float:
+    import scipy.sparse.linalg as sla
+
+    if min(A.shape) < 3:
+        # Too small for ARPACK, and a dense SVD is cheap here.
+        sigma = np.linalg.svd(A.toarray(), compute_uv=False)
+        s_max, s_min = sigma[0], sigma[-1]
+    else:
+        opt = {"k": 1, "return_singular_vectors": False, "random_state": 0}
+        opt.update(svds_opt)
+        try:
+            s_max = sla.svds(A, which="LM", **opt)[0]
+            s_min = sla.svds(A, which="SM", **opt)[0]
+        except sla.ArpackNoConvergence:
+            logger.warning("ARPACK did not converge; falling back to splu.")
+            return _condest_splu(A, {}, {})
+    if s_min == 0:
+        return np.inf
+    return float(s_max / s_min)
+
+
+def condest(
+    A,
+    splu_opt={},
+    onenormest_opt={},
+    method="splu",
+    svds_opt={},
+    memoize=True,
+) -> float:
     """
-    Compute an estimate of the 1-norm condition number of a sparse matrix.
+    Compute an estimate of the condition number of a sparse matrix.
 
     Parameters
     ----------
@@ -44,6 +257,16 @@ def condest(A, splu_opt={}, onenormest_opt={}) -> float:
         Additional named arguments to `splu`.
     onenormest_opt : dict, optional
         Additional named arguments to `onenormest`.
+    method : {"splu", "svds"}, optional
+        "splu" estimates the 1-norm condition number from an LU factorization
+        of A. "svds" is matrix-free: it computes the extreme singular values
+        with ARPACK (Lanczos on A^H A) and returns the 2-norm condition number,
+        which avoids the LU fill-in of large sparse matrices.
+    svds_opt : dict, optional
+        Additional named arguments to `svds` (method="svds" only).
+    memoize : bool, optional
+        Reuse the estimate of an identical matrix from `condest_cache`, keyed
+        on a digest of its contents, the method and the options.
 
     Returns
     -------
@@ -82,39 +305,25 @@ def condest(A, splu_opt={}, onenormest_opt={}) -> float:
         raise ValueError("expected the matrix to be square")
     if A.shape[0] == 0:
         raise ValueError("cond is not defined on empty arrays")
+    if method not in ("splu", "svds"):
+        raise ValueError(f"Unknown method {method!r}. Use 'splu' or 'svds'.")
 
-    A = sps.csc_array(A)
-    print(
-        f"Ignoring {np.sum(A.diagonal() == 0)} rows/cols with zero diagonal entries \
-while estimating condition number."
-    )
-    nonzero_diag_indices = np.nonzero(A.diagonal())[0]
-    A = A[nonzero_diag_indices, :][:, nonzero_diag_indices]
-
-    # Get LU decomposition of the matrix.
-    try:
-        decomposition = sla.splu(A, **splu_opt)
-    except RuntimeError:
-        return np.inf
-
-    # Function for solving the equation system (original matrix).
-    def matvec(rhs):
-        return decomposition.solve(rhs, trans="N")
-
-    # Function for solving the equation system (Hermitian matrix).
-    def rmatvec(rhs):
-        return decomposition.solve(rhs, trans="H")
-
-    # Create a linear operator for the matrix inverse.
-    op = sla.LinearOperator(A.shape, matvec=matvec, rmatvec=rmatvec)  # type: ignore
-
-    # Compute the 1-norm of the matrix inverse (estimate).
-    nrm_inv = sla.onenormest(op, **onenormest_opt)
+    key = None
+    if memoize:
+        options = (splu_opt, onenormest_opt) if method == "splu" else (svds_opt,)
+        key = array_digest(A, "condest", method, repr(options))
+        c = condest_cache.get(key)
+        if c is not None:
+            return c
 
-    # Compute the 1-norm of the matrix (estimate).
-    nrm_ori = sla.onenormest(A, **onenormest_opt)
+    import scipy.sparse as sps
 
-    # Compute an estimate of the condition number.
-    c = nrm_ori * nrm_inv  # type: ignore
+    A = _without_zero_diagonal(sps.csc_array(A))
+    if method == "splu":
+        c = _condest_splu(A, splu_opt, onenormest_opt)
+    else:
+        c = _condest_svds(A, svds_opt)
 
-    return float(c)
+    if key is not None:
+        condest_cache.put(key, c)
+    return c
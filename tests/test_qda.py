@@ -1,7 +1,12 @@
+import time
+
 import numpy as np
+import pytest
 import qalgo as qa
 from qalgo import qda
 import pysparq as sq
+from qalgo import utils
+from qalgo.qda import fundamental
 
 
 def generate(zero=True) -> tuple[np.ndarray, np.ndarray]:
@@ -89,6 +94,27 @@ def test_classical2quantum():
     assert x_hat.shape == (5,), "Recovered vector x_hat should have length 5."
 
 
+def test_classical2quantum_out():
+    for A, b in (generate(zero=True), generate(zero=False)):
+        for A_c in (A, np.triu(A)):  # Hermitian and not
+            A_q, b_q, _ = qda.classical2quantum(A_c, b)
+            out = np.full_like(A_q, np.nan)
+            _A_q, _b_q, _ = qda.classical2quantum(A_c, b, out=out)
+            assert _A_q is out and np.array_equal(_A_q, A_q)
+            assert np.array_equal(_b_q, b_q)
+
+    # A Hermitian matrix of power-of-2 dimension is normalized in place.
+    A = np.array([[2.0, 1.0], [1.0, 2.0]])
+    A_q, _, _ = qda.classical2quantum(A, np.ones(2), out=A)
+    assert A_q is A and np.isclose(np.linalg.norm(A), 1.0)
+
+    with pytest.raises(ValueError):
+        qda.classical2quantum(np.triu(A), np.ones(2), out=np.empty((2, 2)))
+    B = np.triu(np.ones((4, 4)))
+    with pytest.raises(ValueError):
+        qda.classical2quantum(B[:2, :2], np.ones(2), out=B)
+
+
 def test_solve():
     sq.System.clear()
 
@@ -102,8 +128,851 @@ def test_solve():
     assert np.allclose(x_hat, _x_hat), "Quantum solution x_q should match _x_q."
 
     assert x_hat.shape == (4,), "Recovered vector x_hat should have length 4."
+    # Not a view pinning the complex projection buffer.
+    assert x_hat.flags.c_contiguous and x_hat.flags.owndata
+    assert x_hat.dtype == np.float64
+
+def test_solve_mode():
+    A, b = generate(zero=False)
+    kappa = qa.condest(A)
+
+    sq.System.clear()
+    x_hat = qda.solve(A, b, kappa=kappa)
+
+    sq.System.clear()
+    _x_hat = qda.solve(A, b, kappa=kappa, mode="debug")
+
+    assert np.allclose(x_hat, _x_hat), "Debug mode should not change the solution."
+
+    with pytest.raises(ValueError):
+        qda.solve(A, b, kappa=kappa, mode="fast")
+
+
+def test_telemetry():
+    sq.System.clear()
+
+    A, b = generate(zero=False)
+    events = []
+    telemetry = qa.Telemetry(callbacks=[lambda event, payload: events.append(event)])
+
+    qda.solve(A, b, mode="debug", checkpoint=qda.LastN(1), telemetry=telemetry)
+
+    for stage in ["condest", "encoding", "tree_build", "qram", "state_prep", "walk"]:
+        assert telemetry.timings[stage] > 0, f"Stage {stage} was not timed."
+    assert telemetry.metrics["steps"] == qda.qram.compute_step_rate(
+        0.01, telemetry.metrics["kappa"]
+    )
+    assert telemetry.metrics["padded_dim"] == 4
+    assert 0 < telemetry.metrics["p_success"] <= 1 + 1e-9
+    assert telemetry.metrics["max_system_size"] > 0
+    assert len(telemetry.metrics["checkpoints"]) == 1
+    assert "stage" in events and "metric" in events and "checkpoint" in events
+
+
+def test_telemetry_profile():
+    A, b = generate(zero=False)
+    telemetry = qa.Telemetry(profile=True)
+    sq.System.clear()
+    # "checkpoint" stages run inside the "walk" stage.
+    qda.solve(
+        A, b, mode="debug", checkpoint=qda.EveryK(10), step_rate=0.05,
+        telemetry=telemetry,
+    )
+
+    def functions(stage):
+        return {name for _, _, name in telemetry.profiles[stage].stats}
+
+    assert {"walk", "checkpoint"} <= set(telemetry.profiles)
+    # Each profile holds the work of its own stage only.
+    assert "step" in functions("walk") and "check" not in functions("walk")
+    assert "check" in functions("checkpoint") and "step" not in functions("checkpoint")
+    assert telemetry.timings["walk"] >= telemetry.timings["checkpoint"]
+
+    # A nested stage pauses and resumes the enclosing profile.
+    telemetry = qa.Telemetry(profile=True)
+    with telemetry.stage("outer"):
+        with telemetry.stage("inner"):
+            sorted(range(10))
+        sum(range(10))
+    assert "sum" in str(functions("outer")) and "sorted" not in str(functions("outer"))
+    assert "sorted" in str(functions("inner"))
+
+
+def test_solve_many():
+    A, b = generate(zero=True)
+    B = np.stack([b, np.arange(1.0, 6.0)], axis=1)
+    kappa = qa.condest(A)
+
+    telemetry = qa.Telemetry()
+    X = qda.solve_many(A, B, kappa=kappa, step_rate=0.002, telemetry=telemetry)
+    assert X.shape == (5, 2), "solve_many should return one column per rhs."
+    assert len(telemetry.metrics["p_success"]) == 2
+
+    for j in range(B.shape[1]):
+        sq.System.clear()
+        x_hat = qda.solve(A, B[:, j], kappa=kappa, step_rate=0.002)
+        assert np.allclose(X[:, j], x_hat), f"Column {j} differs from solve."
+
+    with pytest.raises(ValueError):
+        qda.prepare(A, kappa=kappa).solve_many(b)
+
+
+def test_solve_parallel():
+    A, b = generate(zero=False)
+    B = np.stack([b, b[::-1], np.ones(4)], axis=1)
+    kappa = qa.condest(A)
+
+    X, results = qda.solve_parallel(A, B, max_workers=2, kappa=kappa, step_rate=0.002)
+
+    assert [result.index for result in results] == [0, 1, 2]
+    assert any(result.reused_prepared for result in results)
+    assert all(result.seconds >= result.prepare_seconds for result in results)
+
+    sq.System.clear()
+    assert np.allclose(X, qda.solve_many(A, B, kappa=kappa, step_rate=0.002))
+
+    # Right-hand sides are released when their jobs finish, matrices on close().
+    with qda.ParallelSolver(max_workers=2, kappa=kappa, step_rate=0.002) as solver:
+        results = solver.map((A, B[:, j]) for j in range(3))
+        _X, _ = solver.solve_many(A, B)
+        # Done callbacks run in the pool's thread just after the results are set.
+        deadline = time.monotonic() + 10.0
+        while solver._rhs and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not solver._rhs
+        assert len(solver._segments) == 1, "A is shared once."
+    assert np.allclose(np.stack([result.x for result in results], axis=1), X)
+    assert np.allclose(_X, X)
+
+
+def test_tree_cache(tmp_path):
+    A, b = generate(zero=False)
+    kappa = qa.condest(A)
+    cache = qda.TreeCache(tmp_path)
+
+    sq.System.clear()
+    x_hat = qda.solve(A, b, kappa=kappa, step_rate=0.002, tree_cache=cache)
+    telemetry = qa.Telemetry()
+    sq.System.clear()
+    _x_hat = qda.solve(
+        A, b, kappa=kappa, step_rate=0.002, telemetry=telemetry, tree_cache=cache
+    )
+
+    assert np.allclose(x_hat, _x_hat), "Cached tree changed the solution."
+    assert telemetry.metrics["tree_cache_hit"]
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    key = cache.key(np.eye(4), 15, 50)
+    tree = fundamental.make_encoded_tree(np.eye(4).flatten(), 15, 50)
+    assert np.array_equal(cache.get_or_build(np.eye(4), 15, 50, lambda: tree), tree)
+    cached = cache.get(key)
+    assert isinstance(cached, np.memmap) and not cached.flags.writeable
+
+    # Only the most recently stored entry fits.
+    cache.max_bytes = cache.path(key).stat().st_size
+    cache.evict()
+    assert cache.stats()["entries"] == 1 and cache.get(key) is not None
+
+
+def test_embedding_cache():
+    A, b = generate(zero=False)
+    A_q, b_q, recover_x = qda.classical2quantum(A, b)
+    embed = qda.Classical2QuantumCache(maxsize=1)
+
+    _A_q, _b_q, _recover_x = embed(A, b)
+    assert np.array_equal(A_q, _A_q) and np.array_equal(b_q, _b_q)
+    assert np.array_equal(recover_x(b_q), _recover_x(_b_q))
+    assert not _A_q.flags.writeable and not _b_q.flags.writeable
+    assert embed(A.copy(), b)[0] is _A_q  # keyed on the values
+    assert embed.stats()["hits"] == 1 and embed.stats()["misses"] == 1
+
+    embed(np.eye(4), b)
+    assert embed.stats()["evictions"] == 1 and len(embed._cache) == 1
+
+    by_id = qda.Classical2QuantumCache(key="identity")
+    assert by_id.embed_matrix(A) is by_id.embed_matrix(A)
+    assert by_id.embed_matrix(A.copy()) is not by_id.embed_matrix(A)
+
+    telemetry = qa.Telemetry()
+    kappa = qa.condest(A)
+    sq.System.clear()
+    x_hat = qda.solve(A, b, kappa=kappa, step_rate=0.002)
+    sq.System.clear()
+    _x_hat = qda.solve(
+        A, b, kappa=kappa, step_rate=0.002, telemetry=telemetry, embedding_cache=by_id
+    )
+    assert telemetry.metrics["embedding_cache_hit"]
+    assert np.allclose(x_hat, _x_hat)
+
+
+def test_sparse_input():
+    import scipy.sparse as sps
+
+    for A, b in (generate(zero=True), generate(zero=False)):
+        for A_c in (A, np.triu(A)):  # Hermitian and not
+            A_q, b_q, recover_x = qda.classical2quantum(A_c, b)
+            _A_q, _b_q, _recover_x = qda.classical2quantum(sps.coo_array(A_c), b)
+            assert sps.issparse(_A_q) and _A_q.shape == A_q.shape
+            assert np.allclose(_A_q.toarray(), A_q) and np.allclose(_b_q, b_q)
+            assert np.array_equal(recover_x(b_q), _recover_x(b_q))
+
+            n = A_q.shape[0]
+            coo = _A_q.tocoo()
+            tree = fundamental.make_sparse_encoded_tree(
+                coo.col * n + coo.row, coo.data, n * n, 15, 50
+            )
+            _tree = fundamental.make_encoded_tree(A_q.flatten(order="F"), 15, 50)
+            assert np.array_equal(tree, _tree)
+
+    A, b = generate(zero=False)
+    kappa = qa.condest(A)
+    sq.System.clear()
+    x_hat = qda.solve(A, b, kappa=kappa, step_rate=0.002)
+    sq.System.clear()
+    _x_hat = qda.solve(sps.csr_matrix(A), b, kappa=kappa, step_rate=0.002)
+    assert np.allclose(x_hat, _x_hat)
+
+
+def test_load_system(tmp_path):
+    import scipy.io
+    import scipy.sparse as sps
+
+    A, b = generate(zero=False)
+    np.save(tmp_path / "A.npy", A)
+    np.save(tmp_path / "b.npy", b)
+    np.savez(tmp_path / "system.npz", A=A, b=b)
+    np.savez_compressed(tmp_path / "compressed.npz", A=A, b=b)
+    sps.save_npz(tmp_path / "sparse.npz", sps.csr_array(A))
+    scipy.io.mmwrite(tmp_path / "A.mtx", sps.coo_array(A))
+
+    for args in (("A.npy", "b.npy"), ("system.npz",), ("compressed.npz",)):
+        _A, _b = qa.io.load_system(*(tmp_path / name for name in args))
+        assert np.array_equal(_A, A) and np.array_equal(_b, b)
+        assert isinstance(_A, np.memmap) == (args[0] != "compressed.npz")
+    for name in ("sparse.npz", "A.mtx"):
+        _A, _ = qa.io.load_system(tmp_path / name, tmp_path / "b.npy")
+        assert sps.issparse(_A) and np.allclose(_A.toarray(), A)
+
+    # The memory-mapped A is not copied before it is embedded.
+    mapped = qa.io.load_array(tmp_path / "A.npy")
+    A_q, b_q, _ = qda.classical2quantum(mapped, b)
+    _A_q, _b_q, _ = qda.classical2quantum(A, b)
+    assert np.array_equal(A_q, _A_q) and np.array_equal(b_q, _b_q)
+
+    kappa = qa.condest(A)
+    sq.System.clear()
+    x_hat = qda.solve(A, b, kappa=kappa, step_rate=0.002)
+    sq.System.clear()
+    _x_hat = qda.solve_file(tmp_path / "system.npz", kappa=kappa, step_rate=0.002)
+    assert np.allclose(x_hat, _x_hat)
+
+    with pytest.raises(ValueError):
+        qa.io.load_array(tmp_path / "A.txt")
+
+
+def test_is_hermitian_tiles():
+    rng = np.random.default_rng(0)
+    n = utils._HERMITIAN_TILE + 3  # tiles of both sizes
+    A = rng.normal(size=(n, n))
+    A += A.T
+    assert utils.is_hermitian(A)
+    A[n - 1, 0] += 1e-3
+    assert not utils.is_hermitian(A) and not utils.is_hermitian(A.T)
+
+
+def test_condest():
+    import scipy.sparse as sps
+
+    A, b = generate(zero=False)
+    utils.condest_cache.clear()
+    kappa = utils.condest(A)
+    assert kappa == pytest.approx(np.linalg.cond(A, 1))
+    hits = utils.condest_cache.hits
+    assert utils.condest(A.copy()) == kappa
+    assert utils.condest_cache.hits == hits + 1
+
+    kappa_2 = utils.condest(sps.csr_array(A), method="svds", memoize=False)
+    assert kappa_2 == pytest.approx(np.linalg.cond(A))
+
+    rng = np.random.default_rng(0)
+    B = sps.random_array((200, 200), density=0.02, rng=rng) + 4 * sps.eye_array(200)
+    assert utils.condest(B, method="svds") == pytest.approx(
+        np.linalg.cond(B.toarray()), rel=1e-6
+    )
+    with pytest.raises(ValueError):
+        utils.condest(A, method="dense")
+
+    # The estimate of kappa in solve, prepare and ParallelSolver.
+    kappa_2 = np.linalg.cond(A)
+    assert not np.isclose(kappa_2, kappa)
+    for backend in ("python", "native"):
+        telemetry = qa.Telemetry()
+        sq.System.clear()
+        qda.solve(
+            A,
+            b,
+            step_rate=0.002,
+            telemetry=telemetry,
+            backend=backend,
+            condest_method="svds",
+            condest_opt={"svds_opt": {"tol": 1e-10}},
+        )
+        assert telemetry.metrics["kappa"] == pytest.approx(kappa_2)
+    sq.System.clear()
+    prepared = qda.prepare(A, step_rate=0.002, condest_method="svds")
+    assert prepared.kappa == pytest.approx(kappa_2)
+    X, _ = qda.solve_parallel(
+        A, b[:, None], max_workers=1, step_rate=0.002, condest_method="svds"
+    )
+    sq.System.clear()
+    assert np.allclose(X[:, 0], prepared.solve(b))
+
+
+def test_adaptive_steps():
+    adaptive = qda.AdaptiveSteps(p_success=0.5, initial_steps=3)
+    assert list(adaptive.trial_steps(40)) == [4, 8, 16, 32, 40]
+    with pytest.raises(ValueError):
+        qda.AdaptiveSteps()
+
+    A, b = generate(zero=False)
+    kappa = qa.condest(A)
+    B = np.stack([b, b[::-1]], axis=1)
+    telemetry = qa.Telemetry()
+    adaptive = qda.AdaptiveSteps(fidelity=0.99)
+    X = qda.solve_many(
+        A, B, kappa=kappa, step_rate=0.002, telemetry=telemetry, adaptive=adaptive
+    )
+
+    steps = telemetry.metrics["steps"]
+    for j, trials in enumerate(telemetry.metrics["adaptive_trials"]):
+        assert trials[-1].fidelity >= 0.99
+        assert telemetry.metrics["adaptive_steps"][j] == trials[-1].steps
+        walked = sum(trial.steps for trial in trials)
+        assert telemetry.metrics["walk_steps_total"][j] == walked
+        assert telemetry.metrics["steps_saved"][j] == steps - walked
+        x = np.linalg.solve(A, B[:, j])
+        assert abs(x @ X[:, j]) / np.linalg.norm(x) / np.linalg.norm(X[:, j]) > 0.98
+    # The second column starts from the step count found for the first.
+    second = telemetry.metrics["adaptive_trials"][1]
+    assert second[0].steps == telemetry.metrics["adaptive_steps"][0]
+
+
+def test_snapshot_resume(tmp_path):
+    A, b = generate(zero=False)
+    kappa = qa.condest(A)
+    path = tmp_path / "walk.qsnap"
+    options = dict(kappa=kappa, step_rate=0.002)
+
+    sq.System.clear()
+    snapshots = qda.StateSnapshots(path, every=50)
+    x_hat = qda.solve(A, b, snapshots=snapshots, **options)
+    assert snapshots.saved == 2
+
+    snapshot = qda.load_snapshot(path)
+    assert snapshot.step == 99
+    assert isinstance(snapshot.basis, np.memmap)
+    assert [name for name, _, _ in snapshot.registers][:2] == ["main_reg", "anc_UA"]
+    assert np.isclose(np.sum(np.abs(snapshot.basis["amplitude"]) ** 2), 1)
+
+    # The registers come back in the saved System order, with the saved state.
+    from qalgo.qda import snapshot as snapshot_module
+
+    sq.System.clear()
+    state = snapshot_module.restore_state(snapshot)
+    assert snapshot_module.active_registers() == snapshot.registers
+    snapshot_module.save_snapshot(tmp_path / "restored.qsnap", state, snapshot.step)
+    restored = qda.load_snapshot(tmp_path / "restored.qsnap")
+    names = [name for name, _, _ in snapshot.registers]
+    saved = snapshot.basis[np.lexsort([snapshot.basis[name] for name in names])]
+    again = restored.basis[np.lexsort([restored.basis[name] for name in names])]
+    for name in names:
+        assert np.array_equal(saved[name], again[name])
+    assert np.allclose(saved["amplitude"], again["amplitude"])
+
+    telemetry = qa.Telemetry()
+    sq.System.clear()
+    _x_hat = qda.solve(A, b, resume=path, telemetry=telemetry, **options)
+    assert telemetry.metrics["resumed_step"] == 99
+    assert np.allclose(x_hat, _x_hat)
+
+    # Debug checkpoints after resuming match those of an uninterrupted run.
+    debug = dict(options, mode="debug", checkpoint=qda.LastN(3))
+    telemetry = qa.Telemetry()
+    sq.System.clear()
+    qda.solve(A, b, telemetry=telemetry, **debug)
+    _telemetry = qa.Telemetry()
+    sq.System.clear()
+    qda.solve(A, b, resume=path, telemetry=_telemetry, **debug)
+    for record, _record in zip(
+        telemetry.metrics["checkpoints"], _telemetry.metrics["checkpoints"]
+    ):
+        assert record.step == _record.step
+        assert np.isclose(record.fidelity, _record.fidelity)
+
+    with pytest.raises(ValueError):
+        qda.solve(A, b[::-1], resume=path, **options)
+
+
+def test_projection():
+    A, b = generate(zero=False)
+    A_q, b_q, qram_A, qram_b = prepare_qram(A, b)
+    state = prepare_state(qram_b, 2)
+    select = {"anc_UA": 0, "anc_2": 0, "anc_3": 0}
+
+    expected, p = sq.PartialTraceSelect(select).get_projected_full(state)
+    project = qda.Projection(select)
+    amplitudes, _p = project(state)
+    assert amplitudes is project.buffer and _p == p
+    assert np.allclose(amplitudes, expected)
+    real, _ = project.real(state)
+    assert np.shares_memory(real, project.buffer)
+
+    out = np.empty(len(expected), dtype=np.complex128)
+    assert project(state, out=out)[0] is out
+    with pytest.raises(ValueError):
+        project(state, out=np.empty(len(expected)))
+
+    _, _, recover_x = qda.classical2quantum(np.triu(A), b)
+    x_q = np.arange(8.0)
+    assert np.shares_memory(recover_x(x_q), x_q)
+
+
+def test_embedding_layout():
+    import pickle
+
+    A, b = generate(zero=False)
+    n = A.shape[0]
+    for A_c, offset in ((A, 0), (np.triu(A), n)):  # Hermitian and not
+        _, _, recover_x = qda.classical2quantum(A_c, b)
+        assert isinstance(recover_x, qda.EmbeddingLayout)
+        assert recover_x.offset == offset
+
+        # A stack of solutions is recovered as one view.
+        X_q = np.arange(3.0 * recover_x.padded_dim).reshape(3, -1)
+        X = recover_x(X_q)
+        assert X.shape == (3, n) and np.shares_memory(X, X_q)
+        for x_q, x in zip(X_q, X):
+            assert np.array_equal(recover_x(x_q), x)
+
+        copy = pickle.loads(pickle.dumps(recover_x))
+        assert copy == recover_x and hash(copy) == hash(recover_x)
+        with pytest.raises(RuntimeError):
+            recover_x(np.zeros(recover_x.padded_dim + 1))
+
+    with pytest.raises(ValueError):
+        qda.EmbeddingLayout(5, 5, 4, False)
+
+
+def test_fidelity():
+    from qalgo.qda import fidelity
+
+    rng = np.random.default_rng(0)
+    states = rng.normal(size=(5, 8)) + 1j * rng.normal(size=(5, 8))
+    targets = rng.normal(size=(3, 8)).astype(np.complex64)
+    target = targets[0]
+
+    expected = [abs(np.sum(state * target.conj())) for state in states]
+    assert np.allclose(fidelity.fidelity(states, target), expected)
+    assert np.isclose(fidelity.fidelity(states[0], target), expected[0])
+    assert np.isclose(fundamental.get_fidelity(states[0], target), expected[0])
+    assert np.isclose(fundamental.get_fidelity(list(states[0]), list(target)), expected[0])
+
+    pairwise = fidelity.pairwise_fidelity(states, targets)
+    assert pairwise.shape == (5, 3) and np.allclose(pairwise[:, 0], expected)
+    rowwise = fidelity.fidelity(states[:3], targets)
+    assert np.allclose(rowwise, np.diag(pairwise[:3]))
+
+    normalized = fidelity.pairwise_fidelity(states, states, normalize=True)
+    assert np.allclose(np.diag(normalized), 1) and np.all(normalized <= 1 + 1e-12)
+    assert fidelity.fidelity([1, 0], [0.6, 0.8]) == pytest.approx(0.6)
+    with pytest.raises(ValueError):
+        fidelity.fidelity(states, targets[:, :4])
+
+
+def test_qda_reference():
+    A, b = generate(zero=False)
+    A_q, b_q, _ = qda.classical2quantum(A, b)
+    kappa = qa.condest(A)
+    reference = fundamental.QDAReference(A_q, b_q)
+
+    schedule = np.linspace(0, 1, 7)
+    fs = fundamental.compute_fs(schedule, kappa, 1.3)
+    states = reference.get_mid_eigenstates(fs)
+    assert states.shape == (7, 4 * len(b_q))
+    for s, state in zip(schedule, states):
+        debugger = fundamental.QDADebugger(A_q, b_q, s, kappa, 1.3)
+        assert np.allclose(state, debugger.get_mid_eigenstate())
+        shared = fundamental.QDADebugger(A_q, b_q, s, kappa, 1.3, reference)
+        assert np.allclose(state, shared.get_mid_eigenstate())
+
+    with pytest.raises(RuntimeError):
+        reference.get_mid_eigenstates(1.5)
+
+
+def test_pruning():
+    from qalgo.qda.pruning import probabilities
+
+    sq.System.clear()
+    state = sq.SparseState()
+    sq.AddRegister("r", sq.StateStorageType.UnsignedInteger, 3)(state)
+    amplitudes = np.array([0.9, 0.3, 0.2, 0.05, 0.01, 0.001, 0.0, 0.1])
+    amplitudes /= np.linalg.norm(amplitudes)
+    sq.Rot_GeneralStatePrep("r", list(amplitudes))(state)
+
+    pruning = qda.PruningPolicy(threshold=1e-3, every=2)
+    assert pruning(state, 0) == 0.0 and state.size() == 7
+    probs = amplitudes**2
+    assert np.isclose(pruning(state, 1), probs[4] + probs[5])
+    assert state.size() == 5 and np.isclose(probabilities(state).sum(), 1.0)
+
+    top = qda.PruningPolicy(top_k=2)
+    top(state, 0)
+    assert state.size() == 2
+    assert pruning.pruned_states == 2 and top.pruned_states == 3
+    with pytest.raises(ValueError):
+        qda.PruningPolicy()
+
+    A, b = generate(zero=False)
+    sq.System.clear()
+    x = qda.solve(A, b)
+    telemetry = qa.Telemetry()
+    sq.System.clear()
+    x_pruned = qda.solve(
+        A, b, pruning=qda.PruningPolicy(threshold=1e-10), telemetry=telemetry
+    )
+    assert 0 < telemetry.metrics["pruned_mass"] < 1e-6
+    assert telemetry.metrics["pruned_states"] > 0
+    assert np.allclose(x, x_pruned, atol=1e-4)
+
+
+def test_lazy_imports():
+    import os
+    import subprocess
+    import sys
+
+    code = (
+        "import sys, qalgo, qalgo.qda\n"
+        "assert 'scipy' not in sys.modules and 'pysparq' not in sys.modules\n"
+        "assert qalgo.qda.fundamental.make_encoded_tree\n"
+        "assert 'pysparq' not in sys.modules\n"
+        "from qalgo.qda import classical2quantum\n"
+        "assert qalgo.qda.qram.classical2quantum is classical2quantum\n"
+        "classical2quantum([[2.0, 1.0], [1.0, 2.0]], [1.0, 0.0])\n"
+        "assert 'scipy' not in sys.modules\n"
+        "assert qalgo.qda._solve is qalgo.qda._solve and qalgo.condest\n"
+    )
+    root = os.path.dirname(os.path.dirname(qa.__file__))
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=root)
+    assert "solve" in dir(qda) and "qram" in dir(qda)
+    with pytest.raises(AttributeError):
+        qda.no_such_name
+
+
+def test_backends():
+    from qalgo.qda import backends
+
+    A, b = generate(zero=False)
+    kappa = qa.condest(A)
+    sq.System.clear()
+    x_hat = qda.solve(A, b, kappa=kappa, step_rate=0.05)
+    telemetry = qa.Telemetry()
+    sq.System.clear()
+    _x_hat = qda.solve(
+        A, b, kappa=kappa, step_rate=0.05, backend="native", telemetry=telemetry
+    )
+    assert np.allclose(x_hat, _x_hat)
+    assert telemetry.metrics["backend"] == "native"
+
+    timings = qda.BackendTimings()
+    assert backends.select_backend(set(), 4, timings).name == "python"
+    timings.record("python", 4, 2.0, 100)
+    timings.record("native", 4, 1.0, 100)
+    assert backends.select_backend(set(), 4, timings).name == "native"
+    assert backends.select_backend({"debug"}, 4, timings).name == "python"
+    assert backends.select_backend(set(), 16, timings).name == "python"
+    assert [row["backend"] for row in timings.report()] == ["native", "python"]
+
+    # Only the most recent samples of each backend and bucket are kept.
+    timings = qda.BackendTimings(max_samples=2)
+    for seconds in (9.0, 1.0, 2.0):
+        timings.record("python", 4, seconds, 1)
+    assert timings.per_step("python", 4) == 1.5
+    assert timings.report()[0]["runs"] == 2
+    with pytest.raises(ValueError):
+        qda.BackendTimings(max_samples=0)
+
+    # A backend that records nothing in telemetry.
+    def solve_numpy(A, b, kappa, p, step_rate, telemetry, **options):
+        x = np.linalg.solve(A, b)
+        return x / np.linalg.norm(x)
+
+    qda.register_backend(qda.Backend("numpy", solve_numpy))
+    try:
+        x = np.linalg.solve(A, b)
+        for _kappa in (kappa, None):
+            # The reused telemetry holds "steps" of the native solve.
+            _x_hat = qda.solve(
+                A, b, kappa=_kappa, backend="numpy", telemetry=telemetry
+            )
+            assert np.allclose(_x_hat, x / np.linalg.norm(x))
+            assert telemetry.metrics["backend"] == "numpy"
+        assert "steps" not in telemetry.metrics
+        report = qda.timings.report()
+        runs = [row["runs"] for row in report if row["backend"] == "numpy"]
+        assert runs == [1], "Only the solve with a known step count is timed."
+        # Array-likes other than lists and arrays.
+        _x_hat = qda.solve(tuple(map(tuple, A)), tuple(b), kappa=kappa, backend="numpy")
+        assert np.allclose(_x_hat, x / np.linalg.norm(x))
+    finally:
+        backends._backends.pop("numpy")
+
+    with pytest.raises(ValueError):
+        qda.solve(A, b, kappa=kappa, backend="native", mode="debug")
+    with pytest.raises(ValueError):
+        qda.solve(A, b, kappa=kappa, backend="gpu")
+
+
+def test_precision():
+    A, b = generate(zero=False)
+    A_q, b_q, _ = qda.classical2quantum(A, b)
+    coarse = qda.plan_precision(A_q, tol=1e-2)
+    fine = qda.plan_precision(A_q, tol=1e-5)
+    assert coarse.exponent < fine.exponent <= 31
+    assert coarse.data_size == 2 * coarse.exponent + 1
+    assert coarse.rational_size < fine.rational_size
+    with pytest.raises(ValueError):
+        qda.Precision(15, 30, 16)  # too narrow for the tree nodes
+
+    kappa = qa.condest(A)
+    sq.System.clear()
+    x = qda.solve(A, b, kappa=kappa)
+    telemetry = qa.Telemetry()
+    sq.System.clear()
+    x_planned = qda.solve(A, b, kappa=kappa, precision=1e-3, telemetry=telemetry)
+    planned = telemetry.metrics["precision"]
+    assert planned.data_size < 50 and planned.rational_size < 51
+    assert telemetry.metrics["encoding_error"] <= 1e-3 / kappa
+    assert telemetry.metrics["b_encoding_error"] <= 1e-3
+    assert abs(x @ x_planned) > 1 - 1e-3
+
+
+def test_vector_tree():
+    rng = np.random.default_rng(0)
+    data_size = 50
+    exponent = 15
+    vec = rng.normal(size=64)
+
+    conv = fundamental.scale_and_convert_vector(vec, exponent, data_size)
+    scaled = np.rint(vec * 2.0**exponent).astype(np.int64)
+    reference = np.array(
+        [utils.make_complement(v, data_size) for v in scaled], dtype=np.uint64
+    )
+    assert np.array_equal(conv, reference), "Vectorized encoding mismatch."
+
+    # Level-by-level reference tree: [root, ..., leaf pairs, leaves, 0]
+    with np.errstate(over="ignore"):  # uint64 squares wrap, as in the tree
+        leaf_level = np.array(
+            [
+                utils.get_complement(conv[i], data_size) ** 2
+                + utils.get_complement(conv[i + 1], data_size) ** 2
+                for i in range(0, conv.size, 2)
+            ],
+            dtype=np.uint64,
+        )
+    levels = [leaf_level]
+    while levels[0].size > 1:
+        levels.insert(0, levels[0][0::2] + levels[0][1::2])
+    reference_tree = np.concatenate(levels + [conv, np.zeros(1, np.uint64)])
+
+    tree = fundamental.make_vector_tree(conv, data_size)
+    assert np.array_equal(tree, reference_tree), "Vector tree mismatch."
+    # Other lengths are padded with zero leaves to the next power of 2.
+    padded = np.concatenate([conv[:48], np.zeros(16, dtype=np.uint64)])
+    assert np.array_equal(
+        fundamental.make_vector_tree(conv[:48], data_size),
+        fundamental.make_vector_tree(padded, data_size),
+    )
+    assert fundamental.make_vector_tree(conv[:3], data_size).size == 8
+    assert np.array_equal(
+        fundamental.make_encoded_tree(vec, exponent, data_size), reference_tree
+    ), "Encoded tree mismatch."
+
+
+def test_matrix_tree(tmp_path):
+    rng = np.random.default_rng(0)
+    A = rng.normal(size=(16, 16)) / 16
+    reference = fundamental.make_encoded_tree(A.flatten(order="F"), 15, 50)
+
+    # Row blocks of a C-ordered (here memory-mapped) matrix, column blocks of
+    # an F-ordered one, both into a preallocated buffer.
+    np.save(tmp_path / "A.npy", A)
+    mapped = np.load(tmp_path / "A.npy", mmap_mode="r")
+    for matrix in (mapped, np.asfortranarray(A)):
+        out = np.empty(2 * A.size, dtype=np.uint64)
+        tree = fundamental.make_matrix_encoded_tree(
+            matrix, 15, 50, out=out, chunk_bytes=3 * 8 * 16
+        )
+        assert tree is out and np.array_equal(tree, reference), "Matrix tree mismatch."
+
+    # A cache miss builds straight into the cache file.
+    cache = qda.TreeCache(tmp_path / "trees")
+    tree = cache.get_or_build(
+        A,
+        15,
+        50,
+        lambda out: fundamental.make_matrix_encoded_tree(A, 15, 50, out=out),
+        size=2 * A.size,
+    )
+    assert isinstance(tree, np.memmap) and np.array_equal(tree, reference)
+    assert np.array_equal(cache.get(cache.key(A, 15, 50)), reference)
+
+
+def prepare_qram(A, b):
+    A_q, b_q, _ = qda.classical2quantum(A, b)
+    log_column_size = int(np.log2(A_q.shape[0]))
+    qram_A = sq.QRAMCircuit_qutrit(
+        2 * log_column_size + 1,
+        50,
+        fundamental.make_encoded_tree(A_q.flatten(order="F"), 15, 50),
+    )
+    qram_b = sq.QRAMCircuit_qutrit(
+        log_column_size + 1, 50, fundamental.make_encoded_tree(b_q, 15, 50)
+    )
+    return A_q, b_q, qram_A, qram_b
+
+
+def prepare_state(qram_b, log_column_size) -> sq.SparseState:
+    sq.System.clear()
+    state = sq.SparseState()
+    sq.AddRegister("main_reg", sq.StateStorageType.UnsignedInteger, log_column_size)(
+        state
+    )
+    sq.AddRegister("anc_UA", sq.StateStorageType.UnsignedInteger, log_column_size)(
+        state
+    )
+    for name in ("anc_4", "anc_3", "anc_2", "anc_1"):
+        sq.AddRegister(name, sq.StateStorageType.Boolean, 1)(state)
+    sq.State_Prep_via_QRAM(qram_b, "main_reg", 50, 51)(state)
+    return state
+
+
+REGISTERS = ("main_reg", "anc_UA", "anc_1", "anc_2", "anc_3", "anc_4")
+
+
+def test_walk_sequence_reuses_operators():
+    A, b = generate(zero=False)
+    A_q, b_q, qram_A, qram_b = prepare_qram(A, b)
+    log_column_size = int(np.log2(A_q.shape[0]))
+    sequence = qda.qram.WalkSequence_via_QRAM(
+        qram_A, qram_b, *REGISTERS, 20, qa.condest(A), 1.3, 50, 51
+    )
+
+    projected = []
+    for _ in range(2):
+        state = prepare_state(qram_b, log_column_size)
+
+        walks = [sequence.get_walk(n) for n in range(sequence.steps)]
+        sequence(state)
+        assert all(sequence.get_walk(n) is walks[n] for n in range(sequence.steps))
+
+        sol, _ = sq.PartialTraceSelect(
+            {"anc_UA": 0, "anc_2": 0, "anc_3": 0}
+        ).get_projected_full(state)
+        projected.append(np.array(sol, dtype=np.complex128))
+
+    assert np.allclose(projected[0], projected[1]), "Cached walks changed the state."
+
+    # A bounded cache keeps the last operators only, with the same result.
+    bounded = qda.qram.WalkSequence_via_QRAM(
+        qram_A, qram_b, *REGISTERS, 20, qa.condest(A), 1.3, 50, 51, cache_size=5
+    )
+    state = prepare_state(qram_b, log_column_size)
+    bounded(state)
+    assert len(bounded._walks) == 5
+    sol, _ = sq.PartialTraceSelect(
+        {"anc_UA": 0, "anc_2": 0, "anc_3": 0}
+    ).get_projected_full(state)
+    assert np.allclose(np.array(sol, dtype=np.complex128), projected[0])
+    with pytest.raises(ValueError):
+        bounded.compile()
+
+    # The operators bind register ids, so compile() needs the registers.
+    sq.System.clear()
+    with pytest.raises(RuntimeError):
+        qda.qram.WalkSequence_via_QRAM(
+            qram_A, qram_b, *REGISTERS, 20, 2.0, 1.3, 50, 51, cache_size=None
+        ).compile()
+
+
+def test_checkpoint_policies():
+    def checked(policy, steps=100):
+        policy.start(steps)
+        return [n for n in range(steps) if policy(n, 0.0)]
+
+    assert checked(qda.EveryK(2), 10) == [1, 3, 5, 7, 9]
+    assert checked(qda.LastN(3)) == [97, 98, 99]
+
+    log_steps = checked(qda.LogSpaced(5))
+    assert log_steps[0] == 0 and log_steps[-1] == 99 and len(log_steps) == 5
+
+    budget = qda.TimeBudget(0.5)
+    budget.start(10)
+    assert budget(0, 1.0)
+    budget.observe(None, 2.0)
+    assert not budget(1, 3.0) and budget(2, 4.0)
+
+    from qalgo.qda.checkpoint import CheckpointPolicy
+
+    class Incomplete(CheckpointPolicy):
+        def start(self, steps):
+            super().start(steps)
+
+    with pytest.raises(TypeError):
+        Incomplete()  # fails here, not in the middle of a solve
+
+
+def test_debug_walk_sequence_records():
+    A, b = generate(zero=False)
+    A_q, b_q, qram_A, qram_b = prepare_qram(A, b)
+    state = prepare_state(qram_b, int(np.log2(A_q.shape[0])))
+    kappa = qa.condest(A)
+
+    sequence = qda.qram.WalkSequence_via_QRAM_Debug(
+        qram_A, qram_b, A_q, b_q, *REGISTERS, 20, kappa, 1.3, 50, 51, qda.LastN(2)
+    )
+    records = sequence(state)
+
+    assert [record.step for record in records] == [18, 19]
+    assert records[-1].s == 19 / 20
+    assert all(0 <= record.fidelity <= 1 + 1e-9 for record in records)
+    assert all(0 <= record.p_success <= 1 + 1e-9 for record in records)
+    assert records[0].wall_time <= records[1].wall_time
+
 
 if __name__ == "__main__":
     test_correctness()
     test_classical2quantum()
-    test_solve()
\ No newline at end of file
+    test_classical2quantum_out()
+    test_solve()
+    test_solve_mode()
+    test_telemetry()
+    test_telemetry_profile()
+    test_solve_many()
+    test_solve_parallel()
+    test_embedding_cache()
+    test_is_hermitian_tiles()
+    test_condest()
+    test_adaptive_steps()
+    test_sparse_input()
+    test_embedding_layout()
+    test_fidelity()
+    test_qda_reference()
+    test_pruning()
+    test_lazy_imports()
+    test_backends()
+    test_precision()
+    test_projection()
+    test_vector_tree()
+    test_walk_sequence_reuses_operators()
+    test_checkpoint_policies()
+    test_debug_walk_sequence_records()
\ No newline at end of file